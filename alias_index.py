@@ -0,0 +1,254 @@
+"""Persistent index of books-name to 26AS-deductor aliases, per client.
+
+The same clients are reconciled every quarter and every year, and their
+parties come back under the same names. Each pairing made once is kept here
+(in SQLite, at ``AS26_ALIAS_DB``) so the next reconciliation of that client
+can look it up instead of fuzzy-matching it again: a books party with a
+known alias is paired with the 26AS row carrying the alias's TAN when the
+statement has one, otherwise with the row of that name. In one-to-one
+mode, parties with an identical 26AS name never get here; those are paired
+first (``matching.exact_pairs``), whether or not the index is used.
+
+Only the parties left over go to the fuzzy matcher, and the pairs it finds
+are recorded for next time. Aliases recorded by the matcher are reused only
+while their score still clears the sensitivity in use; ``confirmed`` aliases
+(imported from a reviewed CSV) always apply.
+
+The parties the matcher could not pair are remembered too, against a digest
+of the names, mode and sensitivity they were matched with (``miss_context``),
+so running the same reconciliation again skips them instead of scanning the
+whole 26AS side for each one once more. Only a client's latest misses are
+kept.
+
+The index is exported and imported as CSV (``EXPORT_COLUMNS``), so it can be
+reviewed in Excel, corrected and moved between machines.
+"""
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from clients import client_key
+from matching import normalise
+
+ALIAS_DB = os.environ.get('AS26_ALIAS_DB', os.path.join(os.path.expanduser('~'), '.ai-tools', 'aliases.sqlite3'))
+
+FUZZY, CONFIRMED = 'fuzzy', 'confirmed'
+SOURCES = (FUZZY, CONFIRMED)
+
+EXPORT_COLUMNS = ['client', 'books_name', 'as26_name', 'tan', 'score', 'source', 'hits', 'first_seen', 'last_seen']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS aliases (
+    client TEXT NOT NULL,
+    books_name TEXT NOT NULL,
+    as26_name TEXT NOT NULL,
+    tan TEXT,
+    score REAL NOT NULL,
+    source TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 1,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (client, books_name, as26_name)
+);
+CREATE INDEX IF NOT EXISTS aliases_tan ON aliases (client, tan);
+CREATE TABLE IF NOT EXISTS misses (
+    client TEXT NOT NULL,
+    books_name TEXT NOT NULL,
+    context TEXT NOT NULL,
+    PRIMARY KEY (client, books_name)
+);
+"""
+
+# A confirmed alias is never downgraded by the matcher finding it again.
+_UPSERT = """
+INSERT INTO aliases (client, books_name, as26_name, tan, score, source, hits, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (client, books_name, as26_name) DO UPDATE SET
+    tan = COALESCE(excluded.tan, aliases.tan),
+    score = CASE WHEN aliases.source = 'confirmed' AND excluded.source != 'confirmed'
+                 THEN aliases.score ELSE excluded.score END,
+    source = CASE WHEN aliases.source = 'confirmed' THEN 'confirmed' ELSE excluded.source END,
+    hits = aliases.hits + excluded.hits,
+    last_seen = excluded.last_seen
+"""
+
+
+def _now():
+    return time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def score(books_name, as26_name):
+    """The matcher's score for a pair, from the normalised names."""
+    return float(np.rint(fuzz.token_set_ratio(books_name, as26_name)))
+
+
+def miss_context(mode, threshold, as26_names, books_names=None):
+    """Digest of what decides that a party has no match.
+
+    In one-to-one mode a party can also go unmatched because others took its
+    candidates, so the books names are part of it there.
+    """
+    h = hashlib.sha256(f'{mode}\0{threshold}'.encode())
+    for names in (as26_names, books_names or ()):
+        h.update(b'\1')
+        for name in names:
+            h.update(str(name).encode('utf-8', 'replace') + b'\0')
+    return h.hexdigest()
+
+
+class AliasIndex:
+    """SQLite-backed alias store. Safe to share between threads and processes."""
+
+    def __init__(self, path=ALIAS_DB):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call, committed on success: sqlite3
+        # connections cannot cross threads, and jobs and batch workers write
+        # concurrently.
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def aliases(self, client):
+        """Stored aliases of ``client`` as dicts, most used first."""
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute('SELECT * FROM aliases WHERE client = ? ORDER BY hits DESC, books_name',
+                              (client_key(client),)).fetchall()
+        return [dict(row) for row in rows]
+
+    def revision(self, client):
+        """Changes whenever ``client``'s aliases do; for keying cached results."""
+        with self._connect() as db:
+            return db.execute('SELECT COUNT(*), MAX(last_seen), SUM(hits) FROM aliases WHERE client = ?',
+                              (client_key(client),)).fetchone()
+
+    def resolve(self, client, books_names, as26_names, threshold, as26_tans=None, unique=False, context=None):
+        """Pair what the index already knows.
+
+        Returns ``(pairs, how)``: ``pairs`` maps books positions to 26AS
+        positions, as the matchers do, and ``how`` says for each books
+        position the index settled whether it was paired by stored ``alias``
+        or is a known ``miss`` in ``context``. With ``unique``, no 26AS row is
+        given to two books parties.
+        """
+        as26_norm = [normalise(n) for n in as26_names]
+        by_name = {}
+        for j, norm in enumerate(as26_norm):
+            by_name.setdefault(norm, j)
+        by_tan = {}
+        for j, tan in enumerate(as26_tans or ()):
+            if tan: by_tan.setdefault(tan, j)
+
+        known = {}
+        for row in self.aliases(client):
+            if row['source'] != CONFIRMED and row['score'] < threshold: continue
+            known.setdefault(row['books_name'], []).append(row)
+
+        missed = set()
+        if context:
+            with self._connect() as db:
+                missed = {name for name, in db.execute(
+                    'SELECT books_name FROM misses WHERE client = ? AND context = ?', (client_key(client), context))}
+
+        pairs, how, used = {}, {}, set()
+        for i, name in enumerate(books_names):
+            norm = normalise(name)
+            # Confirmed aliases first, then the best scoring.
+            for row in sorted(known.get(norm, ()), key=lambda r: (r['source'] != CONFIRMED, -r['score'])):
+                j = by_tan.get(row['tan']) if row['tan'] else None
+                if j is None: j = by_name.get(row['as26_name'])
+                if j is None or (unique and j in used): continue
+                pairs[i], how[i] = j, 'alias'
+                used.add(j)
+                break
+            else:
+                if norm in missed: how[i] = 'miss'
+        return pairs, how
+
+    def record(self, client, pairs, source=FUZZY):
+        """Add or refresh aliases from ``(books_name, as26_name, tan, score)`` tuples."""
+        now = _now()
+        client = client_key(client)
+        rows = [(client, normalise(b), normalise(a), tan or None, float(s), source, 1, now, now)
+                for b, a, tan, s in pairs]
+        if not rows: return 0
+        with self._connect() as db:
+            db.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def record_misses(self, client, books_names, context):
+        """Remember the parties left unmatched in ``context``, replacing older misses."""
+        client = client_key(client)
+        with self._connect() as db:
+            db.execute('DELETE FROM misses WHERE client = ?', (client,))
+            db.executemany('INSERT OR IGNORE INTO misses VALUES (?, ?, ?)',
+                           [(client, normalise(name), context) for name in books_names])
+
+    def forget(self, client):
+        """Drop every alias of ``client``; returns how many there were."""
+        client = client_key(client)
+        with self._connect() as db:
+            db.execute('DELETE FROM misses WHERE client = ?', (client,))
+            return db.execute('DELETE FROM aliases WHERE client = ?', (client,)).rowcount
+
+    def export_csv(self, client=None):
+        """The index (or one client's part of it) as CSV text."""
+        query, args = 'SELECT * FROM aliases', ()
+        if client:
+            query, args = query + ' WHERE client = ?', (client_key(client),)
+        with self._connect() as db:
+            rows = db.execute(query + ' ORDER BY client, books_name, as26_name', args).fetchall()
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(rows)
+        return out.getvalue()
+
+    def import_csv(self, text, client=None):
+        """Merge aliases from CSV text in the export layout.
+
+        ``books_name`` and ``as26_name`` are required; a missing ``client``
+        column needs ``client`` given, and rows without a ``source`` are
+        taken as confirmed (a reviewed list). Returns the rows merged.
+        """
+        reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+        missing = {'books_name', 'as26_name'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"Alias CSV is missing column(s): {', '.join(sorted(missing))}")
+        now = _now()
+        rows = []
+        for line, row in enumerate(reader, 2):
+            owner = (row.get('client') or '').strip() or client
+            books_name, as26_name = normalise(row['books_name'] or ''), normalise(row['as26_name'] or '')
+            if not (books_name and as26_name): continue
+            if not owner:
+                raise ValueError(f"Alias CSV line {line} has no client")
+            source = (row.get('source') or CONFIRMED).strip().lower()
+            if source not in SOURCES:
+                raise ValueError(f"Alias CSV line {line}: unknown source '{source}'")
+            rows.append((
+                client_key(owner), books_name, as26_name, (row.get('tan') or '').strip().upper() or None,
+                float(row.get('score') or score(books_name, as26_name)), source, int(row.get('hits') or 1),
+                row.get('first_seen') or now, row.get('last_seen') or now,
+            ))
+        with self._connect() as db:
+            db.executemany(_UPSERT, rows)
+        return len(rows)
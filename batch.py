@@ -0,0 +1,305 @@
+"""Headless batch run of the 26AS suite over many clients.
+
+Runs the same steps as the app's three tabs (PDF to Excel, Tally Summary,
+Reconciliation) for every client, with clients spread over a process pool.
+
+    python batch.py --input clients/ --output out/ --jobs 8
+    python batch.py --manifest clients.csv --output out/
+
+Clients come either from a folder layout, one sub-folder per client holding
+its 26AS PDF and its Tally ledger (xlsx, csv or Tally XML), or from a
+CSV manifest with ``client``, ``pdf`` and ``ledger`` columns (paths relative
+to the manifest).
+
+Each client gets ``out/<client>/`` with the three workbooks the app offers
+for download, and ``out/run_report.csv`` lists every client with its counts,
+totals, timings and any error. Finished clients are appended to
+``out/checkpoint.jsonl`` together with a digest of their inputs; an
+interrupted run started again with the same output folder skips them unless
+their files have changed.
+
+Reconciliations use the party alias index (``alias_index``) under each
+client's name, so pairs learnt in the app or in earlier batches are reused
+and new ones are remembered; ``--no-aliases`` matches from scratch.
+
+With ``--store``, every transaction of each statement is saved to the
+transaction store (``transaction_store``) under the client and the
+statement's assessment year, the extract workbook gains a Transactions
+sheet, and the 26AS side of the reconciliation is the store's per-TAN
+summary of those transactions.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from alias_index import AliasIndex
+from excel_export import extract_workbook, reconciliation_workbook, summary_workbook
+from ingest import LEDGER_FORMATS, file_format, iter_ledger_chunks
+from ocr_engine import default_workers
+from pdf_extract import cache_version, extract_statement, extract_table
+from reconcile import MATCH_MODES, reconcile
+from result_cache import ResultCache, digest_bytes, digest_file
+from tally_summary import summarise_chunks
+from transaction_store import STORE_DIR, TransactionStore
+
+EXTRACT_FILE = '26AS_Extracted_Data.xlsx'
+SUMMARY_FILE = 'Party_Summary.xlsx'
+RECONCILIATION_FILE = 'Reconciliation_Statement.xlsx'
+CHECKPOINT_FILE = 'checkpoint.jsonl'
+REPORT_FILE = 'run_report.csv'
+
+REPORT_COLUMNS = [
+    'client', 'status', 'error', 'pages', 'text_pages', 'ocr_pages', 'cache_pages', 'deductors',
+    'assessment_year', 'transactions', 'parties', 'rejected_rows', 'matched', 'books_only', '26as_only',
+    'amount_in_books', 'amount_in_26as', 'difference', 'seconds',
+]
+
+# Set in each pool worker by _init_worker.
+_settings = {}
+
+
+def clients_from_folder(root):
+    """One client per sub-folder of ``root``: its PDF and its ledger file."""
+    clients = []
+    for name in sorted(os.listdir(root)):
+        folder = os.path.join(root, name)
+        if not os.path.isdir(folder): continue
+        files = sorted(os.listdir(folder))
+        pdfs = [f for f in files if file_format(f) == 'pdf']
+        ledgers = [f for f in files if file_format(f) in LEDGER_FORMATS and not f.startswith('~$')]
+        clients.append({
+            'client': name,
+            'pdf': os.path.join(folder, pdfs[0]) if len(pdfs) == 1 else None,
+            'ledger': os.path.join(folder, ledgers[0]) if len(ledgers) == 1 else None,
+            'problem': _layout_problem(pdfs, ledgers),
+        })
+    return clients
+
+
+def _layout_problem(pdfs, ledgers):
+    if len(pdfs) != 1: return f"expected one 26AS PDF, found {len(pdfs)}"
+    if len(ledgers) != 1: return f"expected one ledger file, found {len(ledgers)}"
+    return None
+
+
+def clients_from_manifest(path):
+    """Clients listed in a CSV manifest with client, pdf and ledger columns."""
+    base = os.path.dirname(os.path.abspath(path))
+    clients = []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            client = (row.get('client') or '').strip()
+            if not client: continue
+            pdf, ledger = (row.get('pdf') or '').strip(), (row.get('ledger') or '').strip()
+            clients.append({
+                'client': client,
+                'pdf': os.path.join(base, pdf) if pdf else None,
+                'ledger': os.path.join(base, ledger) if ledger else None,
+                'problem': None if pdf and ledger else "manifest row needs both pdf and ledger",
+            })
+    return clients
+
+
+def input_digest(client):
+    """Digest of a client's input files and the settings that shape its output."""
+    store = ('store', _settings['store']) if _settings.get('store') else ()
+    return digest_bytes(digest_file(client['pdf']), digest_file(client['ledger']), cache_version(),
+                        _settings.get('threshold'), _settings.get('mode'), *store)
+
+
+def _finished(client, previous):
+    """Whether ``previous`` (a checkpoint row) covers the client's current inputs."""
+    if not previous or client['problem']: return False
+    try:
+        return previous.get('digest') == input_digest(client)
+    except OSError:
+        return False  # a missing file; let the worker report it
+
+
+def _save(data, path):
+    """Write a workbook buffer next to ``path`` and move it into place."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data.getbuffer())
+    os.replace(tmp, path)
+
+
+def _init_worker(settings):
+    _settings.update(settings)
+    if settings['use_cache']:
+        _settings['cache'] = ResultCache(version=cache_version())
+    if settings['use_aliases']:
+        _settings['aliases'] = AliasIndex()
+    if settings.get('store'):
+        _settings['transactions'] = TransactionStore(settings['store'])
+
+
+def process_client(client):
+    """Run extraction, summary and reconciliation for one client.
+
+    Returns its report row; failures are reported, not raised, so one bad
+    client does not stop the batch.
+    """
+    start = time.perf_counter()
+    report = {'client': client['client'], 'status': 'ok'}
+    try:
+        if client['problem']:
+            raise ValueError(client['problem'])
+        out_dir = os.path.join(_settings['output'], client['client'])
+        os.makedirs(out_dir, exist_ok=True)
+        report['digest'] = input_digest(client)
+
+        store = _settings.get('transactions')
+        if store:
+            df_26as, transactions, year, page_sources = extract_statement(
+                client['pdf'], workers=_settings['ocr_workers'], cache=_settings.get('cache'))
+        else:
+            df_26as, page_sources = extract_table(client['pdf'], workers=_settings['ocr_workers'], cache=_settings.get('cache'))
+            transactions = None
+        if df_26as.empty:
+            raise ValueError("no deductor rows found in the 26AS PDF")
+        _save(extract_workbook(df_26as, transactions), os.path.join(out_dir, EXTRACT_FILE))
+        if store:
+            if not year:
+                raise ValueError("no assessment year found in the 26AS PDF to store its transactions under")
+            report['assessment_year'] = year
+            report['transactions'] = store.add(client['client'], year, transactions, digest_file(client['pdf']))
+            df_26as = store.party_summary(client['client'], year)
+
+        totals, rejected = summarise_chunks(iter_ledger_chunks(client['ledger'], client['ledger']))
+        _save(summary_workbook(totals), os.path.join(out_dir, SUMMARY_FILE))
+
+        final_df = reconcile(totals.reset_index(), df_26as, _settings['threshold'], mode=_settings['mode'],
+                             aliases=_settings.get('aliases'), client=client['client'])
+        _save(reconciliation_workbook(final_df), os.path.join(out_dir, RECONCILIATION_FILE))
+
+        parties = final_df.iloc[:-1]
+        in_books = parties['Amount in Books'] != 0
+        in_26as = parties['Amount in 26AS'] != 0
+        total = final_df.iloc[-1]
+        report.update({
+            'pages': sum(page_sources.values()),
+            'text_pages': page_sources['text'],
+            'ocr_pages': page_sources['ocr'],
+            'cache_pages': page_sources['cache'],
+            'deductors': len(df_26as),
+            'parties': len(totals),
+            'rejected_rows': len(rejected),
+            'matched': int((in_books & in_26as).sum()),
+            'books_only': int((in_books & ~in_26as).sum()),
+            '26as_only': int((~in_books & in_26as).sum()),
+            'amount_in_books': round(float(total['Amount in Books']), 2),
+            'amount_in_26as': round(float(total['Amount in 26AS']), 2),
+            'difference': round(float(total['Difference']), 2),
+        })
+    except Exception as e:
+        report.update({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+    report['seconds'] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def load_checkpoint(path):
+    """Report rows of clients finished in earlier runs, by client name."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            done[row['client']] = row
+    return done
+
+
+def write_report(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run(clients, output, jobs, ocr_workers, threshold, mode, use_cache=True, resume=True, use_aliases=True,
+        store=None):
+    """Process ``clients`` and return their report rows in input order.
+
+    ``store`` is the transaction store folder to save transactions to, if any.
+    """
+    os.makedirs(output, exist_ok=True)
+    settings = {'output': output, 'ocr_workers': ocr_workers, 'threshold': threshold,
+                'mode': mode, 'use_cache': use_cache, 'use_aliases': use_aliases, 'store': store}
+    _settings.update(settings)
+    checkpoint_path = os.path.join(output, CHECKPOINT_FILE)
+    done = load_checkpoint(checkpoint_path) if resume else {}
+
+    reports = {}
+    todo = []
+    for client in clients:
+        previous = done.get(client['client'])
+        if _finished(client, previous):
+            reports[client['client']] = previous
+        else:
+            todo.append(client)
+    print(f"{len(clients)} clients: {len(reports)} already done, {len(todo)} to process "
+          f"({jobs} jobs x {ocr_workers} OCR workers)")
+
+    try:
+        with open(checkpoint_path, 'a' if resume else 'w', encoding='utf-8') as checkpoint, \
+                ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(settings,)) as pool:
+            futures = [pool.submit(process_client, client) for client in todo]
+            for n, future in enumerate(as_completed(futures), 1):
+                report = future.result()
+                reports[report['client']] = report
+                if report['status'] == 'ok':
+                    checkpoint.write(json.dumps(report) + '\n')
+                    checkpoint.flush()
+                detail = report.get('error') or f"{report['matched']} matched, difference {report['difference']:,.2f}"
+                print(f"[{n}/{len(todo)}] {report['client']}: {report['status']} in {report['seconds']}s - {detail}")
+    finally:
+        rows = [reports[c['client']] for c in clients if c['client'] in reports]
+        write_report(os.path.join(output, REPORT_FILE), rows)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help='folder with one sub-folder per client')
+    source.add_argument('--manifest', help='CSV with client, pdf and ledger columns')
+    parser.add_argument('--output', required=True, help='folder for the workbooks, report and checkpoint')
+    parser.add_argument('--jobs', type=int, default=default_workers(), help='clients processed at once')
+    parser.add_argument('--ocr-workers', type=int, help='OCR processes per client (default: cores / jobs)')
+    parser.add_argument('--threshold', type=int, default=75, help='fuzzy match sensitivity, 50-100')
+    parser.add_argument('--mode', choices=MATCH_MODES, default='one_to_one')
+    parser.add_argument('--no-cache', action='store_true', help='do not use the extraction result cache')
+    parser.add_argument('--no-aliases', action='store_true', help='do not use or update the party alias index')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint and process every client')
+    parser.add_argument('--store', nargs='?', const=STORE_DIR, metavar='FOLDER',
+                        help='save every transaction to the transaction store and reconcile from it '
+                             '(default folder: AS26_STORE_DIR)')
+    args = parser.parse_args()
+
+    clients = clients_from_folder(args.input) if args.input else clients_from_manifest(args.manifest)
+    names = [c['client'] for c in clients]
+    if len(set(names)) != len(names):
+        parser.error("client names must be unique")
+    jobs = max(1, min(args.jobs, len(clients) or 1))
+    # Clients already keep every core busy; only spare cores go to OCR.
+    ocr_workers = args.ocr_workers or max(1, default_workers() // jobs)
+
+    rows = run(clients, args.output, jobs, ocr_workers, args.threshold, args.mode,
+               use_cache=not args.no_cache, resume=not args.restart, use_aliases=not args.no_aliases,
+               store=args.store)
+    failed = sum(r['status'] != 'ok' for r in rows)
+    print(f"Done: {len(rows) - failed} ok, {failed} failed. Report: {os.path.join(args.output, REPORT_FILE)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""GSTR-2B vs purchase register reconciliation at a year's scale.
+
+Generates ``--invoices`` synthetic invoices (``synthetic.gst_invoices``: the
+2B split per tax rate, the register with reformatted numbers, typos, shifted
+dates, amount differences and invoices on one side only), reconciles them
+and prints the time of each stage, and how the invoices were paired against
+what the generator planted. With ``--files`` it also writes the 2B as a
+portal workbook and the register as CSV, and times reading them back and
+writing the reconciliation workbook, i.e. the whole job the app runs.
+
+    python benchmarks/bench_gst.py --invoices 300000
+    python benchmarks/bench_gst.py --invoices 50000 --files
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from excel_export import gst_reconciliation_workbook  # noqa: E402
+from gst_reconcile import reconcile_invoices, summarise  # noqa: E402
+from ingest import read_invoices  # noqa: E402
+from metrics import Run  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--invoices', type=int, default=300000)
+    parser.add_argument('--suppliers', type=int, default=None, help='distinct GSTINs (default: one per 40 invoices)')
+    parser.add_argument('--files', action='store_true', help='also time reading the files and writing the workbook')
+    args = parser.parse_args()
+
+    register, gstr2b, expected = synthetic.gst_invoices(args.invoices, suppliers=args.suppliers)
+    print(f"{args.invoices:,} invoices: {len(gstr2b):,} GSTR-2B lines, {len(register):,} register lines")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.files:
+            path_2b = os.path.join(workdir, 'gstr2b.xlsx')
+            path_books = os.path.join(workdir, 'purchases.csv')
+            synthetic.gstr2b_workbook(gstr2b, path_2b)
+            synthetic.purchase_register(register, path_books)
+            read_2b, gstr2b = timed(lambda: read_invoices(path_2b, 'gstr2b.xlsx', sheet='B2B'))
+            read_books, register = timed(lambda: read_invoices(path_books, 'purchases.csv'))
+            print(f"read GSTR-2B workbook {read_2b:6.2f}s, purchase register CSV {read_books:6.2f}s")
+
+        run = Run('gst_reconciliation')
+        seconds, statement = timed(lambda: reconcile_invoices(register, gstr2b, metrics=run))
+        print(f"{'stage':<10} {'seconds':>8}  counts")
+        for stage in run.stages.values():
+            print(f"{stage.name:<10} {stage.seconds:8.2f}  "
+                  + ', '.join(f"{n:,} {unit}" for unit, n in stage.counts.items()))
+        print(f"{'total':<10} {seconds:8.2f}  ({args.invoices / seconds:,.0f} invoices/s)")
+
+        if args.files:
+            export, _ = timed(lambda: gst_reconciliation_workbook(statement, summarise(statement)))
+            print(f"reconciliation workbook {export:6.2f}s ({len(statement):,} rows)")
+
+    found = statement.groupby(['Match', 'Status'], dropna=False).size()
+    print("\nPaired (Match, Status):")
+    print(found.to_string())
+    print("Planted:", ', '.join(f"{kind} {n:,}" for kind, n in expected.items()))
+
+
+if __name__ == '__main__':
+    main()
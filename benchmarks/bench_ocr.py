@@ -0,0 +1,76 @@
+"""Whole-page vs region-of-interest OCR on synthetic scanned 26AS pages.
+
+Renders skewed, speckled statement pages at a few scan resolutions and, for
+each, compares what Tesseract is given with and without the preprocessing in
+``ocr_preprocess``: pixels per page, preprocessing time and, when the
+tesseract binary is installed, OCR time per page and the share of deductor
+rows parsed with the right amount.
+
+    python benchmarks/bench_ocr.py --pages 3 --dpi 150 200 300
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytesseract  # noqa: E402
+
+import synthetic  # noqa: E402
+from ocr_engine import OCR_CONFIG  # noqa: E402
+from ocr_preprocess import lines_from_words, prepare_page  # noqa: E402
+from tan_parser import parse_lines  # noqa: E402
+
+
+def whole_page(image):
+    return pytesseract.image_to_string(image, config=OCR_CONFIG)
+
+
+def region_of_interest(region):
+    data = pytesseract.image_to_data(region, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+    return '\n'.join(lines_from_words(data))
+
+
+def accuracy(texts, expected):
+    rows = parse_lines('\n'.join(texts).split('\n'))
+    got = {row['Name of Party']: row['Amount showing in 26AS'] for row in rows}
+    return sum(abs(got.get(name, 0) - amount) < 0.01 for name, amount in expected.items()) / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--dpi', type=int, nargs='+', default=[150, 200, 300])
+    args = parser.parse_args()
+
+    has_tesseract = bool(shutil.which('tesseract'))
+    if not has_tesseract:
+        print('tesseract not installed: comparing pixels and preprocessing time only')
+
+    deductors = args.pages * synthetic.LINES_PER_PAGE // 4  # four lines per deductor
+    lines, expected = synthetic.statement_lines(deductors, seed=2)
+    for dpi in args.dpi:
+        pages = synthetic.raster_pages(lines, dpi=dpi, seed=dpi, max_skew=1.5)
+
+        start = time.perf_counter()
+        regions = [prepare_page(page) for page in pages]
+        prep = (time.perf_counter() - start) / len(pages)
+        page_px = sum(p.width * p.height for p in pages) / len(pages)
+        roi_px = sum(r.width * r.height for r in regions if r is not None) / len(pages)
+        print(f"{dpi} dpi: {page_px / 1e6:.2f} MP/page whole, {roi_px / 1e6:.2f} MP/page ROI "
+              f"({roi_px / page_px:.0%}), preprocessing {prep * 1000:.0f} ms/page")
+        if not has_tesseract: continue
+
+        for name, fn, inputs in (('whole page', whole_page, pages), ('ROI', region_of_interest, regions)):
+            start = time.perf_counter()
+            texts = [fn(image) if image is not None else '' for image in inputs]
+            per_page = (time.perf_counter() - start) / len(pages)
+            if name == 'ROI': per_page += prep
+            print(f"    {name:<10} {per_page:6.2f} s/page, {accuracy(texts, expected):.1%} rows exact")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Per-page OCR latency of each OCR backend (``AS26_OCR_BACKEND``).
+
+Renders ``--pages`` synthetic scanned statement pages, preprocesses them as
+the app does and reads the regions with each installed backend in this
+process: the first page (for tesserocr that includes loading the language
+model) and the median of the rest, which is what every later page of a
+worker costs. With ``--workers`` it also times the whole document through
+``ocr_engine.ocr_images`` on a process pool. The text of every backend is
+checked against the first one run (pytesseract, when it is installed).
+
+    python benchmarks/bench_ocr_engines.py --pages 10
+    python benchmarks/bench_ocr_engines.py --pages 40 --workers 4
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from ocr_engine import OCR_BACKENDS, engine, ocr_images  # noqa: E402
+from ocr_preprocess import lines_from_words, prepare_page  # noqa: E402
+
+
+def available(backend):
+    if backend == 'pytesseract':
+        return bool(shutil.which('tesseract')) or 'tesseract binary not installed'
+    try:
+        engine(backend)
+    except (ImportError, RuntimeError) as e:
+        return f'{backend} not usable: {e}'
+    return True
+
+
+def read(ocr, region):
+    return '\n'.join(lines_from_words(ocr.words(region))) if region is not None else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--dpi', type=int, default=200)
+    parser.add_argument('--backends', nargs='+', choices=list(OCR_BACKENDS), default=list(OCR_BACKENDS))
+    parser.add_argument('--workers', type=int, default=0, help='also time the document on a pool of this many workers')
+    args = parser.parse_args()
+
+    deductors = args.pages * synthetic.LINES_PER_PAGE // 4  # four lines per deductor
+    lines, _ = synthetic.statement_lines(deductors, seed=2)
+    pages = synthetic.raster_pages(lines, dpi=args.dpi, seed=args.dpi, max_skew=1.5)
+    regions = [prepare_page(page) for page in pages]
+    print(f"{len(pages)} pages at {args.dpi} dpi")
+
+    reference = None
+    print(f"{'backend':<12} {'first page':>11} {'per page':>10} {'same text':>10}")
+    for backend in args.backends:
+        usable = available(backend)
+        if usable is not True:
+            print(f"{backend:<12} skipped ({usable})")
+            continue
+        # A fresh engine, so the first page pays for creating it.
+        start = time.perf_counter()
+        ocr = OCR_BACKENDS[backend]()
+        texts = [read(ocr, regions[0])]
+        first = time.perf_counter() - start
+        times = []
+        for region in regions[1:]:
+            start = time.perf_counter()
+            texts.append(read(ocr, region))
+            times.append(time.perf_counter() - start)
+        if reference is None: reference = texts
+        same = sum(a == b for a, b in zip(texts, reference)) / len(texts)
+        per_page = statistics.median(times) if times else first
+        print(f"{backend:<12} {first * 1000:9.0f}ms {per_page * 1000:8.0f}ms {same:>10.0%}")
+
+        if args.workers:
+            start = time.perf_counter()
+            for _ in ocr_images(pages, workers=args.workers, backend=backend):
+                pass
+            elapsed = time.perf_counter() - start
+            print(f"{'':<12} {args.workers} workers: {elapsed:.2f}s for the document, "
+                  f"{elapsed / len(pages) * 1000:.0f} ms/page with preprocessing")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Micro-benchmark for the 26AS line parser.
+
+Times ``tan_parser.parse_lines`` against the original regex-per-token parser
+over a corpus of 26AS text and checks that both produce the same rows. The
+corpus is either a text file of OCR output (one line per line, e.g. dumped
+from real statements) or synthetic deductor lines with the usual OCR noise:
+O/o for 0 and l/I for 1 in TANs and amounts, S for 5, stray pipes and
+punctuation, TANs glued to the name, headers and page furniture.
+
+    python benchmarks/bench_parser.py --lines 200000
+    python benchmarks/bench_parser.py --corpus ocr_dump.txt
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tan_parser  # noqa: E402
+from synthetic import company  # noqa: E402
+
+NOISE = {'0': 'Oo', '1': 'lI', '5': 'S'}
+FURNITURE = [
+    'PART-I - Details of Tax Deducted at Source',
+    'Sr. No. Name of Deductor TAN of Deductor Total Amount Paid / Credited Total Tax Deducted Total TDS Deposited',
+    'Assessment Year 2024-25',
+    'Page 1 of 6',
+    'Sr. No. Section Transaction Date Status of Booking Date of Booking Remarks Amount Paid / Credited',
+    '1 194C 15-Apr-2023 F 30-Jun-2023 - 45,000.00 450.00 450.00',
+    'Above data is as per the information provided by the deductor',
+]
+
+
+def ocr_noise(text, rng, rate):
+    return ''.join(rng.choice(NOISE[ch]) if ch in NOISE and rng.random() < rate else ch for ch in text)
+
+
+def amount(rng):
+    return f'{rng.uniform(1_000, 5_000_000):,.2f}'
+
+
+def deductor_line(n, rng):
+    tan = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(4))
+    tan += ''.join(rng.choice('0123456789') for _ in range(5)) + rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+    paid, tds = amount(rng), amount(rng)
+    cols = [paid, tds, tds]
+    if rng.random() < 0.3: cols = [ocr_noise(c, rng, 0.2) for c in cols]
+    if rng.random() < 0.1: cols.insert(1, rng.choice(['|', '-', '.']))
+    sep = ' ' if rng.random() < 0.9 else ''
+    line = f'{n} {company(rng)}{sep}{ocr_noise(tan, rng, 0.15)} ' + ' '.join(cols)
+    if rng.random() < 0.1: line = line.replace(' ', '  ', 2)
+    return line
+
+
+def synthetic_corpus(n_lines, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < n_lines:
+        if rng.random() < 0.7:
+            lines.append(deductor_line(len(lines) + 1, rng))
+        else:
+            lines.append(rng.choice(FURNITURE))
+    return lines
+
+
+def legacy_parse_lines(lines):
+    """The parser as it was before the single-pass tokenizer."""
+    data = []
+    for line in lines:
+        line = line.strip()
+        if len(line) < 15: continue
+        match = tan_parser.tan_loose_pattern.search(line)
+        if not match: continue
+        tan_code = match.group()
+        parts = re.sub(r'\s+', ' ', line).split(' ')
+        tan_idx = next((idx for idx, part in enumerate(parts) if tan_code in part), -1)
+        if tan_idx == -1: continue
+        name_parts = [w for w in parts[:tan_idx]
+                      if len(w) > 1 and not re.match(r'^\d+$', w) and w.lower() not in ['sr', 'no']]
+        party_name = re.sub(r'^[^A-Z]+', '', ' '.join(name_parts))
+        amounts = []
+        for token in parts[tan_idx + 1:]:
+            token_fix = token.replace('O', '0').replace('o', '0').replace('l', '1').replace('I', '1').replace('S', '5')
+            token_clean = re.sub(r'[^\d\.]', '', token_fix)
+            if re.match(r'^\d+\.?\d{0,2}$', token_clean):
+                val = float(token_clean)
+                if val > 10: amounts.append(val)
+        final_tax = amounts[1] if len(amounts) >= 2 else amounts[0] if amounts else 0.0
+        if len(party_name) > 3 and final_tax > 0:
+            data.append({'Name of Party': party_name, 'Amount showing in 26AS': final_tax})
+    return data
+
+
+def best_of(fn, lines, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn(lines)
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='text file of OCR output; synthetic lines are used when omitted')
+    parser.add_argument('--lines', type=int, default=100_000, help='synthetic corpus size')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8', errors='replace') as f:
+            lines = f.read().split('\n')
+    else:
+        lines = synthetic_corpus(args.lines)
+
+    legacy_time, legacy_rows = best_of(legacy_parse_lines, lines, args.repeat)
+    new_time, new_rows = best_of(tan_parser.parse_lines, lines, args.repeat)
+    # The legacy parser predates the TAN column; compare what both report.
+    same = legacy_rows == [{k: row[k] for k in ('Name of Party', 'Amount showing in 26AS')} for row in new_rows]
+
+    print(f'{len(lines)} lines, {len(new_rows)} deductor rows')
+    print(f'legacy parser: {legacy_time:.3f}s ({len(lines) / legacy_time:,.0f} lines/s)')
+    print(f'tan_parser:    {new_time:.3f}s ({len(lines) / new_time:,.0f} lines/s)  {legacy_time / new_time:.1f}x')
+    print('rows identical' if same else 'ROWS DIFFER')
+    if not same: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
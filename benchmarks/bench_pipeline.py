@@ -0,0 +1,229 @@
+"""End-to-end benchmark of the 26AS pipelines on synthetic inputs.
+
+Generates a text-layer and a scanned 26AS PDF, a Tally ledger and a pair of
+books / 26AS summaries at the chosen scale (see ``synthetic.py``), then runs
+each stage the app runs and records its wall time (best of ``--repeat``),
+peak traced memory (one extra run under ``tracemalloc``) and throughput.
+Outputs are checked against what the generators put in, so a stage that got
+faster by dropping rows does not pass.
+
+Results are compared against a stored baseline; any stage slower or hungrier
+than the baseline by more than ``--tolerance`` is flagged and the run exits
+non-zero. Baselines are per machine: record one with ``--save-baseline``.
+
+    python benchmarks/bench_pipeline.py --scale small --save-baseline
+    python benchmarks/bench_pipeline.py --scale small
+    python benchmarks/bench_pipeline.py --scale medium --stages tally reconcile_one_to_one
+
+The OCR stage needs the tesseract and pdftoppm binaries and is skipped when
+they are not installed.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+from excel_export import extract_workbook, reconciliation_workbook, summary_workbook  # noqa: E402
+from ingest import iter_ledger_chunks  # noqa: E402
+from pdf_extract import extract_table  # noqa: E402
+from reconcile import reconcile  # noqa: E402
+from tally_summary import summarise_chunks  # noqa: E402
+
+SCALES = {
+    'small': {'deductors': 300, 'ocr_deductors': 40, 'ledger_rows': 20_000, 'books': 1_000, '26as': 1_500},
+    'medium': {'deductors': 3_000, 'ocr_deductors': 100, 'ledger_rows': 100_000, 'books': 5_000, '26as': 7_500},
+    'large': {'deductors': 20_000, 'ocr_deductors': 200, 'ledger_rows': 500_000, 'books': 20_000, '26as': 30_000},
+}
+STAGES = ['extract_text', 'extract_ocr', 'tally', 'reconcile_best', 'reconcile_one_to_one', 'export']
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+THRESHOLD = 75
+
+
+class Inputs:
+    """Synthetic inputs for one scale, written to ``workdir``."""
+
+    def __init__(self, scale, workdir):
+        size = SCALES[scale]
+        self.statement, self.deductors = synthetic.statement_lines(size['deductors'])
+        self.text_pdf = synthetic.text_pdf(self.statement, os.path.join(workdir, 'text_26as.pdf'))
+        self.scanned, self.ocr_deductors = synthetic.statement_lines(size['ocr_deductors'], seed=1)
+        self.raster_pdf = synthetic.raster_pdf(self.scanned, os.path.join(workdir, 'scanned_26as.pdf'))
+        self.ledger = os.path.join(workdir, 'ledger.xlsx')
+        self.ledger_totals = synthetic.tally_ledger(size['ledger_rows'], self.ledger)
+        self.ledger_rows = size['ledger_rows']
+        self.books, self.as26 = synthetic.summary_pair(size['books'], size['26as'])
+        self._tables = None
+
+    def tables(self):
+        """The extracted 26AS table, party summary and statement the workbooks are built from."""
+        if self._tables is None:
+            self._tables = (
+                pd.DataFrame(list(self.deductors.items()), columns=['Name of Party', 'Amount showing in 26AS']),
+                pd.Series(self.ledger_totals, name='Amount as per Books').rename_axis('Name of Party').sort_index(),
+                reconcile(self.books, self.as26, THRESHOLD, mode='best'),
+            )
+        return self._tables
+
+
+def _agree(expected, got, tolerance=0.01):
+    """Share of expected names found in ``got`` with the same amount."""
+    return sum(abs(got.get(name, 0) - amount) <= tolerance for name, amount in expected.items()) / max(len(expected), 1)
+
+
+def _page_total(lines):
+    return -(-len(lines) // synthetic.LINES_PER_PAGE)
+
+
+def stage_runs(inputs):
+    """Per stage: (run, check, units) where check turns the output into a note."""
+    def extract(path, expected):
+        df, _ = extract_table(path, workers=1)
+        return df, expected
+
+    def check_extract(out):
+        df, expected = out
+        got = dict(zip(df['Name of Party'], df['Amount showing in 26AS'])) if not df.empty else {}
+        return f"{len(df)} rows, {_agree(expected, got):.1%} exact"
+
+    def tally():
+        return summarise_chunks(iter_ledger_chunks(inputs.ledger, inputs.ledger))
+
+    def check_tally(out):
+        totals, rejected = out
+        return f"{len(totals)} parties, {_agree(inputs.ledger_totals, totals.to_dict()):.1%} exact, {len(rejected)} rejected"
+
+    def check_reconcile(final_df):
+        parties = final_df.iloc[:-1]
+        matched = ((parties['Amount in Books'] != 0) & (parties['Amount in 26AS'] != 0)).sum()
+        return f"{matched} matched of {len(inputs.books)}"
+
+    def export():
+        extracted, totals, statement = inputs.tables()
+        return [extract_workbook(extracted), summary_workbook(totals), reconciliation_workbook(statement)]
+
+    return {
+        'extract_text': (lambda: extract(inputs.text_pdf, inputs.deductors), check_extract,
+                         (_page_total(inputs.statement), 'pages')),
+        'extract_ocr': (lambda: extract(inputs.raster_pdf, inputs.ocr_deductors), check_extract,
+                        (_page_total(inputs.scanned), 'pages')),
+        'tally': (tally, check_tally, (inputs.ledger_rows, 'rows')),
+        'reconcile_best': (lambda: reconcile(inputs.books, inputs.as26, THRESHOLD, mode='best'), check_reconcile,
+                           (len(inputs.books), 'parties')),
+        'reconcile_one_to_one': (lambda: reconcile(inputs.books, inputs.as26, THRESHOLD, mode='one_to_one'),
+                                 check_reconcile, (len(inputs.books), 'parties')),
+        'export': (export, lambda out: f"{sum(len(b.getvalue()) for b in out) / 1e6:.1f} MB written",
+                   (len(inputs.books) + len(inputs.ledger_totals), 'rows')),
+    }
+
+
+def measure(run, repeat):
+    """Best wall time over ``repeat`` runs, then peak traced memory of one more."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = run()
+        best = min(best, time.perf_counter() - start)
+    del out
+    tracemalloc.start()
+    try:
+        out = run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024 / 1024, out
+
+
+def ocr_available():
+    return bool(shutil.which('tesseract') and shutil.which('pdftoppm'))
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against ``baseline`` as (stage, metric, old, new) tuples."""
+    regressions = []
+    for stage, result in results.items():
+        old = baseline.get(stage)
+        if not old: continue
+        for metric in ('seconds', 'peak_mb'):
+            if result[metric] > old[metric] * (1 + tolerance) and result[metric] - old[metric] > 0.01:
+                regressions.append((stage, metric, old[metric], result[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file (default: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline for its scale')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown / memory growth, as a fraction')
+    parser.add_argument('--workdir', help='keep the generated inputs here instead of a temp folder')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench-26as-')
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        inputs = Inputs(args.scale, workdir)
+        print(f"Generated {args.scale} inputs in {time.perf_counter() - start:.1f}s ({workdir})")
+        runs = stage_runs(inputs)
+
+        results = {}
+        print(f"{'stage':<22} {'seconds':>9} {'peak MB':>9} {'throughput':>20}  check")
+        for stage in args.stages:
+            if stage == 'extract_ocr' and not ocr_available():
+                print(f"{stage:<22} {'skipped: tesseract / pdftoppm not installed':>40}")
+                continue
+            if stage == 'export':
+                inputs.tables()  # built once, outside the timed runs
+            run, check, (units, unit_name) = runs[stage]
+            seconds, peak_mb, out = measure(run, args.repeat)
+            results[stage] = {'seconds': round(seconds, 4), 'peak_mb': round(peak_mb, 2), 'units': units, 'unit': unit_name}
+            rate = f"{units / seconds:,.0f} {unit_name}/s"
+            print(f"{stage:<22} {seconds:>9.3f} {peak_mb:>9.1f} {rate:>20}  {check(out)}")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+
+    if args.save_baseline:
+        stored[args.scale] = {'machine': platform.node(), 'python': platform.python_version(),
+                              'recorded': time.strftime('%Y-%m-%d %H:%M'), 'stages': results}
+        with open(args.baseline, 'w') as f:
+            json.dump(stored, f, indent=2)
+        print(f"Baseline for '{args.scale}' saved to {args.baseline}")
+        return
+
+    baseline = stored.get(args.scale)
+    if not baseline:
+        print(f"No '{args.scale}' baseline in {args.baseline}; record one with --save-baseline")
+        return
+    regressions = compare(results, baseline['stages'], args.tolerance)
+    print(f"Compared with the baseline recorded {baseline['recorded']} on {baseline['machine']}:")
+    for stage, result in results.items():
+        old = baseline['stages'].get(stage)
+        if old:
+            print(f"  {stage:<22} {result['seconds'] / old['seconds']:>6.2f}x time  {result['peak_mb'] / max(old['peak_mb'], 0.01):>6.2f}x memory")
+    for stage, metric, old, new in regressions:
+        print(f"REGRESSION {stage} {metric}: {old} -> {new}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Cold start and rerun cost of the Streamlit app.
+
+Each measurement runs in a fresh Python process, driving the app with
+Streamlit's ``AppTest`` (no browser or server): the time to import Streamlit,
+the first script run (what a new visitor waits for before the first paint,
+with the default tool open) and the median of ``--reruns`` later runs with
+each tool selected. It also lists which heavy libraries the first run loaded.
+Background preloading (``AS26_PRELOAD``) is switched off, so each run is
+charged for everything it imports.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --app ../ai-tools-old/26ASApp.py   # an older worktree
+
+The app's modules are imported from the folder of ``--app``; to measure an
+older version, check it out into its own worktree.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, '26ASApp.py')
+TOOLS = ['26AS Automation', 'GST Utilities', 'Tax Audit Utilities', 'Company Audit Utilities']
+HEAVY = ['pandas', 'openpyxl', 'pdfplumber', 'pdf2image', 'pytesseract', 'rapidfuzz', 'scipy', 'fuzzywuzzy']
+
+
+def child(app, tools, reruns):
+    """Measure one cold start in this process; prints a JSON line."""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_s = time.perf_counter() - start
+
+    at = AppTest.from_file(app, default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    loaded = [name for name in HEAVY if name in sys.modules]
+
+    rerun = {}
+    for tool in tools:
+        at.sidebar.radio[0].set_value(tool).run()
+        times = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - start)
+        rerun[tool] = statistics.median(times)
+    if at.exception:
+        raise SystemExit(f"app raised: {at.exception[0].message}")
+    print(json.dumps({'streamlit_s': streamlit_s, 'first_s': first, 'rerun_s': rerun, 'loaded': loaded}))
+
+
+def measure(app, tools, reruns):
+    # No background preloading, so the run is charged for what it imports.
+    env = {**os.environ, 'AS26_PRELOAD': '0'}
+    out = subprocess.run([sys.executable, __file__, '--child', '--app', app, '--reruns', str(reruns), '--tools', *tools],
+                         capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(app)))
+    if out.returncode:
+        raise SystemExit(out.stderr.strip().splitlines()[-1])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=APP, help='app script to measure (default: this checkout)')
+    parser.add_argument('--tools', nargs='+', choices=TOOLS, default=TOOLS)
+    parser.add_argument('--repeat', type=int, default=3, help='cold starts; the best is kept')
+    parser.add_argument('--reruns', type=int, default=10, help='reruns timed per tool')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(args.app)))
+        child(args.app, args.tools, args.reruns)
+        return
+
+    runs = [measure(args.app, args.tools, args.reruns) for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: r['first_s'])
+    print(f"{args.app}: best of {args.repeat} cold starts")
+    print(f"  import streamlit   {best['streamlit_s']:6.2f}s")
+    print(f"  first run          {best['first_s']:6.2f}s  (loads: {', '.join(best['loaded']) or 'none of ' + ', '.join(HEAVY)})")
+    print(f"Reruns (median of {args.reruns}, best cold start):")
+    for tool in args.tools:
+        print(f"  {tool:<26} {min(r['rerun_s'][tool] for r in runs) * 1000:7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Firm-wide queries over the 26AS transaction store.
+
+Fills a store in a temporary folder with ``--statements`` synthetic
+statements (``--clients`` clients over several assessment years, each
+statement ``--deductors`` deductors with ``--transactions`` transactions
+each), then times the queries the app and ``transaction_store.py`` run:
+listing the statements, section totals and deductor totals across the whole
+firm, one year across the firm, and one client's reconciliation summary. For
+comparison it times reading one statement back from its PDF, which is what
+each of those summaries cost per statement before the store.
+
+    python benchmarks/bench_store.py --statements 2000 --clients 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+import synthetic  # noqa: E402
+from pdf_extract import extract_statement  # noqa: E402
+from tan_parser import TRANSACTION_COLUMNS, TransactionParser  # noqa: E402
+from transaction_store import TransactionStore  # noqa: E402
+
+YEARS = ['2021-22', '2022-23', '2023-24', '2024-25', '2025-26']
+# Distinct statements generated; the store reuses them across clients.
+VARIANTS = 20
+
+
+def transactions(lines):
+    _, rows = TransactionParser().feed(lines)
+    df = pd.DataFrame(rows, columns=TRANSACTION_COLUMNS)
+    for column in ('Transaction Date', 'Date of Booking'):
+        df[column] = pd.to_datetime(df[column], format='%Y-%m-%d')
+    return df
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--statements', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--deductors', type=int, default=100, help='deductors per statement')
+    parser.add_argument('--transactions', type=int, default=4, help='transactions per deductor')
+    args = parser.parse_args()
+
+    statements = [synthetic.statement_lines(args.deductors, seed=k, transactions=args.transactions)[0]
+                  for k in range(VARIANTS)]
+    tables = [transactions(lines) for lines in statements]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = TransactionStore(os.path.join(workdir, 'store'))
+        start = time.perf_counter()
+        for n in range(args.statements):
+            client, year = f'CLIENT {n % args.clients:05d}', YEARS[n // args.clients % len(YEARS)]
+            store.add(client, year, tables[n % VARIANTS], f'statement{n}')
+        write = time.perf_counter() - start
+        rows = args.statements * args.deductors * args.transactions
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(store.root) for f in files)
+        print(f"{args.statements} statements, {rows:,} transactions: stored in {write:.1f}s "
+              f"({write / args.statements * 1000:.1f} ms/statement), {size / 1e6:.1f} MB on disk")
+
+        pdf = synthetic.text_pdf(statements[0], os.path.join(workdir, 'statement.pdf'))
+        reparse, _ = timed(lambda: extract_statement(pdf, workers=1), repeat=1)
+
+        queries = [
+            ('list statements', lambda: store.statements()),
+            ('section totals, whole firm', lambda: store.aggregate(['client', 'assessment_year', 'section'])),
+            ('deductor totals, whole firm', lambda: store.aggregate(['tan', 'assessment_year'])),
+            (f'section totals, AY {YEARS[0]}', lambda: store.aggregate(['client', 'section'], years=[YEARS[0]])),
+            ('one client reconciliation side', lambda: store.party_summary('CLIENT 00000', YEARS[0])),
+        ]
+        print(f"{'query':<34} {'best of 3':>10} {'result rows':>12}")
+        for name, query in queries:
+            seconds, result = timed(query)
+            print(f"{name:<34} {seconds:9.3f}s {len(result):>12,}")
+        print(f"Reading one statement from its PDF instead: {reparse:.2f}s "
+              f"(x {args.statements} statements = {reparse * args.statements / 60:.0f} min)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""Synthetic inputs for the 26AS benchmarks.
+
+Every generator is seeded, so the same size always produces the same files:
+
+- 26AS statements as PDFs, either with a real text layer (like TRACES
+  downloads) or rasterised with no text at all (like scanned copies), with
+  TANs, section rows and amount columns;
+- Tally ledger exports in the layout the Tally Summary tab reads
+  (particulars in the third column, debit and credit in the fifth and sixth),
+  with opening/closing balance and header lines mixed in;
+- books / 26AS party summaries sharing a controlled share of parties, with
+  name noise on the books side;
+- a GSTR-2B and a purchase register of the same invoices, with the kinds of
+  differences a GST reconciliation has to sort out, and both written in the
+  layouts people upload (the portal's B2B sheet, a Tally-style register).
+"""
+import random
+import zlib
+
+import pandas as pd
+from openpyxl import Workbook
+from PIL import Image, ImageDraw, ImageFont
+
+LINES_PER_PAGE = 60
+SECTIONS = ['194C', '194J', '194H', '194I', '194A', '194Q']
+MONTHS = ['Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar']
+
+HEADER_LINES = [
+    'Annual Tax Statement under Section 203AA of the Income Tax Act, 1961',
+    'Assessment Year 2024-25',
+    'PART-I - Details of Tax Deducted at Source',
+    'Sr. No. Name of Deductor TAN of Deductor Total Amount Paid / Credited Total Tax Deducted Total TDS Deposited',
+]
+
+
+SYLLABLES = ['ag', 'ar', 'wal', 'sha', 'rma', 'gup', 'ta', 'ja', 'in', 'meh', 'pat', 'el', 'red', 'dy', 'iy', 'er',
+             'ban', 'er', 'jee', 'sin', 'gh', 'kha', 'nna', 'mal', 'ho', 'tra', 'cho', 'pra', 'bo', 'se', 'da', 'gho',
+             'na', 'ir', 'pil', 'lai', 'rao', 'sh', 'ah', 'ka', 'poor', 'ver', 'ma', 'go', 'yal', 'mit', 'tal', 'bha']
+TRADES = ['STEEL', 'TEXTILES', 'MOTORS', 'TRADERS', 'ENTERPRISES', 'INFRA', 'LOGISTICS', 'PHARMA', 'FOODS',
+          'CHEMICALS', 'POLYMERS', 'AGENCIES', 'ELECTRICALS', 'BUILDERS', 'FINANCE', 'SOFTWARE', 'EXPORTS',
+          'AUTOMOBILES', 'CONSTRUCTIONS', 'HOSPITALITY', 'PAPERS', 'PLASTICS', 'CEMENT', 'JEWELLERS', 'DAIRY',
+          'TRANSPORT', 'MEDICALS', 'HARDWARE', 'FABRICS', 'CERAMICS', 'ENGINEERING', 'SOLUTIONS', 'VENTURES']
+SUFFIXES = ['PVT LTD', 'PRIVATE LIMITED', 'LIMITED', 'LTD', 'LLP', '& CO', '& SONS', '']
+ABBREVIATIONS = {'PRIVATE': 'PVT', 'LIMITED': 'LTD', 'ENTERPRISES': 'ENT', 'AND': '&'}
+
+
+def surname(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).upper()
+
+
+def company(rng):
+    words = [surname(rng), rng.choice(TRADES)]
+    if rng.random() < 0.4: words.insert(1, surname(rng))
+    if rng.random() < 0.3: words.append(rng.choice(TRADES))
+    return ' '.join(words + [rng.choice(SUFFIXES)]).strip()
+
+
+def noisy(name, rng):
+    words = [ABBREVIATIONS.get(w, w) if rng.random() < 0.3 else w for w in name.split()]
+    if rng.random() < 0.2 and len(words) > 2:
+        words[0], words[1] = words[1], words[0]
+    chars = list(' '.join(words))
+    if rng.random() < 0.3 and len(chars) > 4:
+        del chars[rng.randrange(len(chars))]
+    if rng.random() < 0.2 and len(chars) > 4:
+        k = rng.randrange(len(chars) - 1)
+        chars[k], chars[k + 1] = chars[k + 1], chars[k]
+    return ''.join(chars)
+
+
+def party_lists(n_books, n_26as, overlap=0.7, seed=0):
+    """Books and 26AS party names sharing ``overlap`` of parties, the books copies with name noise."""
+    rng = random.Random(seed)
+    shared = [company(rng) for _ in range(int(min(n_books, n_26as) * overlap))]
+    books = [noisy(n, rng) for n in shared] + [company(rng) for _ in range(n_books - len(shared))]
+    as26 = list(shared) + [company(rng) for _ in range(n_26as - len(shared))]
+    rng.shuffle(books)
+    rng.shuffle(as26)
+    return books, as26
+
+
+def tan(rng):
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    return (''.join(rng.choice(letters) for _ in range(4)) + f'{rng.randrange(100000):05d}'
+            + rng.choice(letters))
+
+
+def _as_parsed(name):
+    return ' '.join(w for w in name.split() if len(w) > 1)
+
+
+def statement_lines(n_deductors, seed=0, transactions=2):
+    """Text of a 26AS Part-I with ``n_deductors`` deductors and their rows.
+
+    Returns ``(lines, expected)`` where ``expected`` maps each deductor name,
+    as the parser reports it (one-character words such as '&' dropped), to
+    the TDS amount it should read for it.
+    """
+    rng = random.Random(seed)
+    lines = list(HEADER_LINES)
+    expected = {}
+    for n in range(1, n_deductors + 1):
+        name = company(rng)
+        while _as_parsed(name) in expected:
+            name = company(rng)
+        paid = round(rng.uniform(10_000, 5_000_000), 2)
+        tds = round(paid * rng.choice([0.01, 0.02, 0.1]), 2)
+        expected[_as_parsed(name)] = tds
+        lines.append(f'{n} {name} {tan(rng)} {paid:,.2f} {tds:,.2f} {tds:,.2f}')
+        lines.append('Sr. No. Section Transaction Date Status of Booking Date of Booking Remarks '
+                     'Amount Paid / Credited Tax Deducted TDS Deposited')
+        for k in range(1, transactions + 1):
+            day = f'{rng.randint(1, 28):02d}-{rng.choice(MONTHS)}-2023'
+            part = round(paid / transactions, 2)
+            lines.append(f'{k} {rng.choice(SECTIONS)} {day} F {day} - {part:,.2f} '
+                         f'{part * tds / paid:,.2f} {part * tds / paid:,.2f}')
+    return lines, expected
+
+
+def _pages(lines):
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def text_pdf(lines, path):
+    """Write ``lines`` as a PDF with a Helvetica text layer."""
+    objects = [b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    pages = _pages(lines)
+    first_page = len(objects) + len(pages) + 1
+    pages_id = first_page + len(pages)
+    for page in pages:
+        ops = ['BT /F1 8 Tf 12 TL 24 810 Td']
+        for line in page:
+            line = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            ops.append(f'({line}) Tj T*')
+        ops.append('ET')
+        stream = zlib.compress('\n'.join(ops).encode('latin-1', 'replace'))
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+    for k in range(len(pages)):
+        objects.append(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] '
+                       b'/Resources << /Font << /F1 1 0 R >> >> /Contents %d 0 R >>' % (pages_id, 2 + k))
+    kids = b' '.join(b'%d 0 R' % (first_page + k) for k in range(len(pages)))
+    objects.append(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(pages)))
+    objects.append(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for k, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % k + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % o for o in offsets)
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, len(objects), xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+def raster_pages(lines, dpi=150, seed=0, max_skew=0.8):
+    """Render ``lines`` as scanned-looking page images.
+
+    Pages are slightly rotated (up to ``max_skew`` degrees) and speckled so
+    the OCR path sees the kind of input it gets from a scanner rather than
+    perfectly clean pixels.
+    """
+    rng = random.Random(seed)
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    font = ImageFont.load_default(size=int(dpi / 9))
+    step = int(dpi * 10.5 / LINES_PER_PAGE)  # the page's lines fit in 10.5 inches
+    images = []
+    for page in _pages(lines):
+        image = Image.new('L', (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        for k, line in enumerate(page):
+            draw.text((dpi // 3, dpi // 3 + k * step), line, fill=0, font=font)
+        draw.text((width // 2, height - dpi // 2), f'Page {len(images) + 1}', fill=0, font=font)
+        for _ in range(width * height // 2000):
+            draw.point((rng.randrange(width), rng.randrange(height)), fill=rng.randrange(100, 220))
+        images.append(image.rotate(rng.uniform(-max_skew, max_skew), fillcolor=255, expand=False))
+    return images
+
+
+def raster_pdf(lines, path, dpi=150, seed=0):
+    """Write ``lines`` as image-only pages, like a scanned statement."""
+    images = raster_pages(lines, dpi, seed)
+    images[0].save(path, 'PDF', resolution=dpi, save_all=True, append_images=images[1:])
+    return path
+
+
+def tally_ledger(n_rows, path, n_parties=None, seed=0):
+    """Write a Tally ledger export (xlsx) with ``n_rows`` voucher rows.
+
+    Returns the expected party totals (debit or credit, whichever is set).
+    """
+    rng = random.Random(seed)
+    parties = [company(rng) for _ in range(n_parties or max(1, n_rows // 20))]
+    expected = {}
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Ledger')
+    ws.append(['Date', 'Dr/Cr', 'Particulars', 'Vch Type', 'Debit', 'Credit'])
+    ws.append(['1-Apr-2023', None, 'Opening Balance', None, None, round(rng.uniform(1e5, 1e7), 2)])
+    for n in range(n_rows):
+        if n and n % 5000 == 0:
+            ws.append([None, None, 'Ledger Account continued', None, None, None])
+        party = rng.choice(parties)
+        amount = round(rng.uniform(100, 250_000), 2)
+        tag = rng.choice(['', '', '', ' (Rent)', ' (Interest)'])
+        debit, credit = (amount, None) if rng.random() < 0.3 else (None, amount)
+        day = f'{rng.randint(1, 28)}-{rng.choice(MONTHS)}-2023'
+        ws.append([day, 'By' if credit else 'To', party + tag, rng.choice(['Journal', 'Payment', 'Receipt']), debit, credit])
+        expected[party] = expected.get(party, 0) + amount
+    ws.append([None, None, 'Closing Balance', None, round(rng.uniform(1e5, 1e7), 2), None])
+    wb.save(path)
+    return expected
+
+
+def summary_pair(n_books, n_26as, overlap=0.7, seed=0):
+    """Books and 26AS summaries as DataFrames, sharing ``overlap`` of parties."""
+    rng = random.Random(seed)
+    books, as26 = party_lists(n_books, n_26as, overlap, seed)
+    df_books = pd.DataFrame({'Name of Party': books,
+                             'Amount in Books': [round(rng.uniform(1_000, 500_000), 2) for _ in books]})
+    df_26as = pd.DataFrame({'Name of Party': as26,
+                            'Amount in 26AS': [round(rng.uniform(1_000, 500_000), 2) for _ in as26]})
+    return df_books, df_26as
+
+
+GST_STATES = ['07', '09', '19', '24', '27', '29', '33', '36']
+GSTR2B_HEADINGS = (
+    ['GSTIN of supplier', 'Trade/Legal name', 'Invoice Details', None, None, None, 'Place of supply',
+     'Supply Attract Reverse Charge', 'Taxable Value (₹)', 'Tax Amount', None, None, None,
+     'GSTR-1/IFF/GSTR-5 Period', 'GSTR-1/IFF/GSTR-5 Filing Date', 'ITC Availability', 'Reason',
+     'Applicable % of Tax Rate', 'Source', 'IRN', 'IRN Date'],
+    [None, None, 'Invoice number', 'Invoice type', 'Invoice Date', 'Invoice Value(₹)', None, None, None,
+     'Integrated Tax(₹)', 'Central Tax(₹)', 'State/UT Tax(₹)', 'Cess(₹)', None, None, None, None, None, None,
+     None, None],
+)
+REGISTER_HEADINGS = ['Date', 'Particulars', 'Voucher Type', 'Voucher No.', 'GSTIN/UIN', 'Supplier Invoice No.',
+                     'Supplier Invoice Date', 'Taxable Value', 'Integrated Tax Amount', 'Central Tax Amount',
+                     'State Tax Amount', 'Cess Amount', 'Gross Total']
+
+
+def gstin(rng):
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    pan = ''.join(rng.choice(letters) for _ in range(5)) + f'{rng.randrange(10000):04d}' + rng.choice(letters)
+    return rng.choice(GST_STATES) + pan + str(rng.randint(1, 9)) + 'Z' + rng.choice(letters + '0123456789')
+
+
+def gst_invoices(n_invoices, seed=0, suppliers=None):
+    """A GSTR-2B and a purchase register (DataFrames) of about ``n_invoices`` invoices.
+
+    Columns are ``ingest.INVOICE_COLUMNS``. Most register invoices are in
+    the 2B with the number written differently ("ABC/24-25/0042" against
+    "ABC-24-25-42"); some have another date, amounts off, a typo in the
+    number or the series prefix left out, and some are on one side only.
+    The 2B lists some invoices once per tax rate. Returns
+    ``(register, gstr2b, expected)``, ``expected`` counting each kind.
+    """
+    rng = random.Random(seed)
+    parties = [(gstin(rng), company(rng), ''.join(rng.choice('ABCDEFGHKMPRSTV') for _ in range(3)))
+               for _ in range(suppliers or max(1, n_invoices // 40))]
+    kinds = ['exact'] * 70 + ['date'] * 6 + ['amount'] * 5 + ['typo'] * 5 + ['prefix'] * 4 + ['books_only'] * 5 + \
+        ['gstr2b_only'] * 5
+    expected = {}
+    register, gstr2b = [], []
+    serials = {}
+    for _ in range(n_invoices):
+        number, name, series = rng.choice(parties)
+        serial = serials[number] = serials.get(number, 0) + rng.randint(1, 3)
+        kind = rng.choice(kinds)
+        expected[kind] = expected.get(kind, 0) + 1
+        month = rng.randint(1, 12)
+        date = pd.Timestamp(2024 + (month < 4), month, rng.randint(1, 28))
+        taxable = round(rng.uniform(1_000, 500_000), 2)
+        rate = rng.choice([0.05, 0.12, 0.18, 0.28])
+        inter = number[:2] != '27'  # the buyer is in Maharashtra
+        tax = round(taxable * rate, 2)
+        heads = (tax, 0.0, 0.0) if inter else (0.0, round(tax / 2, 2), round(tax / 2, 2))
+
+        if kind != 'books_only':
+            # Two rate lines for some invoices, as the 2B splits them.
+            split = [0.6, 0.4] if rng.random() < 0.2 else [1.0]
+            for share in split:
+                gstr2b.append([number, name, f'{series}/24-25/{serial:05d}', date,
+                               round(taxable * share, 2), *(round(h * share, 2) for h in heads), 0.0])
+        if kind != 'gstr2b_only':
+            invoice = f'{series}-24-25-{serial}'
+            if kind == 'typo':
+                invoice = f'{series}-24-25-{serial}{rng.randint(0, 9)}'
+            elif kind == 'prefix':
+                invoice = f'{serial}'
+            books_date = date + pd.Timedelta(days=rng.randint(1, 5)) if kind == 'date' else date
+            books_taxable = taxable + round(rng.uniform(50, 5_000), 2) if kind == 'amount' else taxable
+            register.append([number, name, invoice, books_date, books_taxable, *heads, 0.0])
+
+    columns = ['GSTIN', 'Supplier', 'Invoice No', 'Invoice Date', 'Taxable Value', 'IGST', 'CGST', 'SGST', 'Cess']
+    register = pd.DataFrame(register, columns=columns)
+    gstr2b = pd.DataFrame(gstr2b, columns=columns)
+    return register, gstr2b, expected
+
+
+def gstr2b_workbook(gstr2b, path):
+    """Write ``gstr2b`` the way the portal's GSTR-2B Excel lays out its B2B sheet."""
+    wb = Workbook(write_only=True)
+    wb.create_sheet('Read me').append(['Goods and Services Tax - GSTR-2B'])
+    ws = wb.create_sheet('B2B')
+    ws.append(['Taxable inward supplies received from registered persons'])
+    ws.append([])
+    ws.append(GSTR2B_HEADINGS[0])
+    ws.append(GSTR2B_HEADINGS[1])
+    for number, name, invoice, date, taxable, igst, cgst, sgst, cess in gstr2b.itertuples(index=False, name=None):
+        value = round(taxable + igst + cgst + sgst + cess, 2)
+        ws.append([number, name, invoice, 'Regular', date.strftime('%d-%m-%Y'), value, 'Maharashtra', 'No', taxable, igst, cgst, sgst,
+                   cess, "Mar'25", '11-04-2025', 'Yes', None, None, 'E-Invoice', None, None])
+    wb.save(path)
+    return path
+
+
+def purchase_register(register, path):
+    """Write ``register`` as a Tally-style purchase register (xlsx or csv, by extension)."""
+    rows = [[date, name, 'Purchase', k + 1, number, invoice, date, taxable, igst, cgst, sgst, cess,
+             round(taxable + igst + cgst + sgst + cess, 2)]
+            for k, (number, name, invoice, date, taxable, igst, cgst, sgst, cess)
+            in enumerate(register.itertuples(index=False, name=None))]
+    if path.endswith('.csv'):
+        df = pd.DataFrame(rows, columns=REGISTER_HEADINGS)
+        for column in ('Date', 'Supplier Invoice Date'):
+            df[column] = df[column].dt.strftime('%d-%m-%Y')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            f.write('Purchase Register\n1-Apr-2024 to 31-Mar-2025\n')
+            df.to_csv(f, index=False)
+        return path
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Purchase Register')
+    ws.append(['Purchase Register'])
+    ws.append(['1-Apr-2024 to 31-Mar-2025'])
+    ws.append(REGISTER_HEADINGS)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return path
@@ -0,0 +1,10 @@
+"""Client names as the alias index and the transaction store key them.
+
+Kept apart from both so that either can be used without loading the other
+(the alias index pulls in the matching engine and its libraries).
+"""
+
+
+def client_key(client):
+    """How a client name is stored: trimmed and case-folded."""
+    return ' '.join(str(client).split()).upper()
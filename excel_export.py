@@ -0,0 +1,175 @@
+"""Single-pass Excel output for the 26AS tools.
+
+Workbooks are written in openpyxl's write-only mode: rows are streamed to the
+file as they are appended, so memory stays flat however many rows there are,
+and nothing is saved, reloaded and saved again to apply formatting.
+
+Styling uses a handful of template cells built once per sheet. Write-only
+rows are serialised the moment they are appended, so each template is simply
+given the next value and appended again, instead of creating a new cell and
+style objects for every value.
+"""
+import io
+import math
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+AMOUNT_FORMAT = '#,##0.00'
+
+THIN = Side(style='thin')
+BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+
+# Same look as pandas' to_excel header row.
+PLAIN_HEADER = {'font': Font(bold=True), 'border': BORDER, 'alignment': Alignment(horizontal='center', vertical='top')}
+BLUE_HEADER = {'font': Font(bold=True, color='FFFFFF'), 'border': BORDER,
+               'fill': PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')}
+
+MATCHED_FILL = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
+DIFF_FILL = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
+TOTAL_FILL = PatternFill(start_color='FFEB9C', end_color='FFEB9C', fill_type='solid')
+BOOKS_ONLY_FILL = PatternFill(start_color='FCE4D6', end_color='FCE4D6', fill_type='solid')
+GSTR2B_ONLY_FILL = PatternFill(start_color='DDEBF7', end_color='DDEBF7', fill_type='solid')
+DUPLICATE_FILL = PatternFill(start_color='E4DFEC', end_color='E4DFEC', fill_type='solid')
+
+
+def _template(ws, **style):
+    cell = WriteOnlyCell(ws)
+    for attr, value in style.items():
+        setattr(cell, attr, value)
+    return cell
+
+
+def _fill_row(templates, values):
+    for cell, value in zip(templates, values):
+        # Blank out NaN the way pandas' to_excel does.
+        cell.value = None if isinstance(value, float) and math.isnan(value) else value
+    return templates
+
+
+def _sheet(wb, title, widths):
+    ws = wb.create_sheet(title)
+    for col, width in widths.items():
+        ws.column_dimensions[col].width = width
+    return ws
+
+
+def _save(wb):
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def _header(ws, columns, style):
+    return [_template(ws, value=name, **style) for name in columns]
+
+
+def write_table(wb, title, df, widths, row_templates=None, pick=None, header_style=PLAIN_HEADER):
+    """Stream ``df`` into a new sheet of ``wb``.
+
+    Rows are written unstyled unless ``row_templates`` (builds a dict of
+    template rows for the sheet) and ``pick`` (chooses a template key for
+    each row tuple) are given.
+    """
+    ws = _sheet(wb, title, widths)
+    ws.append(_header(ws, df.columns, header_style))
+    rows = df.itertuples(index=False, name=None)
+    if row_templates is None:
+        for row in rows:
+            ws.append([None if isinstance(v, float) and math.isnan(v) else v for v in row])
+        return ws
+
+    templates = row_templates(ws)
+    for row in rows:
+        ws.append(_fill_row(templates[pick(row)], row))
+    return ws
+
+
+def _cell_values(df, dates=(), texts=()):
+    # As openpyxl takes them: dates without a time part, blanks as None
+    # (openpyxl rejects NaT and pd.NA).
+    df = df.copy()
+    for column in dates:
+        values = df[column].dt.date
+        df[column] = values.astype(object).where(values.notna(), None)
+    for column in texts:
+        df[column] = df[column].astype(object).where(df[column].notna(), None)
+    return df
+
+
+def extract_workbook(df, transactions=None):
+    """The 'PDF to Excel' output: a '26AS Data' sheet, and a 'Transactions' sheet when given."""
+    wb = Workbook(write_only=True)
+    write_table(wb, '26AS Data', df, {'A': 50, 'B': 18, 'C': 14})
+    if transactions is not None:
+        transactions = _cell_values(transactions, dates=('Transaction Date', 'Date of Booking'))
+        write_table(wb, 'Transactions', transactions,
+                    {'A': 14, 'B': 50, 'C': 6, 'D': 10, 'E': 16, 'F': 10, 'G': 16, 'H': 18, 'I': 14, 'J': 14})
+    return _save(wb)
+
+
+def summary_workbook(totals):
+    """The 'Tally Summary' output: party totals plus a TOTAL row."""
+    wb = Workbook(write_only=True)
+    ws = _sheet(wb, 'Party Summary', {'A': 50, 'B': 20})
+    ws.append(_header(ws, ['Name of Party', 'Amount as per Books'], BLUE_HEADER))
+
+    row = [_template(ws, border=BORDER), _template(ws, border=BORDER, number_format=AMOUNT_FORMAT)]
+    for party, amount in totals.items():
+        ws.append(_fill_row(row, (party, amount)))
+
+    total_row = [_template(ws, font=Font(bold=True)), _template(ws, font=Font(bold=True), number_format=AMOUNT_FORMAT)]
+    ws.append(_fill_row(total_row, ('TOTAL', float(totals.sum()))))
+    return _save(wb)
+
+
+def _reconciliation_templates(ws):
+    return {kind: [_template(ws, fill=fill) for _ in range(4)]
+            for kind, fill in (('total', TOTAL_FILL), ('matched', MATCHED_FILL), ('diff', DIFF_FILL))}
+
+
+def _reconciliation_kind(row):
+    party, diff = row[0], row[3]
+    if party == 'TOTAL': return 'total'
+    if diff == 0 or abs(diff) < 1.0: return 'matched'
+    return 'diff'
+
+
+def reconciliation_workbook(final_df):
+    """The reconciliation statement, rows coloured by how well they agree."""
+    wb = Workbook(write_only=True)
+    write_table(wb, 'Reconciliation', final_df, {}, _reconciliation_templates, _reconciliation_kind)
+    return _save(wb)
+
+
+GST_FILLS = {'Matched': MATCHED_FILL, 'Amount mismatch': DIFF_FILL, 'Only in books': BOOKS_ONLY_FILL,
+             'Only in GSTR-2B': GSTR2B_ONLY_FILL, 'Duplicate invoice': DUPLICATE_FILL, 'TOTAL': TOTAL_FILL}
+
+
+def _gst_templates(columns, amounts):
+    # One template row per status; amount columns formatted.
+    def build(ws):
+        return {status: [_template(ws, fill=fill, number_format=AMOUNT_FORMAT) if c in amounts
+                         else _template(ws, fill=fill) for c in columns]
+                for status, fill in GST_FILLS.items()}
+    return build
+
+
+def gst_reconciliation_workbook(statement, summary):
+    """The GSTR-2B reconciliation: a 'Summary' sheet and the invoice-wise 'Reconciliation' sheet, rows coloured by status."""
+    wb = Workbook(write_only=True)
+    amounts = set(summary.columns[2:])
+    write_table(wb, 'Summary', summary, {'A': 20, 'B': 10, 'C': 22, 'D': 22, 'E': 18, 'F': 18},
+                _gst_templates(summary.columns, amounts), lambda row: row[0], BLUE_HEADER)
+
+    statement = _cell_values(statement, dates=('Invoice Date (Books)', 'Invoice Date (GSTR-2B)'),
+                             texts=('GSTIN', 'Supplier', 'Invoice No (Books)', 'Invoice No (GSTR-2B)', 'Match'))
+    amounts = {c for c in statement.columns if c.startswith(('Taxable', 'Tax '))}
+    status = statement.columns.get_loc('Status')
+    write_table(wb, 'Reconciliation', statement,
+                {'A': 18, 'B': 40, 'C': 22, 'D': 22, 'E': 14, 'F': 14, 'G': 16, 'H': 16, 'I': 14, 'J': 14,
+                 'K': 14, 'L': 14, 'M': 9, 'N': 18},
+                _gst_templates(statement.columns, amounts), lambda row: row[status], BLUE_HEADER)
+    return _save(wb)
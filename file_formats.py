@@ -0,0 +1,14 @@
+"""File types the tools accept.
+
+Kept free of heavy imports so the app can draw its upload widgets without
+loading the readers in ``ingest``.
+"""
+import os
+
+LEDGER_FORMATS = ('xlsx', 'xlsm', 'xls', 'csv', 'xml')
+SUMMARY_FORMATS = ('xlsx', 'xlsm', 'csv')
+INVOICE_FORMATS = ('xlsx', 'xlsm', 'csv', 'json')
+
+
+def file_format(name):
+    return os.path.splitext(name)[1].lstrip('.').lower()
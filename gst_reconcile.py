@@ -0,0 +1,265 @@
+"""GSTR-2B vs purchase register reconciliation.
+
+Each side's lines are first totalled per invoice (the 2B lists an invoice
+once per tax rate, registers often once per item), then invoices are paired
+in stages, each over what the earlier ones left:
+
+1. ``exact``: same GSTIN, invoice number and invoice date;
+2. ``invoice``: same GSTIN and invoice number, the dates differing;
+3. ``fuzzy``: same GSTIN and amounts, invoice numbers alike (rapidfuzz),
+   paired one-to-one, most alike first.
+
+The first two are hash joins (``DataFrame.merge``) on normalised keys:
+GSTINs upper-cased, invoice numbers reduced to their letters and digits
+with no zero padding, so "INV/24-25/0042" in the 2B meets "inv-24-25-42" in
+the books. Only the small residue they leave is fuzzy-matched, and only within one
+GSTIN, never across suppliers.
+
+A key shared by several invoices on either side (one number under two
+dates, say) is not joined: which invoice pairs with which would be a guess.
+Those invoices go on to the later stages, and any left unpaired are
+reported as 'Duplicate invoice' rather than as missing from the other side.
+
+A pair whose taxable value and tax agree within ``tolerance`` is
+'Matched', otherwise 'Amount mismatch'. The rest are 'Only in books'
+(claimed but not in the 2B) or 'Only in GSTR-2B'.
+"""
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from metrics import NO_METRICS
+
+TAXES = ['IGST', 'CGST', 'SGST', 'Cess']
+
+MATCHED, MISMATCH, BOOKS_ONLY, GSTR2B_ONLY = 'Matched', 'Amount mismatch', 'Only in books', 'Only in GSTR-2B'
+DUPLICATE = 'Duplicate invoice'
+STATUSES = (MATCHED, MISMATCH, BOOKS_ONLY, GSTR2B_ONLY, DUPLICATE)
+
+STATEMENT_COLUMNS = [
+    'GSTIN', 'Supplier', 'Invoice No (Books)', 'Invoice No (GSTR-2B)', 'Invoice Date (Books)',
+    'Invoice Date (GSTR-2B)', 'Taxable Value (Books)', 'Taxable Value (GSTR-2B)', 'Tax (Books)',
+    'Tax (GSTR-2B)', 'Taxable Difference', 'Tax Difference', 'Match', 'Status',
+]
+SUMMARY_COLUMNS = ['Status', 'Invoices', 'Taxable Value (Books)', 'Taxable Value (GSTR-2B)', 'Tax (Books)',
+                   'Tax (GSTR-2B)']
+
+# Rupees either amount may differ by for a pair to count as matched.
+TOLERANCE = 1.0
+
+# Minimum invoice number similarity (rapidfuzz ratio, 0-100) for a fuzzy pair.
+FUZZY_THRESHOLD = 85
+
+
+def gstin_key(gstins):
+    return gstins.astype('string').str.upper().str.replace(r'[^0-9A-Z]', '', regex=True)
+
+
+def invoice_key(numbers):
+    """Invoice numbers as compared: upper-case letters and digits only, numbers without leading zeros."""
+    numbers = numbers.astype('string').str.upper().str.replace(r'(?<![0-9])0+(?=[0-9])', '', regex=True)
+    return numbers.str.replace(r'[^0-9A-Z]', '', regex=True)
+
+
+def invoice_totals(df):
+    """One row per GSTIN, invoice number and date, amounts summed.
+
+    ``df`` is in ``ingest.INVOICE_COLUMNS``. Gives ``gstin``, ``key``,
+    ``date``, ``supplier``, ``invoice`` (as first written), ``taxable``,
+    ``tax`` and ``lines``.
+    """
+    df = pd.DataFrame({
+        'gstin': gstin_key(df['GSTIN']),
+        'key': invoice_key(df['Invoice No']),
+        'date': df['Invoice Date'],
+        'supplier': df['Supplier'],
+        'invoice': df['Invoice No'],
+        'taxable': df['Taxable Value'],
+        'tax': df[TAXES].sum(axis=1),
+    })
+    totals = df.groupby(['gstin', 'key', 'date'], sort=False, dropna=False).agg(
+        supplier=('supplier', 'first'), invoice=('invoice', 'first'), taxable=('taxable', 'sum'),
+        tax=('tax', 'sum'), lines=('taxable', 'size'))
+    return totals.reset_index()
+
+
+def _join(books, gstr2b, on):
+    """Pairs of positions agreeing on the columns ``on``, one invoice a side.
+
+    Returns the pairs and the books and 2B positions of keys held by more
+    than one invoice on either side, which are left unpaired.
+    """
+    pairs = books[on + ['b']].merge(gstr2b[on + ['g']], on=on, sort=False)
+    unique = ~pairs.duplicated('b', keep=False) & ~pairs.duplicated('g', keep=False)
+    shared = pairs[~unique]
+    return pairs.loc[unique, ['b', 'g']], shared['b'].unique(), shared['g'].unique()
+
+
+def _amount_band(taxable, tolerance):
+    return np.floor(taxable.to_numpy() / max(tolerance, 0.01)).astype(np.int64)
+
+
+def _fuzzy_pairs(books, gstr2b, threshold, tolerance):
+    """One-to-one pairs of alike invoice numbers within each GSTIN of the residue.
+
+    Consecutive invoices of a supplier have numbers as alike as a typo, so
+    only invoices whose taxable value and tax agree are paired. Those
+    candidates come from one more hash join, on GSTIN and the taxable value
+    rounded to ``tolerance`` (and the bands either side), and are scored as a
+    batch. A number that is the other's tail or head (a "24-25/" series the
+    other side left out) counts as alike. The most alike pairs are taken
+    first.
+    """
+    left = pd.DataFrame({'gstin': books['gstin'].to_numpy(), 'band': _amount_band(books['taxable'], tolerance),
+                         'b': books['b'].to_numpy()})
+    right = pd.DataFrame({'gstin': gstr2b['gstin'].to_numpy(), 'band': _amount_band(gstr2b['taxable'], tolerance),
+                          'g': gstr2b['g'].to_numpy()})
+    right = pd.concat([right.assign(band=right['band'] + shift) for shift in (-1, 0, 1)], ignore_index=True)
+    pairs = left.merge(right, on=['gstin', 'band'], sort=False)
+    b_idx, g_idx = pairs['b'].to_numpy(), pairs['g'].to_numpy()
+    taxable_b, taxable_g = books['taxable'].to_numpy(), gstr2b['taxable'].to_numpy()
+    tax_b, tax_g = books['tax'].to_numpy(), gstr2b['tax'].to_numpy()
+    # Positions (b, g) index the full tables; the residue keeps them.
+    gap = np.abs(_at(taxable_b, books, 'b', b_idx) - _at(taxable_g, gstr2b, 'g', g_idx))
+    agree = (gap <= tolerance) & (np.abs(_at(tax_b, books, 'b', b_idx) - _at(tax_g, gstr2b, 'g', g_idx)) <= tolerance)
+    b_idx, g_idx, gap = b_idx[agree], g_idx[agree], gap[agree]
+    if not len(b_idx):
+        return pd.DataFrame({'b': b_idx, 'g': g_idx})
+
+    keys_b = _at(books['key'].to_numpy(), books, 'b', b_idx).tolist()
+    keys_g = _at(gstr2b['key'].to_numpy(), gstr2b, 'g', g_idx).tolist()
+    scores = process.cpdist(keys_b, keys_g, scorer=fuzz.ratio, dtype=np.float64)
+    partial = process.cpdist(keys_b, keys_g, scorer=fuzz.partial_ratio, dtype=np.float64)
+    scores = np.where(partial == 100, np.maximum(scores, threshold), scores)
+    alike = scores >= threshold
+    b_idx, g_idx, scores, gap = b_idx[alike], g_idx[alike], scores[alike], gap[alike]
+
+    # Greedy one-to-one: best similarity first, closer amounts, then file order.
+    order = np.lexsort((g_idx, b_idx, gap, -scores))
+    used_b, used_g, found = set(), set(), []
+    for b, g in zip(b_idx[order].tolist(), g_idx[order].tolist()):
+        if b in used_b or g in used_g: continue
+        used_b.add(b)
+        used_g.add(g)
+        found.append((b, g))
+    return pd.DataFrame(found, columns=['b', 'g'], dtype=np.int64)
+
+
+def _at(values, table, position, idx):
+    # ``values`` of ``table``'s rows whose ``position`` column is ``idx``.
+    return values[pd.Index(table[position]).get_indexer(idx)]
+
+
+def build_statement(books, gstr2b, pairs, tolerance, duplicates=((), ())):
+    """Matched pairs, then each side's leftovers, sorted by GSTIN and invoice.
+
+    ``duplicates`` holds the books and 2B positions whose key was shared;
+    those left over are 'Duplicate invoice'.
+    """
+    dup_b, dup_g = duplicates
+    b_idx, g_idx = pairs['b'].to_numpy(), pairs['g'].to_numpy()
+    matched = pd.DataFrame({
+        'GSTIN': gstr2b['gstin'].to_numpy()[g_idx],
+        'Supplier': gstr2b['supplier'].to_numpy()[g_idx],
+        'Invoice No (Books)': books['invoice'].to_numpy()[b_idx],
+        'Invoice No (GSTR-2B)': gstr2b['invoice'].to_numpy()[g_idx],
+        'Invoice Date (Books)': books['date'].to_numpy()[b_idx],
+        'Invoice Date (GSTR-2B)': gstr2b['date'].to_numpy()[g_idx],
+        'Taxable Value (Books)': books['taxable'].to_numpy()[b_idx],
+        'Taxable Value (GSTR-2B)': gstr2b['taxable'].to_numpy()[g_idx],
+        'Tax (Books)': books['tax'].to_numpy()[b_idx],
+        'Tax (GSTR-2B)': gstr2b['tax'].to_numpy()[g_idx],
+        'Match': pairs['match'].to_numpy(),
+    })
+    # Names missing from the 2B side come from the books.
+    matched['Supplier'] = matched['Supplier'].fillna(pd.Series(books['supplier'].to_numpy()[b_idx]))
+
+    only_books = books.drop(index=b_idx)
+    only_books = pd.DataFrame({
+        'GSTIN': only_books['gstin'],
+        'Supplier': only_books['supplier'],
+        'Invoice No (Books)': only_books['invoice'],
+        'Invoice Date (Books)': only_books['date'],
+        'Taxable Value (Books)': only_books['taxable'],
+        'Taxable Value (GSTR-2B)': 0.0,
+        'Tax (Books)': only_books['tax'],
+        'Tax (GSTR-2B)': 0.0,
+        'Status': np.where(only_books['b'].isin(dup_b), DUPLICATE, BOOKS_ONLY),
+    })
+
+    only_2b = gstr2b.drop(index=g_idx)
+    only_2b = pd.DataFrame({
+        'GSTIN': only_2b['gstin'],
+        'Supplier': only_2b['supplier'],
+        'Invoice No (GSTR-2B)': only_2b['invoice'],
+        'Invoice Date (GSTR-2B)': only_2b['date'],
+        'Taxable Value (Books)': 0.0,
+        'Taxable Value (GSTR-2B)': only_2b['taxable'],
+        'Tax (Books)': 0.0,
+        'Tax (GSTR-2B)': only_2b['tax'],
+        'Status': np.where(only_2b['g'].isin(dup_g), DUPLICATE, GSTR2B_ONLY),
+    })
+
+    statement = pd.concat([matched, only_books, only_2b], ignore_index=True)
+    statement['Taxable Difference'] = (statement['Taxable Value (Books)'] - statement['Taxable Value (GSTR-2B)']).round(2)
+    statement['Tax Difference'] = (statement['Tax (Books)'] - statement['Tax (GSTR-2B)']).round(2)
+    agree = (statement['Taxable Difference'].abs() <= tolerance) & (statement['Tax Difference'].abs() <= tolerance)
+    is_pair = statement['Match'].notna()
+    statement.loc[is_pair, 'Status'] = np.where(agree[is_pair], MATCHED, MISMATCH)
+
+    order = statement['Invoice No (Books)'].fillna(statement['Invoice No (GSTR-2B)'])
+    statement = statement.assign(_order=order).sort_values(['GSTIN', '_order'], kind='stable')
+    return statement[STATEMENT_COLUMNS].reset_index(drop=True)
+
+
+def summarise(statement):
+    """Invoice count and amounts per status, with a TOTAL row."""
+    amounts = SUMMARY_COLUMNS[2:]
+    summary = statement.groupby('Status', sort=False).agg(
+        Invoices=('Status', 'size'), **{c: (c, 'sum') for c in amounts})
+    summary = summary.reindex(STATUSES, fill_value=0).reset_index()
+    total = pd.DataFrame([{'Status': 'TOTAL', 'Invoices': summary['Invoices'].sum(),
+                           **{c: summary[c].sum() for c in amounts}}])
+    summary = pd.concat([summary, total], ignore_index=True)[SUMMARY_COLUMNS]
+    summary[amounts] = summary[amounts].round(2)
+    return summary
+
+
+def reconcile_invoices(df_books, df_2b, tolerance=TOLERANCE, threshold=FUZZY_THRESHOLD, metrics=None):
+    """Reconcile a purchase register against a GSTR-2B; returns the statement.
+
+    Both are in ``ingest.INVOICE_COLUMNS`` (as ``ingest.read_invoices``
+    gives). With ``metrics`` (a ``metrics.Run``), time goes to the
+    ``prepare``, ``exact``, ``invoice``, ``fuzzy`` and ``statement`` stages.
+    """
+    metrics = metrics or NO_METRICS
+    with metrics.stage('prepare', rows=len(df_books) + len(df_2b)) as stage:
+        books, gstr2b = invoice_totals(df_books), invoice_totals(df_2b)
+        books['b'], gstr2b['g'] = np.arange(len(books)), np.arange(len(gstr2b))
+        stage.count(invoices=len(books) + len(gstr2b))
+
+    # Rows without a usable invoice number are never paired.
+    books_left, gstr2b_left = books[books['key'] != ''], gstr2b[gstr2b['key'] != '']
+    pairs, dup_b, dup_g = [], [], []
+    for match, on in (('exact', ['gstin', 'key', 'date']), ('invoice', ['gstin', 'key']), ('fuzzy', None)):
+        with metrics.stage(match, invoices=len(books_left)) as stage:
+            if on is None:
+                found = _fuzzy_pairs(books_left, gstr2b_left, threshold, tolerance)
+            else:
+                if 'date' in on:
+                    found, shared_b, shared_g = _join(books_left[books_left['date'].notna()],
+                                                      gstr2b_left[gstr2b_left['date'].notna()], on)
+                else:
+                    found, shared_b, shared_g = _join(books_left, gstr2b_left, on)
+                dup_b.extend(shared_b.tolist())
+                dup_g.extend(shared_g.tolist())
+                stage.count(duplicates=len(shared_b) + len(shared_g))
+            pairs.append(found.assign(match=match))
+            books_left = books_left[~books_left['b'].isin(found['b'])]
+            gstr2b_left = gstr2b_left[~gstr2b_left['g'].isin(found['g'])]
+            stage.count(matched=len(found))
+
+    with metrics.stage('statement'):
+        pairs = pd.concat(pairs, ignore_index=True)
+        pairs[['b', 'g']] = pairs[['b', 'g']].astype(np.int64)
+        return build_statement(books, gstr2b, pairs, tolerance, (dup_b, dup_g))
@@ -0,0 +1,316 @@
+"""Chunked readers for Tally ledgers, party summaries and GST invoice lists.
+
+``pd.read_excel`` builds openpyxl's full workbook object graph before any
+parsing starts. These readers stream rows instead: xlsx through openpyxl's
+read-only ``iter_rows``, limited to the needed columns, CSV through pandas'
+chunked C parser, and Tally's XML export through ``iterparse``. Every format
+comes out as the same chunks, which feed the same summary and reconciliation
+code. Legacy binary ``.xls`` workbooks are refused with a message asking for
+one of those instead.
+
+``read_invoices`` reads a GSTR-2B download (the Excel B2B sheet or the JSON)
+or a purchase register. Their layouts vary, so the columns are found by
+their headings (``INVOICE_HEADERS``) rather than by position.
+"""
+import csv
+import io
+import json
+import re
+import xml.etree.ElementTree as ET
+from itertools import islice
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from file_formats import INVOICE_FORMATS, LEDGER_FORMATS, SUMMARY_FORMATS, file_format  # noqa: F401 (re-exported)
+from tally_summary import CREDIT_COL, DEBIT_COL, PARTICULARS_COL
+
+CHUNK_ROWS = 50_000
+
+# Tally "Ledger Vouchers" XML export: one record per voucher line, each
+# starting with its date.
+TALLY_RECORD_START = 'DSPVCHDATE'
+TALLY_PARTICULARS = 'DSPVCHLEDACCOUNT'
+TALLY_DEBIT = 'DSPVCHDRAMT'
+TALLY_CREDIT = 'DSPVCHCRAMT'
+
+
+def _like_pandas(value):
+    # pd.read_excel turns whole-number floats into ints (700224.0 -> 700224).
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
+
+def _chunk(records, start, columns):
+    return pd.DataFrame.from_records(records, columns=columns, index=range(start, start + len(records)))
+
+
+def _xlsx_rows(file, columns):
+    """Yield tuples of the given (0-based) columns for every data row.
+
+    Read through openpyxl's read-only ``iter_rows``, which parses the sheet
+    as it goes and only builds cells up to the last wanted column. Rows are
+    numbered as ``pd.read_excel`` numbers them: row 1 is the header, gaps
+    are blank rows.
+    """
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from _sheet_rows(wb.worksheets[0], columns)
+    finally:
+        wb.close()
+
+
+def _sheet_rows(ws, columns, first_row=2):
+    """``_xlsx_rows`` for sheet ``ws`` of an open workbook, from row ``first_row`` (1-based) on."""
+    columns = list(columns)
+    low = min(columns)
+    for row in ws.iter_rows(min_row=first_row, min_col=low + 1, max_col=max(columns) + 1, values_only=True):
+        yield tuple(row[c - low] if c - low < len(row) else None for c in columns)
+
+
+def _chunks_of(rows, chunk_rows, columns, convert=None):
+    start = 0
+    while True:
+        records = list(islice(rows, chunk_rows))
+        if not records: return
+        if convert: records = [convert(r) for r in records]
+        yield _chunk(records, start, columns)
+        start += len(records)
+
+
+def _tally_xml_rows(file):
+    record = None
+    for _, elem in ET.iterparse(file, events=('end',)):
+        tag = elem.tag.upper()
+        if tag == TALLY_RECORD_START:
+            if record is not None: yield record
+            record = [None, None, None]
+        elif record is not None:
+            text = (elem.text or '').strip() or None
+            if tag == TALLY_PARTICULARS: record[0] = text
+            elif tag == TALLY_DEBIT: record[1] = text
+            elif tag == TALLY_CREDIT: record[2] = text
+        elem.clear()
+    if record is not None: yield record
+
+
+def _tally_amount(text):
+    # Tally writes debits as negative numbers; the ledger sheet shows both
+    # sides as positive amounts in their own column.
+    if text is None: return None
+    try:
+        return abs(float(text.replace(',', '')))
+    except ValueError:
+        return text
+
+
+def _csv_chunks(file, columns, chunk_rows):
+    # Columns come back in file order, which is the order of ``columns``.
+    width = len(pd.read_csv(file, nrows=0).columns)
+    if hasattr(file, 'seek'): file.seek(0)
+    if width <= max(columns):
+        raise ValueError(f"Expected at least {max(columns) + 1} columns in the CSV file, found {width}")
+    yield from pd.read_csv(file, usecols=columns, chunksize=chunk_rows, thousands=',', skip_blank_lines=False)
+
+
+def iter_ledger_chunks(file, name, chunk_rows=CHUNK_ROWS):
+    """Yield ``particulars``/``debit``/``credit`` chunks from a Tally ledger.
+
+    ``file`` is a path or file-like object and ``name`` its file name, used to
+    pick the reader (xlsx/xlsm, xls, csv or Tally XML).
+    """
+    columns = ['particulars', 'debit', 'credit']
+    positions = [PARTICULARS_COL, DEBIT_COL, CREDIT_COL]
+    fmt = file_format(name)
+
+    if fmt in ('xlsx', 'xlsm'):
+        rows = _xlsx_rows(file, positions)
+        yield from _chunks_of(rows, chunk_rows, columns, lambda r: (_like_pandas(r[0]), r[1], r[2]))
+    elif fmt == 'xls':
+        raise ValueError("Legacy .xls workbooks cannot be read; "
+                         "save the ledger as .xlsx or CSV (or export it from Tally as XML) and upload that")
+    elif fmt == 'csv':
+        for chunk in _csv_chunks(file, positions, chunk_rows):
+            chunk.columns = columns
+            yield chunk
+    elif fmt == 'xml':
+        rows = _tally_xml_rows(file)
+        yield from _chunks_of(rows, chunk_rows, columns, lambda r: (r[0], _tally_amount(r[1]), _tally_amount(r[2])))
+    else:
+        raise ValueError(f"Unsupported ledger format: .{fmt}")
+
+
+def read_summary(file, name, amount_column):
+    """Read a two-column party summary (name, amount) into a DataFrame."""
+    columns = ['Name of Party', amount_column]
+    fmt = file_format(name)
+
+    if fmt in ('xlsx', 'xlsm'):
+        chunks = list(_chunks_of(_xlsx_rows(file, [0, 1]), CHUNK_ROWS, columns))
+    elif fmt == 'csv':
+        chunks = list(_csv_chunks(file, [0, 1], CHUNK_ROWS))
+        for chunk in chunks: chunk.columns = columns
+    else:
+        raise ValueError(f"Unsupported summary format: .{fmt}")
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(chunks)
+
+
+INVOICE_COLUMNS = ['GSTIN', 'Supplier', 'Invoice No', 'Invoice Date', 'Taxable Value', 'IGST', 'CGST', 'SGST', 'Cess']
+INVOICE_AMOUNTS = ['Taxable Value', 'IGST', 'CGST', 'SGST', 'Cess']
+
+# Heading patterns for each invoice column, most specific first; matched
+# against headings lower-cased with punctuation turned into spaces. They cover
+# the GSTR-2B B2B sheet and the usual purchase registers (Tally, Busy, ERP
+# exports).
+INVOICE_HEADERS = {
+    'GSTIN': [r'gstin of supplier|supplier gstin', r'gstin'],
+    'Supplier': [r'trade.*name|legal name', r'(supplier|vendor|party) name', r'^(particulars|name|party|supplier)$'],
+    'Invoice No': [r'supplier (invoice|bill) (no|number)', r'invoice (no|number|num)', r'bill (no|number)',
+                   r'(document|doc) (no|number)', r'(reference|ref) (no|number)'],
+    'Invoice Date': [r'supplier (invoice|bill) date', r'invoice date', r'bill date', r'(document|doc) date', r'^date$'],
+    'Taxable Value': [r'taxable', r'assessable'],
+    'IGST': [r'igst|integrated tax'],
+    'CGST': [r'cgst|central tax'],
+    'SGST': [r'sgst|utgst|state.*tax'],
+    'Cess': [r'cess'],
+}
+REQUIRED_INVOICE_COLUMNS = ('GSTIN', 'Invoice No')
+
+# Headings are looked for in the first rows, and in this many columns.
+HEADER_SCAN_ROWS = 15
+HEADER_SCAN_COLUMNS = 40
+
+_heading_junk = re.compile(r'[^a-z0-9]+')
+
+
+def _heading(value):
+    return _heading_junk.sub(' ', str(value).lower()).strip() if value is not None else ''
+
+
+def _find_invoice_header(rows):
+    """``(header_row, {column: position})`` for the likeliest heading row of ``rows``.
+
+    A GSTR-2B heading spans two rows ("Invoice Details" over "Invoice
+    number", "Invoice Date", ...), so a blank heading cell takes the heading
+    right above it. The first row finding the most columns wins.
+    """
+    best = (0, -1, {})
+    above = ()
+    for r, row in enumerate(rows):
+        labels = {}
+        for c, value in enumerate(row):
+            labels[c] = _heading(value) or (above[c] if c < len(above) else '')
+        above = [_heading(value) for value in row]
+        found = {}
+        for column, patterns in INVOICE_HEADERS.items():
+            options = [(p, c) for c, label in labels.items() if label and c not in found.values()
+                       for p, pattern in enumerate(patterns) if re.search(pattern, label)]
+            if options: found[column] = min(options)[1]
+        if len(found) > best[0]:
+            best = (len(found), r, found)
+    _, header_row, found = best
+    missing = [c for c in REQUIRED_INVOICE_COLUMNS if c not in found]
+    if missing:
+        raise ValueError(f"No {' or '.join(missing)} column found in the headings")
+    return header_row, found
+
+
+def _to_amount(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.fillna(0.0).astype(float)
+    text = values.astype('string').str.replace(r'[,\s₹]', '', regex=True)
+    return pd.to_numeric(text, errors='coerce').fillna(0.0).astype(float)
+
+
+def _to_date(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    # Both the portal and most registers write dd-mm-yyyy; parse that in one
+    # vectorised pass and only the rest one by one.
+    text = values.map(lambda v: v.strftime('%d-%m-%Y') if hasattr(v, 'strftime') else v).astype('string')
+    dates = pd.to_datetime(text, format='%d-%m-%Y', errors='coerce')
+    rest = dates.isna() & text.notna()
+    if rest.any():
+        dates[rest] = pd.to_datetime(text[rest], dayfirst=True, format='mixed', errors='coerce')
+    return dates
+
+
+def _invoice_frame(df):
+    """``df`` (canonical column names, any subset) with every ``INVOICE_COLUMNS`` column typed."""
+    out = pd.DataFrame(index=df.index)
+    for column in INVOICE_COLUMNS:
+        values = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if column in INVOICE_AMOUNTS:
+            out[column] = _to_amount(values)
+        elif column == 'Invoice Date':
+            out[column] = _to_date(values)
+        else:
+            out[column] = values.astype('string').str.strip()
+    out = out[out['GSTIN'].notna() & out['Invoice No'].notna() & (out['Invoice No'] != '')]
+    return out.reset_index(drop=True)
+
+
+def _gstr2b_json_rows(file):
+    if hasattr(file, 'read'):
+        data = json.load(file)
+    else:
+        with open(file, encoding='utf-8') as f:
+            data = json.load(f)
+    docs = data.get('data', data).get('docdata', {})
+    for supplier in docs.get('b2b', ()):
+        for inv in supplier.get('inv', ()):
+            items = inv.get('items') or [inv]
+            yield (supplier.get('ctin'), supplier.get('trdnm'), inv.get('inum'), inv.get('dt'),
+                   *(sum(item.get(k) or 0 for item in items) for k in ('txval', 'igst', 'cgst', 'sgst', 'cess')))
+
+
+def _pick_sheet(wb, sheet):
+    for ws in wb.worksheets:
+        if sheet and ws.title.strip().lower() == sheet.lower():
+            return ws
+    return wb.worksheets[0]
+
+
+def read_invoices(file, name, sheet=None):
+    """Read a GSTR-2B or purchase register into ``INVOICE_COLUMNS``.
+
+    ``file`` is a path or file-like object and ``name`` its file name. xlsx
+    and CSV files may have title rows above the headings; of a workbook, the
+    sheet called ``sheet`` (e.g. ``'B2B'``) is read if there is one, else the
+    first. A GSTR-2B JSON gives its B2B invoices, the items of each summed.
+    Rows without a GSTIN or invoice number (totals, notes) are dropped.
+    """
+    fmt = file_format(name)
+    if fmt == 'json':
+        df = pd.DataFrame.from_records(_gstr2b_json_rows(file), columns=INVOICE_COLUMNS)
+        return _invoice_frame(df)
+
+    if fmt in ('xlsx', 'xlsm'):
+        wb = load_workbook(file, read_only=True, data_only=True)
+        try:
+            ws = _pick_sheet(wb, sheet)
+            head = list(islice(_sheet_rows(ws, range(HEADER_SCAN_COLUMNS), first_row=1), HEADER_SCAN_ROWS))
+            header_row, found = _find_invoice_header(head)
+            rows = _sheet_rows(ws, list(found.values()), first_row=header_row + 2)
+            df = pd.concat(_chunks_of(rows, CHUNK_ROWS, list(found)), ignore_index=True)
+        finally:
+            wb.close()
+    elif fmt == 'csv':
+        if hasattr(file, 'read'):
+            text = file.read()
+            file = io.StringIO(text.decode('utf-8-sig') if isinstance(text, bytes) else text)
+            head = list(islice(csv.reader(file), HEADER_SCAN_ROWS))
+            file.seek(0)
+        else:
+            with open(file, newline='', encoding='utf-8-sig') as f:
+                head = list(islice(csv.reader(f), HEADER_SCAN_ROWS))
+        header_row, found = _find_invoice_header(head)
+        df = pd.read_csv(file, header=None, skiprows=header_row + 1, usecols=list(found.values()), dtype=str,
+                         encoding='utf-8-sig', skip_blank_lines=False)
+        df = df[sorted(found.values())].set_axis([c for c, _ in sorted(found.items(), key=lambda i: i[1])], axis=1)
+    else:
+        raise ValueError(f"Unsupported invoice file format: .{fmt}")
+    return _invoice_frame(df)
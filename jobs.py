@@ -0,0 +1,109 @@
+"""Background jobs for the long-running tool actions.
+
+Streamlit reruns the whole script on every widget interaction, so work done
+inline under ``st.spinner`` is thrown away as soon as the user moves a slider
+or switches tools. Jobs run on a bounded thread pool owned by the server
+process instead: the script only submits them and renders their status and
+progress on each rerun, and concurrent users queue for the same few workers.
+
+A job is keyed by the browser session, the kind of work and a digest of its
+inputs, so pressing the button again for the same upload returns the job
+already running (or finished) rather than starting a second one. Finished
+jobs keep their result for download until they expire.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs running at once across all sessions; the rest wait in the queue.
+MAX_JOBS = int(os.environ.get('AS26_MAX_JOBS', 2))
+
+# Seconds a finished job (and its result) is kept.
+JOB_TTL = int(os.environ.get('AS26_JOB_TTL', 3600))
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class Job:
+    """State of one submitted job, updated by the worker thread running it."""
+
+    def __init__(self, key, params=None):
+        self.key = key
+        self.params = params or {}
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def digest(self):
+        """The digest the job was submitted under (its inputs and settings)."""
+        return self.key[2]
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def report(self, progress, message=''):
+        """Record progress (0 to 1) and a short status line; called by the job."""
+        self.progress = min(max(progress, 0.0), 1.0)
+        self.message = message
+
+
+class JobManager:
+    """Runs jobs on a bounded pool and keeps them by (session, kind, digest)."""
+
+    def __init__(self, max_jobs=None, ttl=None):
+        self.ttl = JOB_TTL if ttl is None else ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs or MAX_JOBS, thread_name_prefix='as26-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, kind, digest, fn, *args, params=None, **kwargs):
+        """Run ``fn(job, *args, **kwargs)`` in the background and return its job.
+
+        A queued, running or finished job with the same key is returned as it
+        is; a failed one is replaced, so pressing the button again retries.
+        ``params`` is kept on the job for display (e.g. the settings used).
+        """
+        key = (session_id, kind, digest)
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(key)
+            if job is not None and job.status != FAILED:
+                return job
+            job = self._jobs[key] = Job(key, params)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, session_id, kind, digest):
+        with self._lock:
+            return self._jobs.get((session_id, kind, digest))
+
+    def queue_position(self, job):
+        """Number of queued jobs submitted before ``job``."""
+        with self._lock:
+            return sum(j.status == QUEUED and j.submitted < job.submitted for j in self._jobs.values())
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for key in [k for k, j in self._jobs.items() if j.finished and j.finished < cutoff]:
+            del self._jobs[key]
@@ -0,0 +1,413 @@
+"""Party-name matching engine for the Reconciliation tab.
+
+Names are normalised once, exactly the way ``fuzzywuzzy`` preprocesses them,
+and scored with ``rapidfuzz``'s ``token_set_ratio``, rounded the same way, so
+scores are identical to ``fuzz.token_set_ratio`` on the raw names.
+
+Small reconciliations are scored exhaustively, a block of books rows at a time
+against the whole 26AS side. Large ones go through an inverted index over the
+26AS side, built from whole tokens and character trigrams. Each books party
+is only scored against the 26AS names that share the most (IDF-weighted) keys
+with it, plus the 26AS names made up (almost) entirely of its tokens, which
+``token_set_ratio`` rewards however little else they share. All surviving
+pairs are scored in one vectorised batch.
+
+``best_matches`` lets several books parties take the same 26AS name, as the
+original loop did. ``one_to_one_matches`` instead keeps each party's top few
+candidates as a sparse graph and solves a global one-to-one assignment on it.
+
+In one-to-one mode, a books party whose normalised name is identical to a
+26AS name is paired with it first (``exact_pairs``) and never scored: the
+assignment would otherwise be free to give its row away for two weaker
+pairs. ``best_matches`` keeps the original loop's tie-break instead, so an
+earlier 26AS name made up of a subset of the tokens, also scoring 100, still
+wins over a later identical one.
+"""
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+from fuzzywuzzy import utils
+from rapidfuzz import fuzz, process
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components, min_weight_full_bipartite_matching
+
+# Up to this many pairs every books party is scored against every 26AS name.
+FULL_SCAN_PAIRS = 2_000_000
+
+# Books rows scored per block in the exhaustive scan; bounds the matrix size.
+SCAN_BLOCK = 256
+
+# Books rows looked up per sparse product against the candidate index.
+INDEX_BLOCK = 2048
+
+# How many 26AS names each books party is scored against when blocking.
+MAX_CANDIDATES = 64
+
+# Index keys held by more than this share of 26AS names ("LTD", "PVT",
+# common trigrams) carry no signal; they are only used when a name has
+# nothing rarer to go on.
+MAX_KEY_SHARE = 0.2
+
+# Candidates must share at least this fraction of the key weight of the
+# query's best-overlapping name.
+MIN_OVERLAP = 0.4
+
+# Token subsets are enumerated for the token-overlap lookup up to this many
+# tokens, and this many names are kept per "all tokens but one" bucket.
+MAX_SUBSET_TOKENS = 10
+NEAR_SUBSET_CANDIDATES = 3
+
+# One-to-one mode: candidate 26AS names kept per books party, and the graph
+# size (edges) from which components are solved on a process pool.
+TOP_K = 5
+PARALLEL_EDGES = 200_000
+
+
+def normalise(name):
+    """Preprocess a party name exactly as ``fuzz.token_set_ratio`` does.
+
+    fuzzywuzzy's scorers strip non-ASCII characters (``force_ascii``) before
+    comparing, so 'ÉCOLE' and 'ECOLE' score as they did in the original loop.
+    """
+    return utils.full_process(str(name).upper(), force_ascii=True)
+
+
+def _keys(norm):
+    # Whole tokens, plus trigrams of each token padded with word boundaries
+    # so that a typo in a short word still leaves its first and last letters
+    # to match on. '#' cannot occur in a normalised name.
+    keys = set()
+    for token in norm.split():
+        keys.add(token)
+        padded = '#' + token + '#'
+        for k in range(len(padded) - 2):
+            keys.add('#' + padded[k:k + 3])
+    return keys
+
+
+class PartyIndex:
+    """Inverted index of token and trigram keys over normalised names.
+
+    Stored as a sparse key x name incidence matrix, so a whole batch of
+    queries is matched against the index with one sparse product.
+    """
+
+    def __init__(self, norms):
+        self.size = len(norms)
+        self.key_ids = {}
+        self.first_by_tokens = {}
+        self.by_tokens_but_one = defaultdict(list)
+        rows, cols = [], []
+        for i, norm in enumerate(norms):
+            for key in _keys(norm):
+                rows.append(self.key_ids.setdefault(key, len(self.key_ids)))
+                cols.append(i)
+            tokens = frozenset(norm.split())
+            self.first_by_tokens.setdefault(tokens, i)
+            if len(tokens) > 1:
+                for token in tokens:
+                    self.by_tokens_but_one[tokens - {token}].append((len(token), i))
+        for key, entries in self.by_tokens_but_one.items():
+            self.by_tokens_but_one[key] = sorted(entries)[:NEAR_SUBSET_CANDIDATES]
+
+        data = np.ones(len(rows), dtype=np.float64)
+        self.incidence = sparse.csr_matrix((data, (rows, cols)), shape=(len(self.key_ids), self.size))
+        self.df = np.diff(self.incidence.indptr)
+        self.idf = np.log1p(self.size / np.maximum(self.df, 1))
+        self.max_postings = max(1, int(self.size * MAX_KEY_SHARE))
+
+    def postings(self, key_id):
+        start, end = self.incidence.indptr[key_id], self.incidence.indptr[key_id + 1]
+        return self.incidence.indices[start:end]
+
+    def query_matrix(self, norms):
+        """IDF-weighted query x key matrix over each name's informative keys."""
+        rows, cols = [], []
+        for r, norm in enumerate(norms):
+            ids = [self.key_ids[k] for k in _keys(norm) if k in self.key_ids]
+            if not ids: continue
+            rare = [k for k in ids if self.df[k] <= self.max_postings]
+            if not rare:
+                rare = [min(ids, key=lambda k: self.df[k])]
+            rows.extend([r] * len(rare))
+            cols.extend(rare)
+        cols = np.array(cols, dtype=np.int64)
+        return sparse.csr_matrix((self.idf[cols], (rows, cols)), shape=(len(norms), len(self.key_ids)))
+
+    def candidates(self, norms, limit=MAX_CANDIDATES):
+        """Flat ``(query, name)`` position arrays: for each query, the names
+        sharing the most key weight with it, at most ``limit`` of them."""
+        shared = (self.query_matrix(norms) @ self.incidence).tocsr()
+        shared.eliminate_zeros()
+        q_idx = np.repeat(np.arange(len(norms)), np.diff(shared.indptr))
+        c_idx, weight = shared.indices, shared.data
+
+        # Names sharing only a sliver of the best overlap cannot be the best
+        # match; dropping them first keeps the sort below small.
+        row_max = np.zeros(len(norms))
+        np.maximum.at(row_max, q_idx, weight)
+        close = weight >= MIN_OVERLAP * row_max[q_idx]
+        q_idx, c_idx, weight = q_idx[close], c_idx[close], weight[close]
+
+        order = np.lexsort((-weight, q_idx))
+        starts = np.searchsorted(q_idx[order], q_idx[order], side='left')
+        keep = order[np.arange(len(order)) - starts < limit]
+        return q_idx[keep], c_idx[keep].astype(np.int64)
+
+    def token_overlaps(self, norm):
+        """Names made up (almost) entirely of ``norm``'s tokens, or vice versa.
+
+        ``token_set_ratio`` scores a name whose tokens are all in the query
+        (or the other way round) 100, and one with a single extra token
+        ``2s / (2s + 1 + len(extra))`` for shared text length ``s``, however
+        little else the names have in common. Such names need not share any
+        rare key with the query, so they are looked up directly: the earliest
+        full subset / superset, and the shortest-extra names per token subset.
+        """
+        tokens = set(norm.split())
+        found = []
+
+        # Supersets: names holding every token of the query.
+        if all(t in self.key_ids for t in tokens):
+            ids = sorted((self.key_ids[t] for t in tokens), key=lambda k: self.df[k])
+            common = self.postings(ids[0])
+            for k in ids[1:]:
+                if not len(common): break
+                common = np.intersect1d(common, self.postings(k), assume_unique=True)
+            if len(common): found.append(int(common.min()))
+
+        # Subsets, exact or with one extra token.
+        if len(tokens) <= MAX_SUBSET_TOKENS:
+            for r in range(1, len(tokens) + 1):
+                for subset in combinations(tokens, r):
+                    subset = frozenset(subset)
+                    i = self.first_by_tokens.get(subset)
+                    if i is not None: found.append(i)
+                    found.extend(i for _, i in self.by_tokens_but_one.get(subset, ()))
+        return found
+
+
+def _best_in_block(q_idx, c_idx, scores, threshold):
+    """Best 26AS position per books position over a flat list of scored pairs.
+
+    Highest score wins and ties go to the earliest 26AS row, as in a scan.
+    """
+    keep = scores >= threshold
+    q_idx, c_idx, scores = q_idx[keep], c_idx[keep], scores[keep]
+    order = np.lexsort((c_idx, -scores, q_idx))
+    q_idx, c_idx = q_idx[order], c_idx[order]
+    first = np.ones(len(q_idx), dtype=bool)
+    first[1:] = q_idx[1:] != q_idx[:-1]
+    return {int(b): int(a) for b, a in zip(q_idx[first], c_idx[first])}
+
+
+def _scan(q_norm, c_norm, threshold):
+    matched = {}
+    for start in range(0, len(q_norm), SCAN_BLOCK):
+        block = q_norm[start:start + SCAN_BLOCK]
+        matrix = np.rint(process.cdist(block, c_norm, scorer=fuzz.token_set_ratio, dtype=np.float64, workers=-1))
+        best = matrix.argmax(axis=1)
+        best_score = matrix[np.arange(len(block)), best]
+        for offset, (a, score) in enumerate(zip(best, best_score)):
+            if score >= threshold and block[offset]:
+                matched[start + offset] = int(a)
+    return matched
+
+
+def _blocked_pairs(q_norm, c_norm, max_candidates):
+    """Every candidate pair from the index, scored: ``(q_idx, c_idx, scores)``."""
+    index = PartyIndex(c_norm)
+    q_idx, c_idx = [], []
+    for start in range(0, len(q_norm), INDEX_BLOCK):
+        block = q_norm[start:start + INDEX_BLOCK]
+        q, c = index.candidates(block, max_candidates)
+        q_idx.append(q + start)
+        c_idx.append(c)
+    for b, norm in enumerate(q_norm):
+        overlaps = index.token_overlaps(norm) if norm else None
+        if overlaps:
+            q_idx.append(np.full(len(overlaps), b, dtype=np.int64))
+            c_idx.append(np.array(overlaps, dtype=np.int64))
+    q_idx = np.concatenate(q_idx)
+    c_idx = np.concatenate(c_idx)
+
+    # The same name can come from both the key index and the token lookup.
+    pair = np.unique(q_idx * len(c_norm) + c_idx)
+    q_idx, c_idx = pair // len(c_norm), pair % len(c_norm)
+
+    scores = np.rint(process.cpdist([q_norm[i] for i in q_idx], [c_norm[i] for i in c_idx],
+                                    scorer=fuzz.token_set_ratio, dtype=np.float64, workers=-1))
+    return q_idx, c_idx, scores
+
+
+def _exact_pairs(q_norm, c_norm, unique):
+    rows = defaultdict(list)
+    for j, norm in enumerate(c_norm):
+        if norm: rows[norm].append(j)
+    pairs, taken = {}, defaultdict(int)
+    for i, norm in enumerate(q_norm):
+        found = rows.get(norm)
+        if not found: continue
+        n = taken[norm] if unique else 0
+        if n < len(found):
+            pairs[i] = found[n]
+            taken[norm] += 1
+    return pairs
+
+
+def exact_pairs(books_names, as26_names, unique=False):
+    """Map books positions to the 26AS position with the identical normalised name.
+
+    Every books party of a name takes the first 26AS row of that name; with
+    ``unique``, the n-th books party takes the n-th row, and is left out
+    when there are fewer rows.
+    """
+    return _exact_pairs([normalise(n) for n in books_names], [normalise(n) for n in as26_names], unique)
+
+
+def best_matches(books_names, as26_names, threshold, max_candidates=MAX_CANDIDATES):
+    """Map each books position to the position of its best 26AS name.
+
+    Same semantics as scanning every 26AS name with ``fuzz.token_set_ratio``:
+    the highest score wins, ties go to the earliest 26AS name, and only
+    scores of at least ``threshold`` count as a match. Above
+    ``FULL_SCAN_PAIRS`` the candidate index is used: perfect (100) matches are
+    always found, and any other 26AS name is only scored if it shares enough
+    rare tokens or trigrams with the books name, or differs from a subset of
+    its tokens by one word.
+    """
+    q_norm = [normalise(n) for n in books_names]
+    c_norm = [normalise(n) for n in as26_names]
+    if not q_norm or not c_norm: return {}
+
+    if len(q_norm) * len(c_norm) <= FULL_SCAN_PAIRS:
+        return _scan(q_norm, c_norm, threshold)
+    return _best_in_block(*_blocked_pairs(q_norm, c_norm, max_candidates), threshold)
+
+
+# ------------------------------------------
+# One-to-one assignment
+# ------------------------------------------
+
+def _scan_edges(q_norm, c_norm, threshold, top_k):
+    q_idx, c_idx, scores = [], [], []
+    k = min(top_k, len(c_norm))
+    for start in range(0, len(q_norm), SCAN_BLOCK):
+        block = q_norm[start:start + SCAN_BLOCK]
+        matrix = np.rint(process.cdist(block, c_norm, scorer=fuzz.token_set_ratio, dtype=np.float64, workers=-1))
+        top = np.argpartition(-matrix, k - 1, axis=1)[:, :k]
+        q_idx.append(np.repeat(np.arange(start, start + len(block)), k))
+        c_idx.append(top.ravel())
+        scores.append(np.take_along_axis(matrix, top, axis=1).ravel())
+    q_idx, c_idx, scores = np.concatenate(q_idx), np.concatenate(c_idx), np.concatenate(scores)
+    keep = scores >= threshold
+    return q_idx[keep], c_idx[keep].astype(np.int64), scores[keep]
+
+
+def _top_k(q_idx, c_idx, scores, threshold, top_k):
+    keep = scores >= threshold
+    q_idx, c_idx, scores = q_idx[keep], c_idx[keep], scores[keep]
+    order = np.lexsort((c_idx, -scores, q_idx))
+    q_sorted = q_idx[order]
+    rank = np.arange(len(order)) - np.searchsorted(q_sorted, q_sorted, side='left')
+    order = order[rank < top_k]
+    return q_idx[order], c_idx[order], scores[order]
+
+
+def match_graph(books_names, as26_names, threshold, top_k=TOP_K, max_candidates=MAX_CANDIDATES):
+    """Sparse match graph: each books party's ``top_k`` 26AS names scoring at
+    least ``threshold``, as flat ``(books_idx, as26_idx, score)`` arrays."""
+    q_norm = [normalise(n) for n in books_names]
+    c_norm = [normalise(n) for n in as26_names]
+    empty = np.empty(0, dtype=np.int64)
+    if not q_norm or not c_norm: return empty, empty, np.empty(0)
+
+    if len(q_norm) * len(c_norm) <= FULL_SCAN_PAIRS:
+        q_idx, c_idx, scores = _scan_edges(q_norm, c_norm, threshold, top_k)
+    else:
+        q_idx, c_idx, scores = _top_k(*_blocked_pairs(q_norm, c_norm, max_candidates), threshold, top_k)
+    valid = np.array([bool(n) for n in q_norm], dtype=bool)[q_idx]
+    return q_idx[valid], c_idx[valid], scores[valid]
+
+
+def _solve_component(rows, cols, scores):
+    """Maximum-score one-to-one assignment within one connected component.
+
+    Every books row gets a private "unmatched" column so a full matching
+    always exists; costs are ``101 - score`` for real edges and 101 for
+    staying unmatched, so minimising cost maximises the total matched score.
+    """
+    row_ids, r = np.unique(rows, return_inverse=True)
+    col_ids, c = np.unique(cols, return_inverse=True)
+    n_rows, n_cols = len(row_ids), len(col_ids)
+    dummy = np.arange(n_rows)
+    costs = sparse.csr_matrix(
+        (np.concatenate([101 - scores, np.full(n_rows, 101.0)]),
+         (np.concatenate([r, dummy]), np.concatenate([c, n_cols + dummy]))),
+        shape=(n_rows, n_cols + n_rows))
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(costs)
+    real = matched_cols < n_cols
+    return [(int(row_ids[a]), int(col_ids[b])) for a, b in zip(matched_rows[real], matched_cols[real])]
+
+
+def _solve_components(components):
+    pairs = []
+    for rows, cols, scores in components:
+        pairs.extend(_solve_component(rows, cols, scores))
+    return pairs
+
+
+def _chunks(components, n):
+    # Deal components out largest-first so chunks carry similar edge counts.
+    chunks = [[] for _ in range(n)]
+    sizes = [0] * n
+    for comp in sorted(components, key=lambda c: -len(c[0])):
+        k = sizes.index(min(sizes))
+        chunks[k].append(comp)
+        sizes[k] += len(comp[0])
+    return [c for c in chunks if c]
+
+
+def one_to_one_matches(books_names, as26_names, threshold, top_k=TOP_K, workers=None):
+    """Map books positions to 26AS positions, each 26AS name used at most once.
+
+    Identical names are paired first (``exact_pairs``). For the rest, keeps
+    the ``top_k`` candidates per books party as a sparse bipartite graph,
+    splits it into connected components and solves a maximum total score
+    assignment on each, in parallel for large graphs. No dense books x 26AS
+    matrix is ever built.
+    """
+    exact = exact_pairs(books_names, as26_names, unique=True)
+    taken = set(exact.values())
+    books_left = [i for i in range(len(books_names)) if i not in exact]
+    as26_left = [j for j in range(len(as26_names)) if j not in taken]
+    found = _assign([books_names[i] for i in books_left], [as26_names[j] for j in as26_left],
+                    threshold, top_k, workers)
+    return dict(sorted({**exact, **{books_left[i]: as26_left[j] for i, j in found.items()}}.items()))
+
+
+def _assign(books_names, as26_names, threshold, top_k, workers):
+    # The assignment over the sparse top-k graph, as positions into the lists given.
+    q_idx, c_idx, scores = match_graph(books_names, as26_names, threshold, top_k)
+    if not len(q_idx): return {}
+
+    n_books = len(books_names)
+    graph = sparse.csr_matrix((np.ones(len(q_idx)), (q_idx, n_books + c_idx)),
+                              shape=(n_books + len(as26_names),) * 2)
+    _, labels = connected_components(graph, directed=False)
+
+    edge_label = labels[q_idx]
+    order = np.argsort(edge_label, kind='stable')
+    bounds = np.flatnonzero(np.diff(edge_label[order])) + 1
+    components = [(q_idx[part], c_idx[part], scores[part]) for part in np.split(order, bounds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(q_idx) < PARALLEL_EDGES:
+        pairs = _solve_components(components)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pairs = [p for chunk in pool.map(_solve_components, _chunks(components, workers)) for p in chunk]
+    return dict(sorted(pairs))
@@ -0,0 +1,311 @@
+"""Per-stage timing and resource metrics for the 26AS tools.
+
+A ``Run`` wraps one use of a tool (a conversion, a ledger summary, a
+reconciliation). Code inside it marks its stages with ``run.stage(name)``;
+each stage records wall time, CPU time of the calling thread, the process's
+peak RSS and how much the stage raised it, plus any counts it reports
+(pages, rows, parties), from which throughput is derived.
+
+Stages may nest and may be entered many times (once per page, say); a stage
+is charged only its own time, with time spent in stages nested inside it
+going to those, so the stage times of a run add up to at most its wall time.
+
+When a run finishes it is appended as one JSON line to ``AS26_METRICS_LOG``
+(which is rotated to ``<log>.1`` once it reaches ``AS26_METRICS_LOG_MB``),
+logged on the ``as26.metrics`` logger, and folded into process-wide totals
+that are written in the Prometheus text format to ``AS26_METRICS_PROM`` (for
+a node_exporter textfile collector) and, when ``AS26_METRICS_PORT`` is set,
+served at ``/metrics`` on that port.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_LOG = os.environ.get('AS26_METRICS_LOG', os.path.join(tempfile.gettempdir(), 'ai-tools-26as-metrics.jsonl'))
+# Size at which the log is moved to <log>.1 (replacing the previous one); 0 never rotates.
+METRICS_LOG_MB = float(os.environ.get('AS26_METRICS_LOG_MB', 20))
+METRICS_PROM = os.environ.get('AS26_METRICS_PROM', os.path.join(tempfile.gettempdir(), 'ai-tools-26as.prom'))
+METRICS_PORT = int(os.environ.get('AS26_METRICS_PORT', 0))
+
+logger = logging.getLogger('as26.metrics')
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory, in MB."""
+    if resource is None: return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _round(mb):
+    return None if mb is None else round(mb, 1)
+
+
+class Stage:
+    """Accumulated measurements of one named stage within a run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = None
+        self.rss_growth_mb = 0.0
+        self.counts = {}
+
+    def count(self, **counts):
+        """Add to this stage's counts, e.g. ``stage.count(pages=1)``."""
+        for unit, n in counts.items():
+            self.counts[unit] = self.counts.get(unit, 0) + n
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'seconds': round(self.seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_rss_mb': _round(self.peak_rss_mb),
+            'rss_growth_mb': round(self.rss_growth_mb, 1),
+            'counts': dict(self.counts),
+            'throughput': {f'{unit}_per_s': round(n / self.seconds, 1)
+                           for unit, n in self.counts.items() if self.seconds > 0},
+        }
+
+
+class Run:
+    """Stage measurements for one run of a tool."""
+
+    def __init__(self, tool, **labels):
+        self.tool = tool
+        self.labels = labels
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.stages = {}
+        self.seconds = None
+        self.status = None
+        self._start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._open = []  # [stage, child wall, child cpu] of the stages being timed
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """Time the ``with`` block as stage ``name``; yields the ``Stage``."""
+        stage = self.stages.get(name) or self.stages.setdefault(name, Stage(name))
+        stage.count(**counts)
+        frame = [stage, 0.0, 0.0]
+        self._open.append(frame)
+        rss_before = peak_rss_mb()
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield stage
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+            self._open.pop()
+            stage.calls += 1
+            stage.seconds += wall - frame[1]
+            stage.cpu_seconds += cpu - frame[2]
+            rss = peak_rss_mb()
+            if rss is not None:
+                stage.peak_rss_mb = rss
+                stage.rss_growth_mb += rss - rss_before
+            if self._open:
+                self._open[-1][1] += wall
+                self._open[-1][2] += cpu
+
+    def iterate(self, name, iterable, unit=None):
+        """Yield from ``iterable``, timing each step as stage ``name``.
+
+        With ``unit``, the length of every item is added to that count
+        (e.g. rows for DataFrame chunks).
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as stage:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                if unit: stage.count(**{unit: len(item)})
+            yield item
+
+    def finish(self, status='ok'):
+        """Close the run and publish it (log line and Prometheus totals)."""
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self._start
+            self.cpu_seconds = time.thread_time() - self._cpu_start
+            self.status = status
+            publish(self)
+        return self
+
+    def to_dict(self):
+        return {
+            'run': self.id,
+            'tool': self.tool,
+            'status': self.status,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'seconds': None if self.seconds is None else round(self.seconds, 4),
+            'cpu_seconds': None if self.seconds is None else round(self.cpu_seconds, 4),
+            'peak_rss_mb': _round(peak_rss_mb()),
+            **self.labels,
+            'stages': [s.to_dict() for s in self.stages.values()],
+        }
+
+
+class NullRun:
+    """Stands in for a ``Run`` when nothing is being measured."""
+
+    class _Stage:
+        def count(self, **counts):
+            pass
+
+    _stage = _Stage()
+
+    @contextmanager
+    def stage(self, name, **counts):
+        yield self._stage
+
+    def iterate(self, name, iterable, unit=None):
+        return iterable
+
+
+NO_METRICS = NullRun()
+
+
+@contextmanager
+def measured(tool, **labels):
+    """Run the block as a ``Run`` of ``tool``, published when it ends."""
+    run = Run(tool, **labels)
+    try:
+        yield run
+    except BaseException:
+        run.finish('error')
+        raise
+    run.finish()
+
+
+# --- Process-wide totals, exported in the Prometheus text format ---
+
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_totals = {}  # (metric, labels) -> value
+
+
+def _add(metric, labels, value, replace=False):
+    key = (metric, tuple(sorted(labels.items())))
+    _totals[key] = value if replace else _totals.get(key, 0) + value
+
+
+def publish(run):
+    """Append ``run`` to the metrics log and fold it into the totals."""
+    record = run.to_dict()
+    line = json.dumps(record)
+    logger.info(line)
+    with _lock:
+        try:
+            _rotate_log()
+            with open(METRICS_LOG, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            logger.warning("Could not write metrics log %s: %s", METRICS_LOG, e)
+
+        tool = {'tool': run.tool}
+        _add('as26_runs_total', {**tool, 'status': run.status}, 1)
+        _add('as26_run_seconds_total', tool, run.seconds)
+        for stage in run.stages.values():
+            labels = {**tool, 'stage': stage.name}
+            _add('as26_stage_seconds_total', labels, stage.seconds)
+            _add('as26_stage_cpu_seconds_total', labels, stage.cpu_seconds)
+            _add('as26_stage_calls_total', labels, stage.calls)
+            _add('as26_stage_last_seconds', labels, stage.seconds, replace=True)
+            for unit, n in stage.counts.items():
+                _add('as26_stage_items_total', {**labels, 'unit': unit}, n)
+        if record['peak_rss_mb'] is not None:
+            _add('as26_process_peak_rss_bytes', {}, record['peak_rss_mb'] * 1024 * 1024, replace=True)
+    _write_prom()
+
+
+def _rotate_log():
+    # At most two files: the current log, and the previous one as <log>.1.
+    if not METRICS_LOG_MB: return
+    try:
+        full = os.path.getsize(METRICS_LOG) >= METRICS_LOG_MB * 1024 * 1024
+    except FileNotFoundError:
+        return
+    if full: os.replace(METRICS_LOG, METRICS_LOG + '.1')
+
+
+HELP = {
+    'as26_runs_total': ('counter', 'Tool runs, by outcome.'),
+    'as26_run_seconds_total': ('counter', 'Wall time spent in tool runs.'),
+    'as26_stage_seconds_total': ('counter', 'Wall time spent in each stage (own time, nested stages excluded).'),
+    'as26_stage_cpu_seconds_total': ('counter', 'CPU time of the running thread in each stage.'),
+    'as26_stage_calls_total': ('counter', 'Times each stage was entered.'),
+    'as26_stage_last_seconds': ('gauge', 'Wall time of each stage in the latest run.'),
+    'as26_stage_items_total': ('counter', 'Pages, rows or parties processed by each stage.'),
+    'as26_process_peak_rss_bytes': ('gauge', 'Peak resident memory of the server process.'),
+}
+
+
+def render_prometheus():
+    """Current totals in the Prometheus text exposition format."""
+    with _lock:
+        items = sorted(_totals.items())
+    lines = []
+    for metric, (kind, text) in HELP.items():
+        samples = [(labels, value) for (name, labels), value in items if name == metric]
+        if not samples: continue
+        lines += [f'# HELP {metric} {text}', f'# TYPE {metric} {kind}']
+        for labels, value in samples:
+            label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f'{metric}{{{label_text}}} {value:.6g}' if label_text else f'{metric} {value:.6g}')
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_prom():
+    # Rendered inside the write lock, so the last file written has the latest totals
+    with _write_lock:
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(METRICS_PROM) or '.', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(render_prometheus())
+            os.replace(tmp, METRICS_PROM)
+        except OSError as e:
+            logger.warning("Could not write Prometheus metrics %s: %s", METRICS_PROM, e)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=None):
+    """Serve ``/metrics`` on ``port`` (default ``AS26_METRICS_PORT``) from a daemon thread."""
+    server = ThreadingHTTPServer(('127.0.0.1', port or METRICS_PORT), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='as26-metrics', daemon=True).start()
+    return server
@@ -0,0 +1,175 @@
+"""Parallel OCR engine for 26AS pages.
+
+Pages are OCR'd on a process pool sized to the machine. With
+``AS26_ROI_OCR=1`` each page is first preprocessed (see ``ocr_preprocess``)
+and only its text region is read, with Tesseract's word boxes turned back
+into rows. Results are yielded in page order as soon as a page (and every
+page before it) is finished, so the caller can drive a progress bar while
+the rest of the document is still being processed. Only a bounded window
+of pages is in flight at any time, so images can be produced lazily and
+memory does not grow with the page count.
+
+Tesseract is reached through an engine, chosen with ``AS26_OCR_BACKEND``:
+
+- ``pytesseract`` (the default): every page is written to a temp file and a
+  new ``tesseract`` process is started for it, which loads the language
+  model again before reading the page;
+- ``tesserocr``: Tesseract's C++ API in the worker process itself
+  (``pip install tesserocr``, built against libtesseract). Each worker
+  creates its engine on its first page and keeps it, so the model is loaded
+  once per worker and every later page is handed over in memory.
+
+Both read pages with the same ``OCR_CONFIG``, so they give the same text.
+"""
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pytesseract
+
+from ocr_preprocess import lines_from_words, prepare_page
+
+OCR_CONFIG = '--psm 4'
+OCR_LANG = 'eng'
+
+OCR_BACKEND = os.environ.get('AS26_OCR_BACKEND', 'pytesseract')
+
+# OCR worker processes; 0 (the default) means one per CPU.
+OCR_WORKERS = int(os.environ.get('AS26_OCR_WORKERS', 0))
+
+# Set AS26_ROI_OCR=1 to preprocess pages (ocr_preprocess) and read their
+# text region as word boxes instead of OCRing whole pages with
+# image_to_string. Off until it is shown to read statements as accurately.
+ROI_OCR = os.environ.get('AS26_ROI_OCR', '0') == '1'
+
+
+def default_workers():
+    return OCR_WORKERS or max(1, os.cpu_count() or 1)
+
+
+def _init_worker():
+    # Each worker already owns a core; stop tesseract from spawning its own
+    # OpenMP threads on top of that and oversubscribing the machine.
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+class PytesseractEngine:
+    """Tesseract through pytesseract: one ``tesseract`` process per page."""
+
+    def __init__(self, config=OCR_CONFIG, lang=OCR_LANG):
+        self.config = config
+        self.lang = lang
+
+    def text(self, image):
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.config)
+
+    def words(self, image):
+        """Word boxes in ``pytesseract.image_to_data``'s ``Output.DICT`` form."""
+        return pytesseract.image_to_data(image, lang=self.lang, config=self.config,
+                                         output_type=pytesseract.Output.DICT)
+
+
+class TesserocrEngine:
+    """Tesseract in this process through tesserocr; the model stays loaded between pages.
+
+    Takes the ``--psm`` and ``-c name=value`` options of a tesseract
+    command line as ``config``. Not thread-safe: use one engine per thread.
+    """
+
+    def __init__(self, config=OCR_CONFIG, lang=OCR_LANG):
+        import tesserocr
+
+        self._level = tesserocr.RIL.WORD
+        self._iterate = tesserocr.iterate_level
+        psm = re.search(r'--psm\s+(\d+)', config)
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=int(psm.group(1)) if psm else tesserocr.PSM.AUTO)
+        for name, value in re.findall(r'-c\s+(\w+)=(\S+)', config):
+            self.api.SetVariable(name, value)
+
+    def text(self, image):
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def words(self, image):
+        """Word boxes in ``pytesseract.image_to_data``'s ``Output.DICT`` form (the fields ``lines_from_words`` reads)."""
+        self.api.SetImage(image)
+        self.api.Recognize()
+        data = {'left': [], 'top': [], 'width': [], 'height': [], 'conf': [], 'text': []}
+        for word in self._iterate(self.api.GetIterator(), self._level):
+            box = word.BoundingBox(self._level)
+            if box is None: continue
+            left, top, right, bottom = box
+            data['left'].append(left)
+            data['top'].append(top)
+            data['width'].append(right - left)
+            data['height'].append(bottom - top)
+            data['conf'].append(word.Confidence(self._level))
+            data['text'].append(word.GetUTF8Text(self._level))
+        return data
+
+
+OCR_BACKENDS = {'pytesseract': PytesseractEngine, 'tesserocr': TesserocrEngine}
+
+# Engines made in this process, one per thread, backend and config; a pool
+# worker keeps its engine (and the loaded model) for as long as it lives.
+_local = threading.local()
+
+
+def engine(backend=OCR_BACKEND, config=OCR_CONFIG):
+    """This thread's long-lived OCR engine for ``backend`` (a key of ``OCR_BACKENDS``)."""
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend {backend!r}; expected one of {', '.join(OCR_BACKENDS)}")
+    engines = getattr(_local, 'engines', None)
+    if engines is None:
+        engines = _local.engines = {}
+    if (backend, config) not in engines:
+        engines[backend, config] = OCR_BACKENDS[backend](config)
+    return engines[backend, config]
+
+
+def _ocr_image(image, config, backend=OCR_BACKEND):
+    ocr = engine(backend, config)
+    if not ROI_OCR:
+        return ocr.text(image)
+    region = prepare_page(image)
+    if region is None:
+        return ''
+    return '\n'.join(lines_from_words(ocr.words(region)))
+
+
+def ocr_pool(workers=None):
+    """Create an OCR process pool. The caller is responsible for shutting it down."""
+    return ProcessPoolExecutor(max_workers=workers or default_workers(), initializer=_init_worker)
+
+
+def submit_page(pool, image, config=OCR_CONFIG, backend=OCR_BACKEND):
+    """Queue one page image on ``pool`` and return its future."""
+    return pool.submit(_ocr_image, image, config, backend)
+
+
+def ocr_images(images, workers=None, config=OCR_CONFIG, window=None, backend=OCR_BACKEND):
+    """Yield ``(page_index, text)`` for every image, in page order.
+
+    ``images`` may be a lazy iterable; at most ``window`` images (default two
+    per worker) are pulled from it ahead of the page being yielded.
+    """
+    workers = workers or default_workers()
+
+    if workers == 1:
+        for i, image in enumerate(images):
+            yield i, _ocr_image(image, config, backend)
+        return
+
+    window = window or workers * 2
+    pending = deque()
+    with ocr_pool(workers) as pool:
+        for i, image in enumerate(images):
+            if len(pending) >= window:
+                j, future = pending.popleft()
+                yield j, future.result()
+            pending.append((i, submit_page(pool, image, config, backend)))
+        while pending:
+            j, future = pending.popleft()
+            yield j, future.result()
@@ -0,0 +1,294 @@
+"""Page text extraction for 26AS PDFs.
+
+Statements downloaded from TRACES are digitally generated and carry a real
+text layer, which pdfplumber reads in milliseconds with none of Tesseract's
+digit misreads. Only pages without a usable text layer (scans, photographed
+copies) are rasterised and sent through the OCR engine.
+
+Pages are streamed: each scanned page is rendered on its own, handed to the
+OCR pool and dropped, with the number of rendered pages in flight capped by a
+memory ceiling. Results come back in page order, so rows from the first pages
+are available long before the last page has been rendered.
+
+When a ``ResultCache`` is passed in, parsed rows are cached per document and
+OCR text per rendered page, so repeat uploads skip the work entirely.
+
+``extract_table`` gives the deductor table (one row per party);
+``extract_statement`` reads the same pages once for both that table and every
+transaction line under the deductors, for the transaction store.
+"""
+import io
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import Future
+from contextlib import ExitStack, contextmanager
+
+import pandas as pd
+import pdfplumber
+from pdf2image import convert_from_path
+
+from metrics import NO_METRICS
+from ocr_engine import OCR_BACKEND, OCR_CONFIG, ROI_OCR, default_workers, ocr_pool, submit_page
+from ocr_preprocess import PREPROCESS_VERSION
+from result_cache import digest_bytes, digest_image, digest_pdf
+from tan_parser import PARSER_VERSION, TRANSACTION_COLUMNS, TransactionParser, parse_lines
+
+# A page with less extractable text than this is treated as a scan.
+MIN_TEXT_CHARS = 50
+
+# Scanned pages are rendered at the resolution of the scan inside them,
+# kept within these bounds; pages with no embedded image use RENDER_DPI.
+RENDER_DPI = 200
+MIN_RENDER_DPI = 150
+MAX_RENDER_DPI = 300
+
+# Upper bound for rendered page images held at once (main process plus the
+# copies pickled to OCR workers). Override with AS26_OCR_MAX_MEMORY_MB.
+MAX_MEMORY_MB = int(os.environ.get('AS26_OCR_MAX_MEMORY_MB', 512))
+
+# A rendered page exists roughly three times while in flight: the PIL image,
+# its pickled copy on the pool's queue and the unpickled copy in the worker.
+_COPIES_IN_FLIGHT = 3
+
+
+def _open(pdf):
+    if isinstance(pdf, (bytes, bytearray)):
+        return pdfplumber.open(io.BytesIO(pdf))
+    return pdfplumber.open(pdf)
+
+
+@contextmanager
+def _as_path(pdf):
+    """Yield a file path for ``pdf``, spooling bytes to a temp file once.
+
+    poppler needs a file; rendering page by page from bytes would otherwise
+    rewrite the whole PDF to disk for every page.
+    """
+    if not isinstance(pdf, (bytes, bytearray)):
+        yield pdf
+        return
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def render_dpi(page):
+    """DPI to render a scanned page at: that of its scan, within bounds.
+
+    Rendering above the scan's own resolution only adds interpolated pixels
+    for Tesseract to wade through; rendering below it loses detail.
+    """
+    images = [im for im in page.images if im.get('srcsize') and im['width'] > 0]
+    if not images:
+        return RENDER_DPI
+    scan = max(images, key=lambda im: im['width'] * im['height'])
+    if scan['width'] * scan['height'] < 0.5 * page.width * page.height:
+        return RENDER_DPI  # a logo or stamp, not a scanned page
+    native = scan['srcsize'][0] * 72 / scan['width']
+    return int(min(max(native, MIN_RENDER_DPI), MAX_RENDER_DPI))
+
+
+def _page_window(page, workers, max_memory_mb, dpi=RENDER_DPI):
+    """How many rendered pages like ``page`` fit under the memory ceiling."""
+    scale = dpi / 72
+    page_bytes = int(page.width * scale) * int(page.height * scale) * 3
+    budget = max_memory_mb * 1024 * 1024 // (page_bytes * _COPIES_IN_FLIGHT)
+    return max(1, min(workers * 2, budget))
+
+
+def cache_version():
+    """Short key covering every setting that changes extraction output."""
+    return digest_bytes(PARSER_VERSION, OCR_BACKEND, OCR_CONFIG, RENDER_DPI, MIN_RENDER_DPI, MAX_RENDER_DPI,
+                        MIN_TEXT_CHARS, ROI_OCR and PREPROCESS_VERSION)[:12]
+
+
+def page_count(pdf):
+    with _open(pdf) as doc:
+        return len(doc.pages)
+
+
+def text_layer(page):
+    """Return the page's text layer, or ``None`` if the page needs OCR."""
+    text = page.extract_text() or ''
+    if len(text.strip()) < MIN_TEXT_CHARS:
+        return None
+    return text
+
+
+def extract_page_texts(pdf, workers=None, max_memory_mb=None, cache=None, pool=None, metrics=None):
+    """Yield ``(page_index, text, source)`` for every page, in page order.
+
+    ``pdf`` is the PDF as bytes or a file path. ``source`` is ``'text'`` for
+    pages read from the text layer, ``'ocr'`` for scanned pages and
+    ``'cache'`` for scanned pages whose OCR text was already cached.
+
+    Scanned pages go to ``pool`` when one is passed in (an OCR pool shared
+    with other extractions, of ``workers`` processes); otherwise a pool of
+    ``workers`` processes is started for this document.
+
+    With ``metrics`` (a ``metrics.Run``), time goes to the ``text_layer``,
+    ``render``, ``page_cache`` and ``ocr`` stages; ``ocr`` is the time spent
+    waiting on the OCR workers.
+    """
+    metrics = metrics or NO_METRICS
+    workers = workers or default_workers()
+    max_memory_mb = max_memory_mb or MAX_MEMORY_MB
+    pending = deque()
+    in_flight = 0
+
+    def flush(limit):
+        # Yield finished pages off the head of the queue, blocking on the
+        # oldest OCR page while more than ``limit`` are still in flight.
+        nonlocal in_flight
+        while pending:
+            i, source, value, page_key = pending[0]
+            if isinstance(value, Future):
+                if not value.done() and in_flight <= limit:
+                    break
+                with metrics.stage('ocr', pages=1):
+                    value = value.result()
+                in_flight -= 1
+                if cache is not None: cache.put('page', page_key, value)
+            pending.popleft()
+            yield i, value, source
+
+    with ExitStack() as stack:
+        path = stack.enter_context(_as_path(pdf))
+        doc = stack.enter_context(_open(path))
+
+        for i, page in enumerate(doc.pages):
+            with metrics.stage('text_layer') as stage:
+                text = text_layer(page)
+                if text is not None: stage.count(pages=1)
+            if text is not None:
+                pending.append((i, 'text', text, None))
+                yield from flush(in_flight)
+                page.close()
+                continue
+
+            dpi = render_dpi(page)
+            with metrics.stage('render', pages=1):
+                image = convert_from_path(path, dpi=dpi, first_page=i + 1, last_page=i + 1)[0]
+            with metrics.stage('page_cache') as stage:
+                page_key = digest_image(image) if cache is not None else None
+                text = cache.get('page', page_key) if cache is not None else None
+                if text is not None: stage.count(pages=1)
+            if text is not None:
+                pending.append((i, 'cache', text, page_key))
+                yield from flush(in_flight)
+            else:
+                if pool is None:
+                    pool = stack.enter_context(ocr_pool(workers))
+                yield from flush(_page_window(page, workers, max_memory_mb, dpi) - 1)
+                pending.append((i, 'ocr', submit_page(pool, image), page_key))
+                in_flight += 1
+            del image
+            page.close()
+
+        yield from flush(-1)
+
+
+def extract_rows(pdf, workers=None, max_memory_mb=None, cache=None, pool=None, metrics=None):
+    """Yield ``(page_index, rows, source)`` with each page's parsed 26AS rows.
+
+    With a ``cache``, a document seen before is replayed from its cached rows
+    with every page reported as ``'cache'``.
+    """
+    metrics = metrics or NO_METRICS
+    doc_key = digest_pdf(pdf) if cache is not None else None
+    if cache is not None:
+        with metrics.stage('document_cache') as stage:
+            cached = cache.get('rows', doc_key)
+            if cached is not None: stage.count(pages=len(cached))
+        if cached is not None:
+            for i, rows in cached:
+                yield i, rows, 'cache'
+            return
+
+    pages = []
+    for i, text, source in extract_page_texts(pdf, workers, max_memory_mb, cache, pool, metrics):
+        with metrics.stage('parse', pages=1) as stage:
+            rows = parse_lines(text.split('\n'))
+            stage.count(rows=len(rows))
+        pages.append((i, rows))
+        yield i, rows, source
+
+    if cache is not None:
+        cache.put('rows', doc_key, pages)
+
+
+def extract_table(pdf, workers=None, max_memory_mb=None, cache=None, on_page=None, pool=None, metrics=None):
+    """Extract the 26AS deductor table as a DataFrame.
+
+    Returns ``(df, page_sources)``: one row per party (first occurrence
+    kept, sorted by name) and the number of pages read from each source.
+    ``on_page(page_index, source)`` is called as each page completes.
+    """
+    data = []
+    page_sources = {'text': 0, 'ocr': 0, 'cache': 0}
+    for i, rows, source in extract_rows(pdf, workers, max_memory_mb, cache, pool, metrics):
+        data.extend(rows)
+        page_sources[source] += 1
+        if on_page: on_page(i, source)
+
+    with (metrics or NO_METRICS).stage('tabulate', rows=len(data)):
+        df = _deductor_table(data)
+    return df, page_sources
+
+
+def _deductor_table(data):
+    df = pd.DataFrame(data)
+    if not df.empty:
+        df = df.drop_duplicates(subset=['Name of Party'], keep='first')
+        df = df.sort_values('Name of Party').reset_index(drop=True)
+    return df
+
+
+def extract_statement(pdf, workers=None, max_memory_mb=None, cache=None, on_page=None, pool=None, metrics=None):
+    """Extract the deductor table and every transaction of a statement in one pass.
+
+    Returns ``(df, transactions, assessment_year, page_sources)``: ``df`` is
+    what ``extract_table`` gives, ``transactions`` has one row per
+    transaction line in ``TRANSACTION_COLUMNS`` (dates as datetimes) and
+    ``assessment_year`` is read from the statement header (``None`` if it
+    has none). With a ``cache``, a document seen before is not read again.
+    """
+    metrics = metrics or NO_METRICS
+    page_sources = {'text': 0, 'ocr': 0, 'cache': 0}
+    doc_key = digest_pdf(pdf) if cache is not None else None
+    cached = None
+    if cache is not None:
+        with metrics.stage('document_cache') as stage:
+            cached = cache.get('statement', doc_key)
+            if cached is not None: stage.count(pages=len(cached['pages']))
+
+    if cached is not None:
+        assessment_year, pages = cached['assessment_year'], cached['pages']
+        for i, _, _ in pages:
+            page_sources['cache'] += 1
+            if on_page: on_page(i, 'cache')
+    else:
+        parser, pages = TransactionParser(), []
+        for i, text, source in extract_page_texts(pdf, workers, max_memory_mb, cache, pool, metrics):
+            with metrics.stage('parse', pages=1) as stage:
+                rows, transactions = parser.feed(text.split('\n'))
+                stage.count(rows=len(rows), transactions=len(transactions))
+            pages.append((i, rows, transactions))
+            page_sources[source] += 1
+            if on_page: on_page(i, source)
+        assessment_year = parser.assessment_year
+        if cache is not None:
+            cache.put('statement', doc_key, {'assessment_year': assessment_year, 'pages': pages})
+
+    with metrics.stage('tabulate') as stage:
+        df = _deductor_table([row for _, rows, _ in pages for row in rows])
+        transactions = pd.DataFrame([t for _, _, ts in pages for t in ts], columns=TRANSACTION_COLUMNS)
+        for column in ('Transaction Date', 'Date of Booking'):
+            transactions[column] = pd.to_datetime(transactions[column], format='%Y-%m-%d', errors='coerce')
+        stage.count(rows=len(df), transactions=len(transactions))
+    return df, transactions, assessment_year, page_sources
@@ -0,0 +1,141 @@
+"""Books vs 26AS reconciliation statement."""
+import numpy as np
+import pandas as pd
+
+from alias_index import miss_context, score
+from matching import best_matches, exact_pairs, normalise, one_to_one_matches
+from metrics import NO_METRICS
+
+COLUMNS = ['Name of Party', 'Amount in Books', 'Amount in 26AS', 'Difference']
+
+# 'best': every books party takes its best 26AS name, even one already taken.
+# 'one_to_one': each 26AS name is matched at most once, maximising the total
+# match score across all parties.
+MATCH_MODES = ('best', 'one_to_one')
+
+
+def prepare(df_books, df_26as):
+    """Name the two summary columns and drop TOTAL and blank rows.
+
+    A ``TAN`` column on the 26AS side (as ``extract_table`` gives) is kept.
+    """
+    tans = df_26as['TAN'] if 'TAN' in df_26as.columns else None
+    df_books = df_books.iloc[:, :2].copy()
+    df_26as = df_26as.drop(columns='TAN', errors='ignore').iloc[:, :2].copy()
+    df_books.columns = ['Name of Party', 'Amount in Books']
+    df_26as.columns = ['Name of Party', 'Amount in 26AS']
+    if tans is not None:
+        df_26as['TAN'] = tans
+
+    df_books = df_books[df_books['Name of Party'].str.upper() != 'TOTAL'].dropna()
+    df_26as = df_26as[df_26as['Name of Party'].str.upper() != 'TOTAL'].dropna(subset=['Name of Party', 'Amount in 26AS'])
+    return df_books.reset_index(drop=True), df_26as.reset_index(drop=True)
+
+
+def build_statement(df_books, df_26as, matched_pairs):
+    """Matched, books-only and 26AS-only rows, sorted, with a TOTAL row."""
+    b_idx = np.fromiter(matched_pairs.keys(), dtype=np.int64, count=len(matched_pairs))
+    a_idx = np.fromiter(matched_pairs.values(), dtype=np.int64, count=len(matched_pairs))
+    books_amt = df_books['Amount in Books'].to_numpy()
+    as26_amt = df_26as['Amount in 26AS'].to_numpy()
+
+    matched = pd.DataFrame({
+        'Name of Party': df_books['Name of Party'].to_numpy()[b_idx],
+        'Amount in Books': books_amt[b_idx],
+        'Amount in 26AS': as26_amt[a_idx],
+        'Difference': books_amt[b_idx] - as26_amt[a_idx]
+    })
+
+    only_books = df_books.drop(index=b_idx)
+    only_books = pd.DataFrame({
+        'Name of Party': only_books['Name of Party'],
+        'Amount in Books': only_books['Amount in Books'],
+        'Amount in 26AS': 0,
+        'Difference': only_books['Amount in Books']
+    })
+
+    only_26as = df_26as.drop(index=np.unique(a_idx))
+    only_26as = pd.DataFrame({
+        'Name of Party': only_26as['Name of Party'],
+        'Amount in Books': 0,
+        'Amount in 26AS': only_26as['Amount in 26AS'],
+        'Difference': -only_26as['Amount in 26AS']
+    })
+
+    final_df = pd.concat([matched, only_books, only_26as], ignore_index=True)[COLUMNS].sort_values('Name of Party')
+
+    total_row = pd.DataFrame({
+        'Name of Party': ['TOTAL'],
+        'Amount in Books': [final_df['Amount in Books'].sum()],
+        'Amount in 26AS': [final_df['Amount in 26AS'].sum()],
+        'Difference': [final_df['Difference'].sum()]
+    })
+    return pd.concat([final_df, total_row], ignore_index=True)
+
+
+def reconcile(df_books, df_26as, threshold, mode='best', metrics=None, aliases=None, client=None):
+    """Match books parties to 26AS deductors and build the statement.
+
+    In one-to-one mode, parties with an identical 26AS name are paired
+    first, as ``one_to_one_matches`` does. With an ``aliases`` index
+    (``alias_index.AliasIndex``) and a ``client``, parties the index already
+    knows are then paired by lookup, only the rest are fuzzy-matched, and
+    the new pairs are recorded for the next run. With an empty index the result is the same as without one.
+
+    With ``metrics`` (a ``metrics.Run``), time goes to the ``prepare``,
+    ``aliases``, ``match`` and ``statement`` stages.
+    """
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Unknown matching mode: {mode}")
+    metrics = metrics or NO_METRICS
+    unique = mode == 'one_to_one'
+    with metrics.stage('prepare'):
+        df_books, df_26as = prepare(df_books, df_26as)
+        books_names = df_books['Name of Party'].tolist()
+        as26_names = df_26as['Name of Party'].tolist()
+        # In best mode the matcher's own tie-break decides, as in the original loop.
+        exact = exact_pairs(books_names, as26_names, unique=True) if unique else {}
+    tans = df_26as['TAN'].tolist() if 'TAN' in df_26as.columns else [None] * len(as26_names)
+    use_aliases = aliases is not None and bool(client)
+
+    # Each step only sees what the ones before it left: in one-to-one mode,
+    # the 26AS rows still free.
+    def left(books_done, as26_done):
+        return ([i for i in range(len(books_names)) if i not in books_done],
+                [j for j in range(len(as26_names)) if not (unique and j in as26_done)])
+
+    known, how = {}, {}
+    if use_aliases:
+        with metrics.stage('aliases', parties=len(books_names)) as stage:
+            context = miss_context(mode, threshold, as26_names, books_names if unique else None)
+            books_rest, as26_rest = left(exact, set(exact.values()))
+            pairs, settled = aliases.resolve(client, [books_names[i] for i in books_rest],
+                                             [as26_names[j] for j in as26_rest], threshold,
+                                             [tans[j] for j in as26_rest], unique=unique, context=context)
+            known = {books_rest[i]: as26_rest[j] for i, j in pairs.items()}
+            how = {books_rest[i]: kind for i, kind in settled.items()}
+            stage.count(exact=len(exact), **{kind: sum(k == kind for k in how.values()) for kind in ('alias', 'miss')})
+
+    books_left, as26_left = left({**exact, **how}, {*exact.values(), *known.values()})
+    match = one_to_one_matches if unique else best_matches
+    with metrics.stage('match', parties=len(books_left)) as stage:
+        found = {}
+        if books_left and as26_left:
+            found = match([books_names[i] for i in books_left], [as26_names[j] for j in as26_left], threshold)
+        found = {books_left[i]: as26_left[j] for i, j in found.items()}
+        stage.count(matched=len(found))
+
+    if use_aliases:
+        with metrics.stage('aliases'):
+            # New pairs, and known ones with a TAN the index may not have yet.
+            pairs = list(found.items()) + [(i, j) for i, j in {**exact, **known}.items() if tans[j]]
+            aliases.record(client, [
+                (books_names[i], as26_names[j], tans[j], score(normalise(books_names[i]), normalise(as26_names[j])))
+                for i, j in pairs
+            ])
+            aliases.record_misses(client, [books_names[i] for i, kind in how.items() if kind == 'miss']
+                                  + [books_names[i] for i in books_left if i not in found], context)
+
+    matched_pairs = dict(sorted({**exact, **known, **found}.items()))
+    with metrics.stage('statement'):
+        return build_statement(df_books, df_26as, matched_pairs)
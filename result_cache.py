@@ -0,0 +1,117 @@
+"""Disk-backed, content-addressed cache for 26AS extraction results.
+
+Entries are keyed by a SHA-256 of their input: the whole PDF for parsed rows,
+and the rendered page pixels for OCR text, so a statement that is uploaded
+again (after a rerun, by another user, or for a re-reconciliation) skips
+rasterisation and Tesseract entirely. Every key is namespaced by a version
+derived from the parser and OCR settings, so changing either invalidates old
+entries instead of serving stale rows.
+
+The cache lives in ``AS26_CACHE_DIR`` (default: a folder in the system temp
+dir) and is capped at ``AS26_CACHE_MB``; the least recently used entries are
+evicted first.
+"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+
+CACHE_DIR = os.environ.get('AS26_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ai-tools-26as-cache'))
+MAX_CACHE_MB = int(os.environ.get('AS26_CACHE_MB', 256))
+
+
+def digest_bytes(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, (bytes, bytearray, memoryview)) else str(part).encode())
+    return h.hexdigest()
+
+
+def digest_file(path):
+    """SHA-256 of a file's contents, hashed straight from a memory map."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return h.hexdigest()  # an empty file cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            h.update(view)
+    return h.hexdigest()
+
+
+def digest_pdf(pdf):
+    """SHA-256 of a PDF given as bytes or a file path."""
+    if isinstance(pdf, (bytes, bytearray)):
+        return digest_bytes(pdf)
+    return digest_file(pdf)
+
+
+def digest_image(image):
+    """SHA-256 of a rendered page: exactly what Tesseract would see."""
+    return digest_bytes(image.mode, image.size, image.tobytes())
+
+
+class ResultCache:
+    """JSON entries on local disk with LRU eviction and hit/miss counters."""
+
+    def __init__(self, root=CACHE_DIR, max_mb=MAX_CACHE_MB, version=''):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, kind, key):
+        return os.path.join(self.root, f"{self.version}-{kind}-{key}.json")
+
+    def get(self, kind, key):
+        path = self._path(kind, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._lock: self.misses += 1
+            return None
+        with self._lock: self.hits += 1
+        return value
+
+    def put(self, kind, key, value):
+        path = self._path(kind, key)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp): os.unlink(tmp)
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its cap."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith('.json'): continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        if total <= self.max_bytes: return
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes: break
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
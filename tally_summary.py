@@ -0,0 +1,106 @@
+"""Party-wise summary of a Tally ledger export.
+
+The export is read positionally: particulars in the third column, debit in
+the fifth and credit in the sixth. Each rule of the original row-by-row loop
+is applied to whole columns at once and recorded as a rejection reason, so
+the same rows are kept and the same party totals come out, with a report of
+everything that was left out. Large ledgers can be fed in chunks.
+"""
+import numpy as np
+import pandas as pd
+
+PARTICULARS_COL = 2
+DEBIT_COL = 4
+CREDIT_COL = 5
+
+# Particulars containing any of these are balances, headers or opening rows.
+SKIP_MARKERS = ['Closing Balance', 'nan', '700224', 'Balance', 'Ledger Account', '1-Apr']
+
+STRIP_TAGS = ['(Rent)', '(Interest)']
+
+REJECT_BLANK = 'Blank particulars'
+REJECT_MARKER = 'Balance / header line'
+REJECT_NOT_PARTY = 'Not a party name'
+REJECT_NO_AMOUNT = 'No positive debit or credit'
+
+
+def _column(df, idx):
+    if df.shape[1] > idx:
+        return df.iloc[:, idx]
+    return pd.Series(np.nan, index=df.index, dtype=object)
+
+
+def ledger_columns(df):
+    """Pick the particulars, debit and credit columns out of a Tally export."""
+    return pd.DataFrame({
+        'particulars': _column(df, PARTICULARS_COL),
+        'debit': _column(df, DEBIT_COL),
+        'credit': _column(df, CREDIT_COL)
+    })
+
+
+def _positive_amount(values):
+    """Values as floats where they parse and are positive, else NaN."""
+    numbers = pd.to_numeric(values, errors='coerce').astype(float)
+    return numbers.where(numbers > 0)
+
+
+def _summarise_chunk(chunk):
+    raw = chunk['particulars']
+    particulars = raw.astype(object).where(raw.notna(), '').astype(str).str.strip()
+    reason = pd.Series(None, index=chunk.index, dtype=object)
+
+    blank = (particulars == '') | (particulars == 'nan')
+    reason[blank] = REJECT_BLANK
+
+    marker = pd.Series(False, index=chunk.index)
+    for skip in SKIP_MARKERS:
+        marker |= particulars.str.contains(skip, regex=False)
+    reason[marker & reason.isna()] = REJECT_MARKER
+
+    party = particulars
+    for tag in STRIP_TAGS:
+        party = party.str.replace(tag, '', regex=False)
+    party = party.str.strip()
+    not_party = (party == '') | party.str.contains('(as per details)', regex=False) | (party.str.len() < 3) | party.str.isdigit()
+    reason[not_party & reason.isna()] = REJECT_NOT_PARTY
+
+    # Credit first; debit only where there is no positive credit.
+    amount = _positive_amount(chunk['credit']).fillna(_positive_amount(chunk['debit']))
+    reason[amount.isna() & reason.isna()] = REJECT_NO_AMOUNT
+
+    kept = reason.isna()
+    totals = amount[kept].groupby(party[kept], sort=False).sum()
+    rejected = pd.DataFrame({'Particulars': raw[~kept], 'Reason': reason[~kept]})
+    return totals, rejected
+
+
+def summarise_chunks(chunks):
+    """Sum amounts per party over ledger chunks from ``ledger_columns`` or
+    the ``ingest`` readers.
+
+    Returns ``(totals, rejected)``: ``totals`` is a Series of party amounts
+    sorted by party name; ``rejected`` lists every dropped row with its
+    particulars and the reason it was dropped.
+    """
+    totals, rejected = [], []
+    for chunk in chunks:
+        chunk_totals, chunk_rejected = _summarise_chunk(chunk)
+        totals.append(chunk_totals)
+        rejected.append(chunk_rejected)
+
+    if totals:
+        totals = pd.concat(totals)
+        totals = totals.groupby(level=0, sort=True).sum()
+        rejected = pd.concat(rejected)
+    else:
+        totals = pd.Series(dtype=float)
+        rejected = pd.DataFrame(columns=['Particulars', 'Reason'])
+    totals.index.name = 'Name of Party'
+    totals.name = 'Amount as per Books'
+    return totals, rejected
+
+
+def summarise(df):
+    """Sum amounts per party in a Tally export read as one DataFrame."""
+    return summarise_chunks([ledger_columns(df)])
@@ -0,0 +1,198 @@
+"""Parser for 26AS deductor and transaction lines.
+
+Turns the text of a 26AS statement (from the PDF text layer or from OCR) into
+``Name of Party`` / ``Amount showing in 26AS`` / ``TAN`` rows. A line is a
+deductor line when it carries a TAN; the words before the TAN are the party
+name and the numbers after it are the amount columns.
+
+``TransactionParser`` also reads the transaction lines under each deductor
+(section, transaction date, booking status and date, amount paid, tax
+deducted, TDS deposited), along with the statement's assessment year and the
+part each transaction is listed in.
+"""
+import re
+
+# Bump whenever a change here alters the rows produced for the same text;
+# cached extraction results are keyed on it.
+PARSER_VERSION = 2
+
+tan_loose_pattern = re.compile(r'[A-Z]{4}[0-9OIl]{5}[A-Z]')
+
+_leading_non_upper = re.compile(r'^[^A-Z]+')
+_non_amount = re.compile(r'[^\d\.]')
+_amount_pattern = re.compile(r'^\d+\.?\d{0,2}$')
+_section_pattern = re.compile(r'^\d{3}[A-Z]{0,3}(\([a-z]+\))?$')
+_date_pattern = re.compile(r'^([0-9OolIS]{1,2})-([A-Za-z]{3})-([0-9OolIS]{4})$')
+_ay_pattern = re.compile(r'Assessment\s+Year\s*:?\s*(\d{4})\s*-\s*\d{0,2}(\d{2})\b', re.I)
+_part_pattern = re.compile(r'^\s*PART\s*-?\s*([IVX]+)\b')
+_MONTHS = {m: k for k, m in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+SERIAL_WORDS = frozenset(['sr', 'no'])
+
+# OCR commonly reads 0/1/5 as O/o, l/I and S inside amounts.
+_DIGIT_FIXES = {'O': '0', 'o': '0', 'l': '1', 'I': '1', 'S': '5'}
+# One translate() both applies those fixes and drops every other ASCII
+# character that is not a digit or a decimal point ("1,23,456.00" -> "123456.00").
+_AMOUNT_TABLE = str.maketrans({
+    **{chr(c): None for c in range(128) if not (chr(c).isdigit() or chr(c) == '.')},
+    **_DIGIT_FIXES,
+})
+_FIX_TABLE = str.maketrans(_DIGIT_FIXES)
+
+
+def _amount(token):
+    """Return the value of an amount column token, or ``None``."""
+    digits = token.translate(_AMOUNT_TABLE)
+    if not digits.isascii():
+        # Non-ASCII digits or junk survived the table; take the regex route.
+        digits = _non_amount.sub('', token.translate(_FIX_TABLE))
+        if not _amount_pattern.match(digits): return None
+    else:
+        dot = digits.find('.')
+        if dot == -1:
+            if not digits: return None
+        elif dot == 0 or len(digits) - dot > 3 or '.' in digits[dot + 1:]:
+            return None
+    return float(digits)
+
+
+def _date(token):
+    """``dd-Mon-yyyy`` as ISO ``yyyy-mm-dd``, or ``None``."""
+    match = _date_pattern.match(token)
+    if not match: return None
+    month = _MONTHS.get(match.group(2).lower())
+    day = int(match.group(1).translate(_FIX_TABLE))
+    if not month or not 1 <= day <= 31: return None
+    return f"{match.group(3).translate(_FIX_TABLE)}-{month:02d}-{day:02d}"
+
+
+def _deductor(line):
+    """Split a deductor line into ``(party_name, tan, words_after_tan)``, or ``None``."""
+    line = line.strip()
+    if len(line) < 15: return None
+    match = tan_loose_pattern.search(line)
+    if not match: return None
+
+    # Words touching the TAN belong to the TAN's own token.
+    start, end = match.span()
+    before = line[:start].split()
+    if before and not line[start - 1].isspace(): before.pop()
+    after = line[end:].split()
+    if after and not line[end].isspace(): after.pop(0)
+
+    party_name = ' '.join(
+        w for w in before
+        if len(w) > 1 and not w.isdecimal() and w.lower() not in SERIAL_WORDS
+    )
+    party_name = _leading_non_upper.sub('', party_name)
+    if len(party_name) <= 3: return None
+    tan = match.group()
+    return party_name, tan[:4] + tan[4:9].translate(_FIX_TABLE) + tan[9], after
+
+
+def parse_line(line):
+    """Return the row for one deductor line, or ``None`` if it is not one.
+
+    The line is scanned once: the TAN match splits it into the name words
+    before it and the amount columns after it, and the amount columns are
+    only read until the second one over 10 is found.
+    """
+    deductor = _deductor(line)
+    if not deductor: return None
+    party_name, tan, after = deductor
+
+    # The TDS column is the second amount over 10 (the first is the amount
+    # paid); a lone amount is taken as it is.
+    final_tax = 0.0
+    seen = 0
+    for token in after:
+        val = _amount(token)
+        if val is not None and val > 10:
+            final_tax = val
+            seen += 1
+            if seen == 2: break
+
+    if final_tax > 0:
+        return {'Name of Party': party_name, 'Amount showing in 26AS': final_tax, 'TAN': tan}
+    return None
+
+
+def parse_lines(lines):
+    """Parse every deductor line in ``lines``, keeping their order."""
+    parse = parse_line
+    data = []
+    for line in lines:
+        row = parse(line)
+        if row: data.append(row)
+    return data
+
+
+TRANSACTION_COLUMNS = ['TAN', 'Name of Party', 'Part', 'Section', 'Transaction Date', 'Status of Booking',
+                       'Date of Booking', 'Amount Paid', 'Tax Deducted', 'TDS Deposited']
+
+
+def parse_transaction(line):
+    """Return the fields of one transaction line, or ``None`` if it is not one.
+
+    A transaction line is ``<sr. no.> <section> <transaction date> ...`` and
+    ends with the amount paid, tax deducted and TDS deposited columns; the
+    booking status and date, when present, come right after the transaction
+    date. Returns ``(section, transaction_date, status, booking_date,
+    amount_paid, tax_deducted, tds_deposited)`` with ISO dates.
+    """
+    words = line.split()
+    if len(words) < 6 or not words[0].isdecimal(): return None
+    section = words[1][:3].translate(_FIX_TABLE) + words[1][3:]
+    if not _section_pattern.match(section): return None
+    date = _date(words[2])
+    if not date: return None
+    amounts = [_amount(w) for w in words[-3:]]
+    if None in amounts: return None
+
+    middle = words[3:-3]
+    status = middle[0] if middle and len(middle[0]) == 1 and middle[0].isalpha() else None
+    booked = next((d for d in map(_date, middle) if d), None)
+    return (section, date, status, booked, *amounts)
+
+
+class TransactionParser:
+    """Reads every transaction of a statement, fed one page of lines at a time.
+
+    Transaction lines carry no TAN, so the deductor line above them (possibly
+    on an earlier page) is remembered between pages, as are the part being
+    read and the assessment year from the statement header.
+    """
+
+    def __init__(self):
+        self.assessment_year = None
+        self.part = None
+        self.deductor = None
+
+    def feed(self, lines):
+        """Parse one page; returns ``(deductor_rows, transaction_rows)``.
+
+        ``deductor_rows`` are exactly what ``parse_lines`` gives for the same
+        lines; ``transaction_rows`` are lists in ``TRANSACTION_COLUMNS`` order.
+        """
+        deductors, transactions = [], []
+        for line in lines:
+            fields = parse_transaction(line)
+            if fields:
+                # Under an unreadable deductor line they cannot be attributed.
+                if self.deductor: transactions.append([*self.deductor, self.part, *fields])
+                continue
+            if tan_loose_pattern.search(line):
+                deductor = _deductor(line)
+                self.deductor = (deductor[1], deductor[0]) if deductor else None
+                row = parse_line(line) if deductor else None
+                if row: deductors.append(row)
+                continue
+            match = _part_pattern.match(line)
+            if match:
+                self.part, self.deductor = match.group(1), None
+                continue
+            if self.assessment_year is None:
+                match = _ay_pattern.search(line)
+                if match: self.assessment_year = f"{match.group(1)}-{match.group(2)}"
+        return deductors, transactions
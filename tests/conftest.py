@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The app's modules sit at the top of the repository, the synthetic input
+# generators in benchmarks/.
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
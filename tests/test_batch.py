@@ -0,0 +1,42 @@
+import json
+import os
+
+import batch
+import synthetic
+
+
+def make_client(root, name, seed):
+    folder = root / name
+    folder.mkdir(parents=True, exist_ok=True)
+    synthetic.text_pdf(synthetic.statement_lines(5, seed=seed)[0], str(folder / '26as.pdf'))
+    synthetic.tally_ledger(40, str(folder / 'ledger.xlsx'), seed=seed)
+
+
+def checkpointed(output):
+    with open(os.path.join(output, batch.CHECKPOINT_FILE), encoding='utf-8') as f:
+        return [json.loads(line)['client'] for line in f]
+
+
+def run(root, output):
+    return batch.run(batch.clients_from_folder(str(root)), str(output), jobs=1, ocr_workers=1,
+                     threshold=80, mode='best', use_cache=False, use_aliases=False)
+
+
+def test_rerun_skips_finished_clients_until_their_inputs_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, '_settings', {})
+    clients, output = tmp_path / 'clients', tmp_path / 'out'
+    make_client(clients, 'alpha', seed=1)
+    make_client(clients, 'beta', seed=2)
+
+    first = run(clients, output)
+    assert [r['status'] for r in first] == ['ok', 'ok']
+    assert checkpointed(output) == ['alpha', 'beta']
+
+    assert run(clients, output) == first
+    assert checkpointed(output) == ['alpha', 'beta']
+
+    synthetic.tally_ledger(40, str(clients / 'beta' / 'ledger.xlsx'), seed=3)
+    rows = run(clients, output)
+    assert checkpointed(output) == ['alpha', 'beta', 'beta']
+    assert rows[0] == first[0]
+    assert rows[1]['status'] == 'ok' and rows[1]['digest'] != first[1]['digest']
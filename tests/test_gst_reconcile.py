@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+import synthetic
+from gst_reconcile import (BOOKS_ONLY, DUPLICATE, GSTR2B_ONLY, MATCHED, MISMATCH, invoice_key, reconcile_invoices,
+                           summarise)
+from ingest import read_invoices
+
+
+@pytest.fixture(scope='module')
+def invoices():
+    return synthetic.gst_invoices(2000, seed=3)
+
+
+def counts(statement):
+    return statement.fillna({'Match': ''}).groupby(['Match', 'Status']).size().to_dict()
+
+
+def test_invoice_keys():
+    keys = invoice_key(pd.Series(['INV/24-25/0042', 'inv-24-25-42', 'A 0100', 'A100', '0']))
+    assert keys.tolist() == ['INV242542', 'INV242542', 'A100', 'A100', '0']
+
+
+def test_statement_finds_what_was_planted(invoices):
+    register, gstr2b, expected = invoices
+    statement = reconcile_invoices(register, gstr2b)
+    found = counts(statement)
+    assert found[('exact', MATCHED)] == expected['exact']
+    assert found[('exact', MISMATCH)] == expected['amount']
+    assert found[('invoice', MATCHED)] == pytest.approx(expected['date'], abs=5)
+    assert found[('fuzzy', MATCHED)] == pytest.approx(expected['typo'] + expected['prefix'], abs=5)
+    assert found[('', BOOKS_ONLY)] == pytest.approx(expected['books_only'], abs=5)
+    assert found[('', GSTR2B_ONLY)] == pytest.approx(expected['gstr2b_only'], abs=5)
+
+    summary = summarise(statement).set_index('Status')
+    assert summary.loc['TOTAL', 'Invoices'] == len(statement)
+    assert summary.loc['TOTAL', 'Taxable Value (Books)'] == pytest.approx(register['Taxable Value'].sum())
+
+
+def test_portal_files_reconcile_as_the_frames(tmp_path, invoices):
+    register, gstr2b, _ = invoices
+    path_2b = synthetic.gstr2b_workbook(gstr2b, str(tmp_path / 'gstr2b.xlsx'))
+    path_books = synthetic.purchase_register(register, str(tmp_path / 'purchases.csv'))
+    statement = reconcile_invoices(read_invoices(path_books, 'purchases.csv'),
+                                   read_invoices(path_2b, 'gstr2b.xlsx', sheet='B2B'))
+    assert counts(statement) == counts(reconcile_invoices(register, gstr2b))
+
+
+def invoice_frame(rows):
+    return pd.DataFrame([{'GSTIN': '27AAACA1234A1Z5', 'Supplier': 'Acme', 'Invoice No': number,
+                          'Invoice Date': pd.Timestamp(date), 'Taxable Value': taxable, 'IGST': taxable * 0.18,
+                          'CGST': 0.0, 'SGST': 0.0, 'Cess': 0.0} for number, date, taxable in rows])
+
+
+def test_a_shared_invoice_number_is_reported_not_paired_by_position():
+    books = invoice_frame([('INV-7', '2024-04-01', 1000.0), ('INV-7', '2024-04-09', 2500.0), ('INV-8', '2024-04-02', 400.0)])
+    gstr2b = invoice_frame([('INV/7', '2024-04-10', 2500.0), ('INV/8', '2024-04-02', 400.0)])
+    statement = reconcile_invoices(books, gstr2b)
+    rows = {(r['Invoice No (Books)'], r['Invoice No (GSTR-2B)']): (r['Match'], r['Status'])
+            for r in statement.fillna({'Match': '', 'Invoice No (GSTR-2B)': ''}).to_dict('records')}
+    assert rows == {
+        ('INV-8', 'INV/8'): ('exact', MATCHED),
+        ('INV-7', 'INV/7'): ('fuzzy', MATCHED),  # the books invoice whose amounts agree
+        ('INV-7', ''): ('', DUPLICATE),
+    }
+
+    gstr2b.loc[0, 'Taxable Value'] = 9000.0
+    statement = reconcile_invoices(books, gstr2b)
+    assert statement['Status'].value_counts().to_dict() == {DUPLICATE: 3, MATCHED: 1}
+    summary = summarise(statement).set_index('Status')
+    assert summary.loc[DUPLICATE, 'Invoices'] == 3
+    assert summary.loc['TOTAL', 'Invoices'] == 4
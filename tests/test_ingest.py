@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import synthetic
+from ingest import iter_ledger_chunks
+from tally_summary import ledger_columns, summarise, summarise_chunks
+
+
+@pytest.fixture(scope='module')
+def ledger(tmp_path_factory):
+    path = tmp_path_factory.mktemp('ledger') / 'ledger.xlsx'
+    synthetic.tally_ledger(6000, path, seed=4)
+    return path
+
+
+def test_xlsx_chunks_read_as_pandas_does(ledger):
+    df = pd.read_excel(ledger, engine='openpyxl')
+    chunks = list(iter_ledger_chunks(str(ledger), 'ledger.xlsx', chunk_rows=1000))
+    assert len(chunks) == 7
+    pd.testing.assert_frame_equal(pd.concat(chunks), ledger_columns(df), check_dtype=False)
+
+    expected, _ = summarise(df)
+    totals, _ = summarise_chunks(chunks)
+    pd.testing.assert_series_equal(totals, expected)
+
+
+def test_csv_chunks_sum_as_the_workbook(ledger, tmp_path):
+    path = tmp_path / 'ledger.csv'
+    pd.read_excel(ledger, engine='openpyxl').to_csv(path, index=False)
+    expected, _ = summarise_chunks(iter_ledger_chunks(str(ledger), 'ledger.xlsx'))
+    totals, _ = summarise_chunks(iter_ledger_chunks(str(path), 'ledger.csv', chunk_rows=1000))
+    pd.testing.assert_series_equal(totals, expected)
+
+
+def test_narrow_csv_is_reported(tmp_path):
+    path = tmp_path / 'ledger.csv'
+    path.write_text('Date,Particulars,Amount\n1-Apr-2023,ACME,100\n')
+    with pytest.raises(ValueError, match='Expected at least 6 columns'):
+        list(iter_ledger_chunks(str(path), 'ledger.csv'))
+
+
+def test_blank_rows_and_short_rows_read_as_pandas_does(tmp_path):
+    path = tmp_path / 'ledger.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Date', 'Dr/Cr', 'Particulars', 'Vch Type', 'Debit', 'Credit'])
+    ws.append(['1-Apr-2023', None, 'Opening Balance', None, None, 700224.0])
+    ws['C5'], ws['F5'] = 'Gap Co', 2.5
+    ws['C7'], ws['E7'] = 'No Amount Co', 0
+    ws['H9'] = 'beyond the ledger columns'
+    wb.save(path)
+    chunks = pd.concat(iter_ledger_chunks(str(path), 'ledger.xlsx'))
+    pd.testing.assert_frame_equal(chunks, ledger_columns(pd.read_excel(path)), check_dtype=False)
+
+
+def test_xls_is_refused_clearly(tmp_path):
+    path = tmp_path / 'ledger.xls'
+    path.write_bytes(b'')
+    with pytest.raises(ValueError, match=r'\.xls workbooks cannot be read; save the ledger as \.xlsx or CSV'):
+        list(iter_ledger_chunks(str(path), 'ledger.xls'))
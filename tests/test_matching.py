@@ -0,0 +1,78 @@
+import pytest
+from fuzzywuzzy import fuzz
+
+import matching
+import synthetic
+from matching import best_matches, exact_pairs, one_to_one_matches
+
+NON_ASCII = (['Société Générale India', 'ÉCOLE LTD', 'Müller & Co'],
+             ['SOCIETE GENERALE INDIA', 'ECOLE LTD', 'MULLER CO'])
+
+
+def legacy_matches(books, as26, threshold):
+    """The original loop: every 26AS name scored, the first best one kept."""
+    matched = {}
+    for i, party_b in enumerate(books):
+        best_match, best_score = None, 0
+        for j, party_a in enumerate(as26):
+            score = fuzz.token_set_ratio(str(party_b).upper(), str(party_a).upper())
+            if score > best_score:
+                best_score, best_match = score, j
+        if best_score >= threshold:
+            matched[i] = best_match
+    return matched
+
+
+@pytest.mark.parametrize('threshold', [70, 85, 95])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_best_matches_agree_with_the_original_loop(seed, threshold):
+    books, as26 = synthetic.party_lists(200, 300, seed=seed)
+    books += NON_ASCII[0]
+    as26 += NON_ASCII[1]
+    assert best_matches(books, as26, threshold) == legacy_matches(books, as26, threshold)
+
+
+def test_non_ascii_names_score_as_their_ascii_spelling():
+    books, as26 = NON_ASCII
+    assert best_matches(books, as26, 90) == {0: 0, 1: 1, 2: 2}
+    assert one_to_one_matches(books, as26, 90) == {0: 0, 1: 1, 2: 2}
+
+
+@pytest.mark.parametrize('full_scan_pairs', [matching.FULL_SCAN_PAIRS, 0])
+def test_earlier_subset_wins_over_a_later_identical_name(monkeypatch, full_scan_pairs):
+    # 'ABC TRADERS' scores 100 against both; the original loop kept the first.
+    monkeypatch.setattr(matching, 'FULL_SCAN_PAIRS', full_scan_pairs)
+    books = ['ABC Traders', 'XYZ Exports Ltd']
+    as26 = ['ABC TRADERS PVT LTD', 'XYZ EXPORTS', 'ABC TRADERS', 'XYZ EXPORTS LTD']
+    assert best_matches(books, as26, 80) == legacy_matches(books, as26, 80) == {0: 0, 1: 1}
+
+
+def test_index_path_finds_every_perfect_match(monkeypatch):
+    books, as26 = synthetic.party_lists(300, 400, seed=2)
+    legacy = legacy_matches(books, as26, 100)
+    monkeypatch.setattr(matching, 'FULL_SCAN_PAIRS', 0)
+    found = best_matches(books, as26, 100)
+    assert found.keys() == legacy.keys()
+    for i, j in found.items():
+        assert fuzz.token_set_ratio(books[i].upper(), as26[j].upper()) == 100
+
+
+def test_exact_pairs():
+    books = ['XYZ Ltd', 'xyz ltd', 'pqr sons', 'Other']
+    as26 = ['XYZ LTD', 'PQR SONS', 'XYZ LTD']
+    assert exact_pairs(books, as26) == {0: 0, 1: 0, 2: 1}
+    assert exact_pairs(books, as26, unique=True) == {0: 0, 1: 2, 2: 1}
+
+
+def test_one_to_one_takes_the_identical_name_over_a_subset():
+    # 'ABC TRADERS' scores 100 against both.
+    assert one_to_one_matches(['ABC Traders'], ['ABC TRADERS PVT LTD', 'ABC TRADERS'], 80) == {0: 1}
+
+
+def test_one_to_one_keeps_every_identical_pair():
+    df_books, df_26as = synthetic.summary_pair(400, 600, seed=1)
+    books, as26 = df_books['Name of Party'].tolist(), df_26as['Name of Party'].tolist()
+    found = one_to_one_matches(books, as26, 80)
+    assert len(set(found.values())) == len(found)
+    for i, j in exact_pairs(books, as26, unique=True).items():
+        assert found[i] == j
@@ -0,0 +1,33 @@
+import json
+
+import metrics
+from metrics import measured
+
+
+def test_the_log_is_rotated_at_its_size_limit(tmp_path, monkeypatch):
+    log = tmp_path / 'metrics.jsonl'
+    monkeypatch.setattr(metrics, 'METRICS_LOG', str(log))
+    monkeypatch.setattr(metrics, 'METRICS_PROM', str(tmp_path / 'metrics.prom'))
+    monkeypatch.setattr(metrics, 'METRICS_LOG_MB', 2000 / 1024 / 1024)
+
+    runs = []
+    for n in range(30):
+        with measured('test_tool', n=n) as run:
+            with run.stage('work', rows=n):
+                pass
+        runs.append(run.id)
+
+    current = [json.loads(line) for line in log.read_text().splitlines()]
+    previous = [json.loads(line) for line in (tmp_path / 'metrics.jsonl.1').read_text().splitlines()]
+    assert log.stat().st_size < 2000 + len(json.dumps(current[-1])) + 1
+    assert [r['run'] for r in previous + current] == runs[-len(previous) - len(current):]
+    assert not (tmp_path / 'metrics.jsonl.2').exists()
+
+
+def test_nested_stages_are_charged_their_own_time():
+    run = metrics.Run('test_tool')
+    with run.stage('outer', rows=5):
+        with run.stage('inner', rows=5):
+            sum(range(200_000))
+    assert run.stages['outer'].counts == run.stages['inner'].counts == {'rows': 5}
+    assert run.stages['outer'].seconds < run.stages['inner'].seconds
@@ -0,0 +1,40 @@
+import multiprocessing
+import time
+
+import pytest
+from PIL import Image
+
+import ocr_engine
+from ocr_engine import ocr_images
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                                reason='the pool workers must inherit the test backend')
+
+
+class PageNumberEngine:
+    """Reads the page number back from the image width; earlier pages take longer."""
+
+    def __init__(self, config=None):
+        pass
+
+    def text(self, image):
+        page = image.width - 100
+        time.sleep(0.02 * (10 - page % 10))
+        return f'page {page}'
+
+
+@pytest.fixture(autouse=True)
+def page_number_backend(monkeypatch):
+    monkeypatch.setitem(ocr_engine.OCR_BACKENDS, 'page-number', PageNumberEngine)
+    monkeypatch.setattr(ocr_engine, 'ROI_OCR', False)
+
+
+def pages(n):
+    for i in range(n):
+        yield Image.new('L', (100 + i, 10), 255)
+
+
+@pytest.mark.parametrize('workers, window', [(1, None), (4, None), (3, 2)])
+def test_pages_come_back_in_order(workers, window):
+    results = list(ocr_images(pages(25), workers=workers, window=window, backend='page-number'))
+    assert results == [(i, f'page {i}') for i in range(25)]
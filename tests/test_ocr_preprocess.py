@@ -0,0 +1,56 @@
+import shutil
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+import synthetic
+from ocr_engine import OCR_CONFIG, engine
+from ocr_preprocess import despeckle, ink_mask, line_bands, lines_from_words, otsu_threshold, prepare_page, table_region
+from tan_parser import TransactionParser
+
+
+@pytest.mark.parametrize('colour', ['white', 'black', (200, 200, 200)])
+def test_blank_page_has_no_text(colour):
+    page = Image.new('RGB', (800, 1000), colour)
+    assert otsu_threshold(np.asarray(page.convert('L'))) is None
+    assert not ink_mask(np.asarray(page.convert('L'))).any()
+    assert prepare_page(page) is None
+
+
+def test_scanned_page_gives_a_binarised_region():
+    lines, _ = synthetic.statement_lines(10, seed=3)
+    page = synthetic.raster_pages(lines, dpi=150, seed=1, max_skew=1.5)[0]
+    region = prepare_page(page)
+    assert region is not None
+    assert region.mode == 'L'
+    assert np.asarray(region).min() < 128  # the text survived
+
+
+def statement_page(dpi=200):
+    """A scanned first page with the header set well apart from the deductor table."""
+    lines, _ = synthetic.statement_lines(8, seed=4)
+    page = Image.new('L', (int(8.27 * dpi), int(11.69 * dpi)), 255)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=dpi // 9)
+    step = dpi // 5
+    for k, line in enumerate(synthetic.HEADER_LINES[:2]):
+        draw.text((dpi // 3, dpi // 3 + k * step), line, fill=0, font=font)
+    for k, line in enumerate(synthetic.HEADER_LINES[2:] + lines[len(synthetic.HEADER_LINES):]):
+        draw.text((dpi // 3, 2 * dpi + k * step), line, fill=0, font=font)
+    return page.convert('RGB')
+
+
+def test_crop_keeps_the_header_away_from_the_table():
+    mask = despeckle(ink_mask(np.asarray(statement_page().convert('L'))))
+    bands = [b for b in line_bands(mask) if b[1] - b[0] >= 3]
+    left, top, right, bottom = table_region(mask)
+    assert top <= bands[0][0] and bottom >= bands[-1][1]
+
+
+@pytest.mark.skipif(not shutil.which('tesseract'), reason='tesseract not installed')
+def test_cropped_page_still_gives_its_assessment_year():
+    region = prepare_page(statement_page())
+    parser = TransactionParser()
+    parser.feed(lines_from_words(engine('pytesseract', OCR_CONFIG).words(region)))
+    assert parser.assessment_year == '2024-25'
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+import synthetic
+from alias_index import CONFIRMED, AliasIndex
+from reconcile import build_statement, prepare, reconcile
+from test_matching import legacy_matches
+
+CLIENT = 'Acme Industries Ltd'
+
+
+@pytest.fixture
+def summaries():
+    df_books, df_26as = synthetic.summary_pair(300, 400, seed=7)
+    # One party under an identical name twice on each side.
+    df_books.loc[len(df_books)] = [df_26as['Name of Party'][0], 1000.0]
+    df_26as.loc[len(df_26as)] = [df_26as['Name of Party'][0], 2000.0]
+    # An identical name after a name made of a subset of its tokens.
+    df_books.loc[len(df_books)] = ['ABC Traders', 3000.0]
+    df_26as.loc[len(df_26as)] = ['ABC TRADERS PVT LTD', 3100.0]
+    df_26as.loc[len(df_26as)] = ['ABC TRADERS', 3200.0]
+    return df_books, df_26as
+
+
+@pytest.mark.parametrize('mode', ['best', 'one_to_one'])
+def test_an_empty_index_changes_nothing(tmp_path, summaries, mode):
+    df_books, df_26as = summaries
+    plain = reconcile(df_books, df_26as, 80, mode)
+    aliases = AliasIndex(str(tmp_path / 'aliases.sqlite3'))
+    first = reconcile(df_books, df_26as, 80, mode, aliases=aliases, client=CLIENT)
+    pd.testing.assert_frame_equal(first, plain)
+    assert aliases.aliases(CLIENT)
+
+    # The second run pairs from the index and gives the same statement.
+    second = reconcile(df_books, df_26as, 80, mode, aliases=aliases, client=CLIENT)
+    pd.testing.assert_frame_equal(second, plain)
+
+
+def test_best_mode_pairs_as_the_original_loop(tmp_path, summaries):
+    df_books, df_26as = prepare(*summaries)
+    pairs = legacy_matches(df_books['Name of Party'].tolist(), df_26as['Name of Party'].tolist(), 80)
+    legacy = build_statement(df_books, df_26as, pairs)
+    aliases = AliasIndex(str(tmp_path / 'aliases.sqlite3'))
+    pd.testing.assert_frame_equal(reconcile(df_books, df_26as, 80), legacy)
+    for _ in range(2):
+        pd.testing.assert_frame_equal(reconcile(df_books, df_26as, 80, aliases=aliases, client=CLIENT), legacy)
+
+
+def test_export_and_import_keep_confirmed_aliases(tmp_path):
+    aliases = AliasIndex(str(tmp_path / 'aliases.sqlite3'))
+    aliases.record(CLIENT, [('Acme Traders', 'ACME TRADING CO', 'MUMA12345B', 90.0),
+                            ('Old Name Ltd', 'NEW NAME LTD', None, 40.0)])
+    aliases.record(CLIENT, [('Old Name Ltd', 'NEW NAME LTD', None, 40.0)], source=CONFIRMED)
+    aliases.record('Other Ltd', [('Beta', 'BETA LTD', None, 95.0)])
+    text = aliases.export_csv(CLIENT)
+
+    copy = AliasIndex(str(tmp_path / 'copy.sqlite3'))
+    assert copy.import_csv(text) == 2
+    assert copy.export_csv() == text
+    assert {r['books_name']: r['source'] for r in copy.aliases(CLIENT)} == {'acme traders': 'fuzzy',
+                                                                          'old name ltd': CONFIRMED}
+    # A confirmed alias stays confirmed when the matcher records it again.
+    copy.record(CLIENT, [('Old Name Ltd', 'NEW NAME LTD', None, 40.0)])
+    assert copy.import_csv(copy.export_csv()) == 2
+    assert {r['books_name']: r['source'] for r in copy.aliases(CLIENT)}['old name ltd'] == CONFIRMED
+    assert copy.aliases('Other Ltd') == []
+
+
+def test_resolve_aliases_and_misses(tmp_path):
+    aliases = AliasIndex(str(tmp_path / 'aliases.sqlite3'))
+    aliases.record(CLIENT, [('Acme Traders', 'ACME TRADING CO', 'MUMA12345B', 90.0),
+                            ('Old Name Ltd', 'NEW NAME LTD', None, 40.0),
+                            ('Weak Match', 'WEAK MATCHING', None, 60.0)])
+    aliases.record(CLIENT, [('Old Name Ltd', 'NEW NAME LTD', None, 40.0)], source=CONFIRMED)
+    aliases.record_misses(CLIENT, ['Nobody'], 'ctx')
+
+    books = ['ACME Traders', 'Old Name Ltd', 'Weak Match', 'Nobody', 'Unknown']
+    as26 = ['NEW NAME LTD', 'ACME TRADING COMPANY', 'WEAK MATCHING']
+    tans = [None, 'MUMA12345B', None]
+    # The TAN finds the renamed deductor; a confirmed alias is kept below
+    # the threshold.
+    pairs, how = aliases.resolve(CLIENT, books, as26, 80, tans, context='ctx')
+    assert pairs == {0: 1, 1: 0}
+    assert how == {0: 'alias', 1: 'alias', 3: 'miss'}
+    assert aliases.resolve(CLIENT, books, as26, 80, tans, context='other')[1] == {0: 'alias', 1: 'alias'}
+
+
+def test_client_names_are_trimmed_and_case_folded(tmp_path):
+    aliases = AliasIndex(str(tmp_path / 'aliases.sqlite3'))
+    aliases.record(CLIENT, [('Acme Traders', 'ACME TRADING CO', None, 90.0)])
+    pairs, _ = aliases.resolve(' acme industries  LTD', ['Acme Traders'], ['ACME TRADING CO'], 80)
+    assert pairs == {0: 0}
+    assert aliases.resolve('Other Ltd', ['Acme Traders'], ['ACME TRADING CO'], 80) == ({}, {})
@@ -0,0 +1,31 @@
+import os
+import time
+
+from result_cache import ResultCache
+
+ENTRY = 'x' * 1000  # about 1 KB of JSON
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = ResultCache(str(tmp_path), version='v1')
+    cache.max_bytes = 5500
+    long_ago = time.time() - 1000
+    for n, key in enumerate('abcde'):
+        cache.put('page', key, ENTRY)
+        os.utime(cache._path('page', key), (long_ago + n, long_ago + n))
+
+    assert cache.get('page', 'a') == ENTRY  # the oldest, read again
+    cache.put('page', 'f', ENTRY)
+
+    assert cache.get('page', 'b') is None
+    assert all(cache.get('page', key) == ENTRY for key in 'acdef')
+    assert cache.stats() == {'hits': 6, 'misses': 1}
+    assert sum(e.stat().st_size for e in os.scandir(tmp_path)) <= cache.max_bytes
+
+
+def test_entries_are_kept_per_version(tmp_path):
+    ResultCache(str(tmp_path), version='v1').put('statement', 'k', {'rows': [1, 2]})
+    assert ResultCache(str(tmp_path), version='v1').get('statement', 'k') == {'rows': [1, 2]}
+    other = ResultCache(str(tmp_path), version='v2')
+    assert other.get('statement', 'k') is None
+    assert other.stats() == {'hits': 0, 'misses': 1}
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+import synthetic
+from tally_summary import REJECT_BLANK, REJECT_MARKER, REJECT_NO_AMOUNT, REJECT_NOT_PARTY, summarise
+
+
+def legacy_summary(df):
+    """The original row-by-row loop over a Tally export."""
+    def get_safe(row, idx): return row.iloc[idx] if len(row) > idx else None
+    parties = {}
+    for _, row in df.iterrows():
+        particulars = str(get_safe(row, 2)).strip() if pd.notna(get_safe(row, 2)) else ''
+        credit, debit = get_safe(row, 5), get_safe(row, 4)
+        if not particulars or particulars == 'nan': continue
+        if any(skip in particulars for skip in ['Closing Balance', 'nan', '700224', 'Balance', 'Ledger Account',
+                                                '1-Apr']): continue
+        party = particulars.replace('(Rent)', '').replace('(Interest)', '').strip()
+        if not party or '(as per details)' in party or len(party) < 3 or party.isdigit(): continue
+        amount = None
+        for value in (credit, debit):
+            if amount is None and pd.notna(value) and value != '' and value != 0:
+                try:
+                    if float(value) > 0: amount = float(value)
+                except ValueError:
+                    pass
+        if amount:
+            parties[party] = parties.get(party, 0.0) + amount
+    return parties
+
+
+EDGE_ROWS = pd.DataFrame([
+    ['1-Apr-2023', None, 'Opening Balance', None, None, 5000],
+    [None, None, None, None, 10, 10],
+    [None, None, 'ACME Traders (Rent)', None, None, 100.5],
+    [None, None, 'ACME Traders', None, 20, None],
+    [None, None, 'ACME Traders (Interest)', None, 30, -5],
+    [None, None, 'Sundry (as per details)', None, None, 40],
+    [None, None, '123456', None, None, 50],
+    [None, None, 'AB', None, None, 60],
+    [None, None, 'Zero Co', None, 0, 0],
+    [None, None, 'Text Co', None, 'n/a', 'n/a'],
+    [None, None, 'Debit Co', None, 80, 'n/a'],
+    [None, None, 'Café Ltd', None, None, 70],
+    [None, None, 'Closing Balance', None, 900, None],
+])
+
+
+def test_edge_rows_agree_with_the_original_loop():
+    totals, rejected = summarise(EDGE_ROWS)
+    assert totals.to_dict() == pytest.approx(legacy_summary(EDGE_ROWS))
+    assert totals.to_dict() == pytest.approx({'ACME Traders': 150.5, 'Café Ltd': 70.0, 'Debit Co': 80.0})
+    assert rejected['Reason'].tolist() == [REJECT_MARKER, REJECT_BLANK, REJECT_NOT_PARTY, REJECT_NOT_PARTY,
+                                           REJECT_NOT_PARTY, REJECT_NO_AMOUNT, REJECT_NO_AMOUNT, REJECT_MARKER]
+
+
+def test_short_rows_have_no_amount():
+    totals, rejected = summarise(pd.DataFrame([[None, None, 'Short Row Co']]))
+    assert totals.empty
+    assert rejected['Reason'].tolist() == [REJECT_NO_AMOUNT]
+
+
+def test_exported_ledger_agrees_with_the_original_loop(tmp_path):
+    path = tmp_path / 'ledger.xlsx'
+    expected = synthetic.tally_ledger(3000, path, seed=4)
+    df = pd.read_excel(path, engine='openpyxl')
+    legacy = legacy_summary(df)
+    assert legacy == pytest.approx(expected)
+
+    totals, _ = summarise(df)
+    assert totals.to_dict() == pytest.approx(legacy)
+    assert list(totals.index) == sorted(legacy)
@@ -0,0 +1,41 @@
+import pytest
+
+import synthetic
+from bench_parser import legacy_parse_lines, synthetic_corpus
+from tan_parser import parse_line, parse_lines
+
+
+def without_tan(rows):
+    return [{k: v for k, v in row.items() if k != 'TAN'} for row in rows]
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_noisy_ocr_text_parses_as_the_original_parser(seed):
+    lines = synthetic_corpus(3000, seed=seed)
+    assert without_tan(parse_lines(lines)) == legacy_parse_lines(lines)
+
+
+def test_statement_amounts():
+    lines, expected = synthetic.statement_lines(200, seed=5)
+    rows = parse_lines(lines)
+    assert {row['Name of Party']: row['Amount showing in 26AS'] for row in rows} == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('line, row', [
+    ('1 ACME TRADERS PVT LTD MUMA12345B 1,00,000.00 10,000.00 10,000.00',
+     {'Name of Party': 'ACME TRADERS PVT LTD', 'Amount showing in 26AS': 10000.0, 'TAN': 'MUMA12345B'}),
+    # OCR letters in the TAN digits and in the amounts.
+    ('2 ACME TRADERS MUMAl2O45B 5O,OOO.OO 5,OOO.OO',
+     {'Name of Party': 'ACME TRADERS', 'Amount showing in 26AS': 5000.0, 'TAN': 'MUMA12045B'}),
+    # Name glued to the TAN: the glued word is not part of the name.
+    ('3 SÃO PAULO FOODS INDIAMUMA12345B 2,000.00 200.00',
+     {'Name of Party': 'SÃO PAULO FOODS', 'Amount showing in 26AS': 200.0, 'TAN': 'MUMA12345B'}),
+    ('4 ACME MUMA12345B 1,000.00', {'Name of Party': 'ACME', 'Amount showing in 26AS': 1000.0, 'TAN': 'MUMA12345B'}),
+    ('5 ABC MUMA12345B 1,000.00 100.00', None),
+    ('6 ACME TRADERS MUMA12345B - 5.00', None),
+    ('Sr. No. Name of Deductor TAN of Deductor', None),
+])
+def test_deductor_lines(line, row):
+    assert parse_line(line) == row
+    assert without_tan([row] if row else []) == legacy_parse_lines([line])
+
@@ -0,0 +1,23 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import tool_26as
+
+
+def test_a_broken_ocr_pool_is_replaced_once():
+    broken = tool_26as.get_ocr_pool()
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+
+    fresh = tool_26as.replace_ocr_pool(broken)
+    try:
+        assert fresh is not broken
+        assert fresh.submit(abs, -2).result() == 2
+        # A second job that saw the same broken pool gets the same fresh one.
+        assert tool_26as.replace_ocr_pool(broken) is fresh
+        assert tool_26as.get_ocr_pool() is fresh
+    finally:
+        tool_26as.get_ocr_pool.clear()
+        fresh.shutdown()
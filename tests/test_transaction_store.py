@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+import synthetic
+from tan_parser import TRANSACTION_COLUMNS, TransactionParser, parse_lines
+from transaction_store import TransactionStore
+
+
+def transactions(*rows):
+    """Transactions as ``extract_statement`` gives them, from ``(tan, party, part, tax)`` tuples."""
+    df = pd.DataFrame([(tan, party, part, '194C', '2024-05-01', 'F', '2024-07-01', tax * 10, tax, tax)
+                       for tan, party, part, tax in rows], columns=TRANSACTION_COLUMNS)
+    for column in ('Transaction Date', 'Date of Booking'):
+        df[column] = pd.to_datetime(df[column])
+    return df
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TransactionStore(str(tmp_path / 'store'))
+
+
+def test_transaction_parser_reads_the_deductor_rows_across_pages():
+    lines, _ = synthetic.statement_lines(50, seed=6)
+    parser = TransactionParser()
+    deductors, found = [], []
+    for i in range(0, len(lines), 37):
+        rows, page = parser.feed(lines[i:i + 37])
+        deductors += rows
+        found += page
+    assert deductors == parse_lines(lines)
+    assert len(found) == 100
+    assert all(t[0] and t[1] for t in found)
+
+
+def test_a_statement_replaces_its_year(store):
+    store.add('Acme Ltd', '2023-24', transactions(('MUMA12345B', 'ACME TRADERS', 'I', 100.0)), 'old')
+    store.add('Acme Ltd', '2024-25', transactions(('MUMA12345B', 'ACME TRADERS', 'I', 200.0)), 'first')
+    store.add('acme  ltd', '2024-25', transactions(('MUMA12345B', 'ACME TRADERS', 'I', 300.0),
+                                                   ('DELB54321C', 'BETA LTD', 'I', 50.0)), 'second')
+    statements = store.statements()
+    assert statements[['assessment_year', 'statement', 'transactions']].values.tolist() == [
+        ['2023-24', 'old', 1], ['2024-25', 'second', 2]]
+    assert set(statements['client']) == {'ACME LTD'}
+    assert store.years(' ACME Ltd ') == {'2024-25': 'second', '2023-24': 'old'}
+    assert store.years('Other Ltd') == {}
+
+
+def test_a_statement_needs_its_year(store):
+    with pytest.raises(ValueError, match='assessment year'):
+        store.add('Acme Ltd', None, transactions(('MUMA12345B', 'ACME TRADERS', 'I', 100.0)))
+
+
+def test_party_summary_sums_the_tds_parts(store):
+    store.add('Acme Ltd', '2024-25', transactions(
+        ('MUMA12345B', 'ACME TRADERS', 'I', 100.0),
+        ('MUMA12345B', 'ACME TRADERS', 'I', 20.5),
+        ('MUMA12345B', 'ACME TRADERS', 'II', 4.0),
+        ('MUMA12345B', 'ACME TRADERS', 'VI', 1000.0),
+        ('DELB54321C', 'BETA LTD', None, 7.0),
+        ('CHEC11111D', 'GAMMA TCS', 'VI', 9.0),
+    ))
+    summary = store.party_summary('Acme Ltd', '2024-25')
+    assert summary.values.tolist() == [['ACME TRADERS', 124.5, 'MUMA12345B'], ['BETA LTD', 7.0, 'DELB54321C']]
+    every_part = store.party_summary('Acme Ltd', '2024-25', parts=None)
+    assert every_part['Amount showing in 26AS'].tolist() == [1124.5, 7.0, 9.0]
+    assert store.party_summary('Acme Ltd', '2023-24').empty
@@ -0,0 +1,36 @@
+import hashlib
+import io
+import os
+import time
+
+import uploads
+from uploads import spool
+
+
+def upload(data, name):
+    f = io.BytesIO(data)
+    f.name = name
+    return f
+
+
+def test_an_upload_is_spooled_once_by_content(tmp_path):
+    first = spool(upload(b'ledger rows', 'Ledger.XLSX'), str(tmp_path))
+    again = spool(upload(b'ledger rows', 'copy.xlsx'), str(tmp_path))
+    assert first.path == again.path == str(tmp_path / (hashlib.sha256(b'ledger rows').hexdigest() + '.xlsx'))
+    assert (first.name, first.size, again.name) == ('Ledger.XLSX', 11, 'copy.xlsx')
+    assert open(first.path, 'rb').read() == b'ledger rows'
+    assert os.listdir(tmp_path) == [os.path.basename(first.path)]
+
+
+def test_files_unused_for_the_ttl_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, 'SPOOL_TTL', 3600)
+    stale = spool(upload(b'old statement', 'old.pdf'), str(tmp_path))
+    reused = spool(upload(b'reused statement', 'reused.pdf'), str(tmp_path))
+    long_ago = time.time() - 7200
+    for path in (stale.path, reused.path):
+        os.utime(path, (long_ago, long_ago))
+
+    # Spooled again, it is there afresh; the next spool expires the rest.
+    spool(upload(b'reused statement', 'reused.pdf'), str(tmp_path))
+    fresh = spool(upload(b'new ledger', 'new.csv'), str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(f.path) for f in (reused, fresh))
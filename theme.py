@@ -0,0 +1,28 @@
+"""Page styling for the Streamlit app.
+
+Streamlit re-runs the page script on every interaction and the stylesheet
+has to be sent again each time, so it is read from ``assets/`` and minified
+once per process rather than rebuilt on every run.
+"""
+import os
+import re
+from functools import lru_cache
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_SPACE = re.compile(r'\s+')
+_AROUND_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(css):
+    """``css`` without comments and with whitespace collapsed."""
+    css = _SPACE.sub(' ', _COMMENT.sub('', css))
+    return _AROUND_PUNCTUATION.sub(r'\1', css).replace(';}', '}').strip()
+
+
+@lru_cache(maxsize=None)
+def stylesheet(name='app.css'):
+    """``<style>`` block for ``assets/<name>``, for ``st.markdown(..., unsafe_allow_html=True)``."""
+    with open(os.path.join(ASSETS, name), encoding='utf-8') as f:
+        return f'<style>{minify_css(f.read())}</style>'
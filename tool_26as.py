@@ -0,0 +1,387 @@
+"""The 26AS Automation tool: PDF to Excel, Tally Summary and Reconciliation.
+
+Streamlit runs the page script again on every interaction, and all three
+tabs are laid out each time. Only what drawing them needs is imported up
+front; the PDF, OCR, spreadsheet and matching libraries (pdfplumber,
+pytesseract, openpyxl, pandas, rapidfuzz, scipy) are imported inside the
+functions that use them, so opening the app, or any other tool, does not pay
+for loading them. ``preload`` imports them on a background thread once the
+page is drawn, so the first conversion does not wait for them either.
+
+Uploads are spooled to disk (``uploads.spool``) and jobs get their path, not
+a copy of their bytes. The tables the PDF to Excel and Tally Summary tabs
+produce are kept in the session as Arrow tables (``KeptResult``), which the
+Reconciliation tab reconciles directly: no workbook to download, re-upload
+and parse back. Their workbooks are only built when downloaded.
+
+A statement converted with a client named has every transaction saved to the
+transaction store (``transaction_store``); the Reconciliation tab can then
+reconcile that client's stored 26AS for any assessment year without the PDF.
+"""
+import os
+import threading
+
+import streamlit as st
+
+from file_formats import LEDGER_FORMATS, SUMMARY_FORMATS
+from metrics import measured
+from result_cache import ResultCache, digest_bytes
+from ui_jobs import show_diagnostics, show_job, submit_job
+from uploads import spool
+
+# Set AS26_PRELOAD=0 to load the libraries only when a tab first needs them.
+PRELOAD = os.environ.get('AS26_PRELOAD', '1') != '0'
+
+# Imported by ``preload``: everything the tabs' actions need.
+HEAVY_MODULES = ['pdf_extract', 'ocr_engine', 'excel_export', 'ingest', 'tally_summary', 'reconcile', 'alias_index',
+                 'transaction_store']
+
+@st.cache_resource
+def preload():
+    # Once per process, after the first page is drawn
+    def load():
+        for name in HEAVY_MODULES:
+            __import__(name)
+    thread = threading.Thread(target=load, name='as26-preload', daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource
+def get_result_cache():
+    # One cache per server process, shared by every session
+    from pdf_extract import cache_version
+    return ResultCache(version=cache_version())
+
+@st.cache_resource
+def get_ocr_pool():
+    # One OCR pool for every conversion, so concurrent users share its workers
+    from ocr_engine import default_workers, ocr_pool
+    return ocr_pool(default_workers())
+
+_pool_lock = threading.Lock()
+
+def replace_ocr_pool(broken):
+    """The shared OCR pool, started afresh if it is still ``broken`` (a worker died, e.g. killed for memory)."""
+    with _pool_lock:
+        if get_ocr_pool() is broken:
+            get_ocr_pool.clear()
+            broken.shutdown(wait=False, cancel_futures=True)
+        return get_ocr_pool()
+
+@st.cache_resource
+def get_alias_index():
+    # Party aliases learnt from earlier reconciliations, per client
+    from alias_index import AliasIndex
+    return AliasIndex()
+
+@st.cache_resource
+def get_transaction_store():
+    # Every transaction of the statements converted for a client
+    from transaction_store import TransactionStore
+    return TransactionStore()
+
+class KeptResult:
+    """A tab's output table, kept in the session for the Reconciliation tab."""
+
+    def __init__(self, name, table, digest, label):
+        self.name = name        # the file it came from
+        self.table = table      # pyarrow.Table
+        self.digest = digest    # identifies the content, for job keys
+        self.label = label      # "the 26AS extracted from statement.pdf"
+
+class StoredStatement:
+    """A client's 26AS for one assessment year, summarised from the transaction store."""
+
+    def __init__(self, client, assessment_year, statement):
+        self.client = client
+        self.assessment_year = assessment_year
+        self.name = f"{client} AY {assessment_year}"
+        self.digest = statement  # the stored statement's digest
+
+def keep_result(kind, result):
+    st.session_state.setdefault('kept', {})[kind] = result
+
+def kept_result(kind):
+    return st.session_state.get('kept', {}).get(kind)
+
+def summary_source(kind, label, key):
+    """The kept ``kind`` table if the user reconciles from it, else their upload (or ``None``)."""
+    kept = kept_result(kind)
+    if kept and st.toggle(f"Use {kept.label}", value=True, key=f"use_{key}"):
+        return kept
+    return st.file_uploader(label, type=list(SUMMARY_FORMATS), key=key)
+
+def workbook_download(label, builder, tables, file_name):
+    """Download button that builds the workbook from ``tables`` only when clicked."""
+    def build():
+        import excel_export
+        return getattr(excel_export, builder)(*(t.to_pandas() for t in tables)).getvalue()
+    st.download_button(label, data=build, file_name=file_name)
+
+# --- BACKGROUND JOBS (run on the job pool; no Streamlit calls in here) ---
+def run_conversion(job, pdf, result_cache, pool, client=None, store=None):
+    from concurrent.futures.process import BrokenProcessPool
+
+    import pyarrow as pa
+    from ocr_engine import default_workers
+    from pdf_extract import extract_statement, extract_table, page_count
+
+    stored = transactions = None
+    with measured('pdf_to_excel', size_mb=round(pdf.size / 1e6, 2)) as run:
+        total_pages = page_count(pdf.path)
+        job.report(0, "Scanning PDF...")
+        on_page = lambda i, source: job.report((i + 1) / total_pages, f"Scanned page {i + 1} of {total_pages}")
+        extract = extract_statement if client else extract_table
+        try:
+            extracted = extract(pdf.path, workers=default_workers(), cache=result_cache, pool=pool, metrics=run,
+                                on_page=on_page)
+        except BrokenProcessPool:
+            # Once more on a fresh pool; the pages already read come from the cache.
+            job.report(0, "OCR workers restarted, scanning PDF again...")
+            extracted = extract(pdf.path, workers=default_workers(), cache=result_cache, pool=replace_ocr_pool(pool),
+                                metrics=run, on_page=on_page)
+        if client:
+            df, transactions, year, page_sources = extracted
+        else:
+            df, page_sources = extracted
+        # extract_table/extract_statement already time and count 'tabulate'.
+        with run.stage('to_arrow'):
+            table = pa.Table.from_pandas(df, preserve_index=False) if not df.empty else None
+        if client and table is not None:
+            if not year:
+                raise ValueError("The statement has no assessment year, so its transactions cannot be stored.")
+            with run.stage('store', rows=len(transactions)):
+                stored = {'client': client, 'assessment_year': year,
+                          'transactions': store.add(client, year, transactions, pdf.digest),
+                          'summary': pa.Table.from_pandas(store.party_summary(client, year), preserve_index=False)}
+                transactions = pa.Table.from_pandas(transactions, preserve_index=False)
+    return {
+        'rows': len(df),
+        'table': table,
+        'transactions': transactions,
+        'stored': stored,
+        'source': pdf.name,
+        'page_sources': page_sources,
+        'cache_stats': result_cache.stats(),
+        'diagnostics': run.to_dict()
+    }
+
+def read_side(source, amount_column):
+    """A reconciliation input as a DataFrame: a kept table or a spooled upload."""
+    from ingest import read_summary
+
+    if isinstance(source, KeptResult):
+        return source.table.to_pandas()
+    if isinstance(source, StoredStatement):
+        return get_transaction_store().party_summary(source.client, source.assessment_year)
+    return read_summary(source.path, source.name, amount_column)
+
+def run_reconciliation(job, books, as26, threshold, match_mode, client, aliases):
+    from excel_export import reconciliation_workbook
+    from reconcile import reconcile
+
+    with measured('reconciliation', threshold=threshold, mode=match_mode) as run:
+        job.report(0.05, "Reading summaries...")
+        with run.stage('read') as stage:
+            df_books = read_side(books, 'Amount in Books')
+            df_26as = read_side(as26, 'Amount in 26AS')
+            stage.count(rows=len(df_books) + len(df_26as))
+        job.report(0.2, "Matching parties...")
+        final_df = reconcile(df_books, df_26as, threshold, mode=match_mode, metrics=run, aliases=aliases, client=client)
+        job.report(0.9, "Writing statement...")
+        with run.stage('export', rows=len(final_df)):
+            output = reconciliation_workbook(final_df).getvalue()
+    stage = run.stages.get('aliases')
+    return {'output': output, 'aliases': stage.counts if stage else None, 'diagnostics': run.to_dict()}
+
+def show_conversion(job):
+    result = job.result
+    if result['table'] is None:
+        st.error("No valid data found. Please check PDF quality.")
+        return
+    stored = result['stored']
+    if stored:
+        # Reconciled per TAN from the stored transactions
+        keep_result('26as', KeptResult(result['source'], stored['summary'], job.digest,
+                                       f"the stored 26AS of {stored['client']}, AY {stored['assessment_year']}"))
+    else:
+        keep_result('26as', KeptResult(result['source'], result['table'], job.digest,
+                                       f"the 26AS extracted from {result['source']}"))
+    page_sources, cache_stats = result['page_sources'], result['cache_stats']
+    st.success(f"✅ Extracted {result['rows']} rows successfully.")
+    if stored:
+        st.caption(f"Saved {stored['transactions']:,} transactions to the store for {stored['client']}, "
+                   f"assessment year {stored['assessment_year']}.")
+    st.caption(f"Pages: {page_sources['text']} from the PDF text layer, {page_sources['ocr']} OCR'd, {page_sources['cache']} from cache "
+               f"(cache hits {cache_stats['hits']}, misses {cache_stats['misses']}).")
+    tables = [result['table']] + ([result['transactions']] if result['transactions'] is not None else [])
+    workbook_download("Download Excel File", 'extract_workbook', tables, "26AS_Extracted_Data.xlsx")
+    st.caption("The Reconciliation tab can use this table directly.")
+    show_diagnostics(result['diagnostics'])
+
+def show_reconciliation(job):
+    st.success("Reconciliation Complete!")
+    st.caption(f"Sensitivity {job.params['threshold']}, {job.params['mode'].replace('_', '-')} matching.")
+    counts = job.result['aliases']
+    if counts:
+        st.caption(f"Alias index for {job.params['client']}: {counts['exact']} parties paired by exact name, "
+                   f"{counts['alias']} by known alias, {counts['miss']} known to have no match; "
+                   f"{counts['parties'] - counts['exact'] - counts['alias'] - counts['miss']} fuzzy-matched.")
+    st.download_button("Download Reconciliation Statement", data=job.result['output'], file_name="Reconciliation_Statement.xlsx")
+    show_diagnostics(job.result['diagnostics'])
+
+def render():
+    """Draw the tool: one tab per sub-tool."""
+    st.markdown("### 📂 26AS Reconciliation Suite")
+    st.markdown("Select a function below to process your audit files.")
+    
+    # TABS
+    tab1, tab2, tab3 = st.tabs(["PDF to Excel", "Tally Summary", "Reconciliation"])
+
+    # --- SUB-TOOL 1: PDF to Excel (OCR) ---
+    with tab1:
+        st.markdown("<div class='tool-card'>", unsafe_allow_html=True) # Start Card
+        st.markdown("#### 📄 Convert 26AS PDF to Excel")
+        
+        col1, col2 = st.columns([1, 1], gap="large")
+        
+        with col1:
+            st.markdown("**Step 1: Upload File**")
+            uploaded_pdf = st.file_uploader("Upload 26AS PDF", type="pdf", key="t1", label_visibility="collapsed")
+            store_client = st.text_input("Client (optional)", key="client1", placeholder="e.g. ABC Traders or PAN",
+                                         help="Saves every transaction of the statement to the transaction store "
+                                              "under this client and the statement's assessment year").strip()
+            
+            if uploaded_pdf:
+                st.markdown("---")
+                if st.button("🚀 Start Conversion", key="btn1"):
+                    pdf = spool(uploaded_pdf)
+                    store = get_transaction_store() if store_client else None
+                    submit_job("convert", digest_bytes(pdf.digest, store_client), run_conversion, pdf,
+                               get_result_cache(), get_ocr_pool(), store_client, store)
+            
+            # Runs in the background: keeps going (and stays downloadable) across reruns
+            show_job("convert", show_conversion)
+
+        with col2:
+            st.markdown("""
+                <div style="background-color:#F8FAFC; padding:24px; border-radius:12px; border: 1px solid #E2E8F0;">
+                    <strong style="color:#0F172A; font-size:16px;">💡 INSTRUCTIONS</strong>
+                    <ol style="margin-top:12px; color:#475569; padding-left:20px; line-height:1.6;">
+                        <li>Download your 26AS as a <b>PDF</b> from the portal.</li>
+                        <li>Drag and drop the file into the box on the left.</li>
+                        <li>Click <b>START CONVERSION</b> and wait (OCR is processing).</li>
+                        <li>Download the cleaned Excel sheet.</li>
+                    </ol>
+                </div>
+            """, unsafe_allow_html=True)
+            
+        st.markdown("</div>", unsafe_allow_html=True) # End Card
+
+    # --- SUB-TOOL 2: Tally Summary ---
+    with tab2:
+        st.markdown("<div class='tool-card'>", unsafe_allow_html=True)
+        st.markdown("#### 📒 Tally Ledger to Summary")
+        
+        uploaded_tally = st.file_uploader("Upload Tally Export (Excel, CSV or Tally XML)", type=list(LEDGER_FORMATS), key="t2")
+        
+        if uploaded_tally:
+            if st.button("Generate Summary", key="btn2"):
+                import pyarrow as pa
+                from excel_export import summary_workbook
+                from ingest import iter_ledger_chunks
+                from tally_summary import summarise_chunks
+
+                try:
+                    ledger = spool(uploaded_tally)
+                    with measured('tally_summary', size_mb=round(ledger.size / 1e6, 2)) as run:
+                        with run.stage('summarise') as stage:
+                            chunks = run.iterate('read', iter_ledger_chunks(ledger.path, ledger.name), unit='rows')
+                            parties_data, rejected = summarise_chunks(chunks)
+                            stage.count(parties=len(parties_data))
+                        
+                        with run.stage('tabulate', rows=len(parties_data)):
+                            table = pa.Table.from_pandas(
+                                parties_data.rename('Amount as per Books').rename_axis('Name of Party').reset_index(),
+                                preserve_index=False)
+                        
+                        with run.stage('export', rows=len(parties_data)):
+                            output = summary_workbook(parties_data)
+                    
+                    keep_result('books', KeptResult(ledger.name, table, ledger.digest,
+                                                    f"the Tally Summary of {ledger.name}"))
+                    st.success(f"Processed! Found {len(parties_data)} unique parties.")
+                    st.download_button("Download Party Summary", data=output, file_name="Party_Summary.xlsx")
+                    st.caption("The Reconciliation tab can use this summary directly.")
+                    
+                    with st.expander(f"Rows left out of the summary ({len(rejected)})"):
+                        st.dataframe(rejected['Reason'].value_counts().rename('Rows'))
+                        st.dataframe(rejected)
+                    show_diagnostics(run.to_dict())
+                    
+                except Exception as e:
+                    st.error(f"Error: {e}")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # --- SUB-TOOL 3: Reconciliation ---
+    with tab3:
+        st.markdown("<div class='tool-card'>", unsafe_allow_html=True)
+        st.markdown("#### 🔍 Reconcile Books vs 26AS")
+        
+        c1, c2 = st.columns(2)
+        with c1:
+            source_books = summary_source('books', "Upload Books Summary", key="f1")
+        with c2:
+            source_26as = summary_source('26as', "Upload 26AS Summary", key="f2")
+            
+        st.markdown("<br>", unsafe_allow_html=True)
+        client = st.text_input("Client", key="client3", placeholder="e.g. ABC Traders FY 2024-25 or PAN",
+                               help="Pairs confirmed for this client are remembered and reused on the next reconciliation").strip()
+        if client and source_26as is None:
+            stored = get_transaction_store().years(client)
+            if stored:
+                year = st.selectbox(f"26AS of {client} from the transaction store", [None, *stored],
+                                    format_func=lambda y: "Don't use" if y is None else f"Assessment year {y}",
+                                    key="stored3")
+                if year: source_26as = StoredStatement(client, year, stored[year])
+        threshold = st.slider("Fuzzy Match Sensitivity", 50, 100, 75, help="Lower = looser matching")
+        match_mode = st.radio(
+            "Matching Mode",
+            ["one_to_one", "best"],
+            format_func=lambda m: {"one_to_one": "One-to-one (each 26AS party used once)", "best": "Best match per party"}[m],
+            horizontal=True,
+            help="One-to-one finds the best overall pairing, so two book parties cannot claim the same 26AS deductor"
+        )
+
+        if source_books and source_26as:
+            if st.button("Run Reconciliation", key="btn3"):
+                books, as26 = (s if isinstance(s, (KeptResult, StoredStatement)) else spool(s)
+                               for s in (source_books, source_26as))
+                aliases = get_alias_index() if client else None
+                digest = digest_bytes(books.digest, as26.digest, threshold, match_mode, client,
+                                      aliases.revision(client) if aliases else None)
+                submit_job("reconcile", digest, run_reconciliation, books, as26, threshold, match_mode, client, aliases,
+                           params={'threshold': threshold, 'mode': match_mode, 'client': client})
+        
+        show_job("reconcile", show_reconciliation)
+
+        with st.expander("Party alias index"):
+            st.caption("Books-to-26AS name pairs learnt from earlier reconciliations. Export them to review in Excel; "
+                       "import a CSV (books_name, as26_name, optional tan) to add confirmed pairs.")
+            a1, a2 = st.columns(2)
+            with a1:
+                scope = f"for {client}" if client else "for all clients"
+                # Built only when clicked; the index can be large
+                st.download_button(f"Export aliases {scope}", data=lambda: get_alias_index().export_csv(client or None),
+                                   file_name="Party_Aliases.csv", mime="text/csv")
+            with a2:
+                alias_file = st.file_uploader("Import aliases (CSV)", type="csv", key="aliases3")
+                if alias_file and st.button("Import", key="btn_aliases3"):
+                    try:
+                        n = get_alias_index().import_csv(alias_file.getvalue().decode('utf-8-sig'), client=client or None)
+                        st.success(f"Imported {n} alias(es).")
+                    except ValueError as e:
+                        st.error(f"Error: {e}")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    if PRELOAD: preload()
@@ -0,0 +1,69 @@
+"""The GST Utilities tool: GSTR-2B vs purchase register reconciliation.
+
+Drawn the same way as the 26AS tool: uploads are spooled to disk, the
+reconciliation runs as a background job (``ui_jobs.submit_job``) and
+pandas, openpyxl and rapidfuzz are only imported inside it.
+"""
+import streamlit as st
+
+from file_formats import INVOICE_FORMATS
+from metrics import measured
+from result_cache import digest_bytes
+from ui_jobs import show_diagnostics, show_job, submit_job
+from uploads import spool
+
+# --- BACKGROUND JOB (runs on the job pool; no Streamlit calls in here) ---
+def run_gst_reconciliation(job, gstr2b, books, tolerance, threshold):
+    from excel_export import gst_reconciliation_workbook
+    from gst_reconcile import reconcile_invoices, summarise
+    from ingest import read_invoices
+
+    with measured('gst_reconciliation', tolerance=tolerance, threshold=threshold) as run:
+        job.report(0.05, "Reading GSTR-2B and purchase register...")
+        with run.stage('read') as stage:
+            df_2b = read_invoices(gstr2b.path, gstr2b.name, sheet='B2B')
+            df_books = read_invoices(books.path, books.name)
+            stage.count(rows=len(df_2b) + len(df_books))
+        job.report(0.4, "Matching invoices...")
+        statement = reconcile_invoices(df_books, df_2b, tolerance, threshold, metrics=run)
+        summary = summarise(statement)
+        job.report(0.6, f"Writing statement ({len(statement):,} invoices)...")
+        with run.stage('export', rows=len(statement)):
+            output = gst_reconciliation_workbook(statement, summary).getvalue()
+    return {'output': output, 'summary': summary, 'diagnostics': run.to_dict()}
+
+def show_gst_reconciliation(job):
+    st.success("Reconciliation Complete!")
+    st.caption(f"Amounts agree within ₹{job.params['tolerance']:g}; invoice number sensitivity {job.params['threshold']}.")
+    st.dataframe(job.result['summary'], hide_index=True)
+    st.download_button("Download GSTR-2B Reconciliation", data=job.result['output'],
+                       file_name="GSTR2B_Reconciliation.xlsx")
+    show_diagnostics(job.result['diagnostics'])
+
+def render():
+    """Draw the tool."""
+    st.markdown("### 📊 GST Utilities")
+    st.markdown("<div class='tool-card'>", unsafe_allow_html=True)
+    st.markdown("#### 🧾 GSTR-2B vs Purchase Register")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        uploaded_2b = st.file_uploader("Upload GSTR-2B (portal Excel or JSON)", type=list(INVOICE_FORMATS), key="g1")
+    with c2:
+        uploaded_books = st.file_uploader("Upload Purchase Register (Excel or CSV)", type=list(INVOICE_FORMATS), key="g2")
+
+    tolerance = st.number_input("Amount tolerance (₹)", min_value=0.0, value=1.0, step=1.0, key="tolerance_g",
+                                help="Taxable value and tax may differ by this much for an invoice to count as matched")
+    threshold = st.slider("Invoice Number Sensitivity", 50, 100, 85, key="threshold_g",
+                          help="For invoices whose numbers differ: how alike they must be to pair, "
+                               "within the same GSTIN and amounts. Lower = looser matching")
+
+    if uploaded_2b and uploaded_books:
+        if st.button("Run Reconciliation", key="btn_g"):
+            gstr2b, books = spool(uploaded_2b), spool(uploaded_books)
+            submit_job("gst_reconcile", digest_bytes(gstr2b.digest, books.digest, tolerance, threshold),
+                       run_gst_reconciliation, gstr2b, books, tolerance, threshold,
+                       params={'tolerance': tolerance, 'threshold': threshold})
+
+    show_job("gst_reconcile", show_gst_reconciliation)
+    st.markdown("</div>", unsafe_allow_html=True)
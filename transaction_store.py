@@ -0,0 +1,203 @@
+"""Columnar store of 26AS transactions, for summaries and firm-wide queries.
+
+Every transaction read by ``pdf_extract.extract_statement`` is kept as Parquet
+under ``AS26_STORE_DIR``, partitioned by client and assessment year (the
+folder names URL-encoded)::
+
+    <store>/client=ACME%20LTD/assessment_year=2024-25/<statement digest>-0.parquet
+
+A statement replaces whatever was stored for its client and year: a later
+26AS download for the same year supersedes the earlier one.
+
+Summaries and reconciliations are aggregations over the store rather than
+re-parses of PDFs. Queries go through a ``pyarrow.dataset``, so a filter on
+client or year only opens the matching partitions, only the columns used are
+read, and grouping runs in Arrow:
+
+    python transaction_store.py statements
+    python transaction_store.py sections --year 2024-25
+    python transaction_store.py parties --client "Acme Ltd" --year 2024-25 --csv acme.csv
+"""
+import argparse
+import os
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from clients import client_key
+from tan_parser import TRANSACTION_COLUMNS
+
+STORE_DIR = os.environ.get('AS26_STORE_DIR', os.path.join(os.path.expanduser('~'), '.ai-tools', 'transactions'))
+
+# Store column for each ``TRANSACTION_COLUMNS`` heading.
+COLUMNS = dict(zip(TRANSACTION_COLUMNS, [
+    'tan', 'party', 'part', 'section', 'transaction_date', 'status', 'booking_date',
+    'amount_paid', 'tax_deducted', 'tds_deposited',
+]))
+AMOUNTS = ['amount_paid', 'tax_deducted', 'tds_deposited']
+
+SCHEMA = pa.schema([
+    ('tan', pa.string()),
+    ('party', pa.string()),
+    ('part', pa.string()),
+    ('section', pa.string()),
+    ('transaction_date', pa.date32()),
+    ('status', pa.string()),
+    ('booking_date', pa.date32()),
+    ('amount_paid', pa.float64()),
+    ('tax_deducted', pa.float64()),
+    ('tds_deposited', pa.float64()),
+])
+PARTITION_SCHEMA = pa.schema([('client', pa.string()), ('assessment_year', pa.string())])
+
+# Parts of the statement listing tax deducted at source (Part-I, and Part-II
+# for 15G/15H declarations), as opposed to TCS, property sales and so on.
+TDS_PARTS = ('I', 'II')
+
+
+def _partitioning():
+    return ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+
+class TransactionStore:
+    """Parquet dataset of transactions, partitioned by client and assessment year."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def add(self, client, assessment_year, transactions, statement='statement'):
+        """Store a statement's ``transactions`` (as ``extract_statement`` gives).
+
+        Replaces what was stored for ``client`` and ``assessment_year``.
+        ``statement`` (e.g. the PDF's digest) names the file. Returns the
+        number of transactions stored.
+        """
+        if not assessment_year:
+            raise ValueError("The statement's assessment year is needed to store its transactions")
+        table = pa.Table.from_pandas(transactions.rename(columns=COLUMNS)[SCHEMA.names], schema=SCHEMA,
+                                     preserve_index=False)
+        # Sorted, each row group's statistics cover few TANs and dates.
+        table = table.sort_by([('tan', 'ascending'), ('transaction_date', 'ascending')])
+        table = table.append_column('client', pa.array([client_key(client)] * len(table), pa.string()))
+        table = table.append_column('assessment_year', pa.array([assessment_year] * len(table), pa.string()))
+        ds.write_dataset(table, self.root, format='parquet', partitioning=_partitioning(),
+                         basename_template=f'{statement}-{{i}}.parquet',
+                         existing_data_behavior='delete_matching')
+        return len(table)
+
+    def dataset(self):
+        """The whole store as a ``pyarrow.dataset.Dataset``."""
+        schema = pa.unify_schemas([SCHEMA, PARTITION_SCHEMA])
+        if not os.path.isdir(self.root):
+            return ds.dataset([], schema=schema, format='parquet')
+        return ds.dataset(self.root, schema=schema, format='parquet', partitioning=_partitioning())
+
+    def transactions(self, clients=None, years=None, columns=None, filter=None):
+        """Stored transactions as a ``pyarrow.Table``.
+
+        ``clients`` and ``years`` restrict the partitions read; ``filter`` is
+        any further ``pyarrow.dataset`` expression.
+        """
+        return self.dataset().to_table(columns=columns, filter=_where(clients, years, filter))
+
+    def aggregate(self, by, clients=None, years=None, filter=None):
+        """Transaction count and amount totals grouped by the columns ``by``, as a DataFrame."""
+        columns = list(dict.fromkeys([*by, *AMOUNTS]))
+        table = self.transactions(clients, years, columns, filter)
+        table = table.group_by(by).aggregate([([], 'count_all'), *[(a, 'sum') for a in AMOUNTS]])
+        table = table.rename_columns({'count_all': 'transactions', **{f'{a}_sum': a for a in AMOUNTS}})
+        df = table.sort_by([(c, 'ascending') for c in by]).to_pandas()[[*by, 'transactions', *AMOUNTS]]
+        df[AMOUNTS] = df[AMOUNTS].round(2)
+        return df
+
+    def party_summary(self, client, assessment_year, amount='tax_deducted', parts=TDS_PARTS):
+        """A client's 26AS side for reconciliation, without reading the PDF again.
+
+        One row per deductor TAN with ``amount`` summed over its transactions
+        in ``parts``, in the columns ``extract_table`` gives.
+        """
+        where = pc.field('part').is_null() | pc.field('part').isin(list(parts)) if parts else None
+        table = self.transactions([client], [assessment_year], ['tan', 'party', amount], where)
+        table = table.group_by('tan', use_threads=False).aggregate([('party', 'first'), (amount, 'sum')])
+        df = table.to_pandas().rename(columns={
+            'party_first': 'Name of Party', f'{amount}_sum': 'Amount showing in 26AS', 'tan': 'TAN'})
+        df = df[['Name of Party', 'Amount showing in 26AS', 'TAN']]
+        df['Amount showing in 26AS'] = df['Amount showing in 26AS'].round(2)
+        return df.sort_values(['Name of Party', 'TAN']).reset_index(drop=True)
+
+    def years(self, client):
+        """``{assessment_year: statement}`` stored for ``client``, latest year first.
+
+        Read from the folder names alone, so it is cheap enough for every page run.
+        """
+        # The same encoding pyarrow gives partition folder names.
+        folder = os.path.join(self.root, 'client=' + quote(client_key(client), safe=''))
+        if not os.path.isdir(folder): return {}
+        found = {}
+        for entry in os.scandir(folder):
+            files = [f.name for f in os.scandir(entry.path) if f.name.endswith('.parquet')]
+            if files: found[unquote(entry.name.partition('=')[2])] = files[0].rsplit('-', 1)[0]
+        return dict(sorted(found.items(), reverse=True))
+
+    def statements(self):
+        """One row per stored statement: client, assessment year, statement and transactions.
+
+        Read from the Parquet footers alone.
+        """
+        rows = []
+        for fragment in self.dataset().get_fragments():
+            keys = ds.get_partition_keys(fragment.partition_expression)
+            rows.append({
+                'client': keys.get('client'),
+                'assessment_year': keys.get('assessment_year'),
+                'statement': os.path.basename(fragment.path).rsplit('-', 1)[0],
+                'transactions': fragment.metadata.num_rows,
+            })
+        columns = ['client', 'assessment_year', 'statement', 'transactions']
+        return pd.DataFrame(rows, columns=columns).sort_values(columns[:2]).reset_index(drop=True)
+
+
+def _where(clients=None, years=None, filter=None):
+    where = filter
+    for column, values in (('client', clients and [client_key(c) for c in clients]), ('assessment_year', years)):
+        if not values: continue
+        condition = pc.field(column).isin(list(values))
+        where = condition if where is None else where & condition
+    return where
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the 26AS transaction store.')
+    parser.add_argument('query', choices=['statements', 'sections', 'deductors', 'parties'])
+    parser.add_argument('--store', default=STORE_DIR, help='store folder (default: AS26_STORE_DIR)')
+    parser.add_argument('--client', action='append', help='only this client (repeatable)')
+    parser.add_argument('--year', action='append', help='only this assessment year, e.g. 2024-25 (repeatable)')
+    parser.add_argument('--csv', help='write the result to this CSV file instead of printing it')
+    args = parser.parse_args()
+
+    store = TransactionStore(args.store)
+    if args.query == 'statements':
+        df = store.statements()
+        if args.client: df = df[df['client'].isin([client_key(c) for c in args.client])]
+        if args.year: df = df[df['assessment_year'].isin(args.year)]
+    elif args.query == 'sections':
+        df = store.aggregate(['client', 'assessment_year', 'section'], args.client, args.year)
+    elif args.query == 'deductors':
+        df = store.aggregate(['tan', 'assessment_year'], args.client, args.year)
+    else:
+        if not (args.client and args.year) or len(args.client) > 1 or len(args.year) > 1:
+            parser.error('parties needs one --client and one --year')
+        df = store.party_summary(args.client[0], args.year[0])
+
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"{len(df)} rows written to {args.csv}")
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Background jobs for the Streamlit tools: submitting them, showing progress and results.
+
+Every tool runs its long work (conversions, reconciliations) on the one
+process-wide ``jobs.JobManager``, keyed by the browser session, so it keeps
+going across reruns and is shown again on each.
+"""
+import uuid
+
+import streamlit as st
+
+from jobs import FAILED, QUEUED, JobManager
+
+JOB_POLL_SECONDS = 1
+
+@st.cache_resource
+def get_job_manager():
+    # Jobs outlive the rerun that submitted them; all sessions share the pool
+    return JobManager()
+
+def session_id():
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    return st.session_state['session_id']
+
+def submit_job(kind, digest, fn, *args, params=None):
+    st.session_state.setdefault('jobs', {})[kind] = digest
+    return get_job_manager().submit(session_id(), kind, digest, fn, *args, params=params)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_job(job):
+    # Redraws only this block while the job runs, then reruns the page once
+    if not job.active:
+        st.rerun()
+    if job.status == QUEUED:
+        ahead = get_job_manager().queue_position(job)
+        st.info(f"⏳ Queued: waiting for a free worker ({ahead} job(s) ahead).")
+    else:
+        st.progress(job.progress, text=job.message or "Working...")
+
+def show_job(kind, show_result):
+    """Show this session's latest ``kind`` job: progress while it runs, then its result."""
+    digest = st.session_state.get('jobs', {}).get(kind)
+    job = get_job_manager().get(session_id(), kind, digest) if digest else None
+    if job is None: return
+    if job.active:
+        poll_job(job)
+    elif job.status == FAILED:
+        st.error(f"Error: {job.error}")
+    else:
+        show_result(job)
+
+def show_diagnostics(record):
+    """Expandable per-stage breakdown of a finished run."""
+    import pandas as pd
+
+    with st.expander("Run diagnostics"):
+        peak = f", peak memory {record['peak_rss_mb']:.0f} MB" if record['peak_rss_mb'] is not None else ""
+        st.caption(f"Run {record['run']}: {record['seconds']:.2f}s wall, {record['cpu_seconds']:.2f}s CPU{peak}. "
+                   "Stage times exclude nested stages; OCR is time spent waiting on the OCR workers.")
+        st.dataframe(pd.DataFrame([{
+            'Stage': s['stage'],
+            'Calls': s['calls'],
+            'Wall (s)': s['seconds'],
+            'CPU (s)': s['cpu_seconds'],
+            'Memory growth (MB)': s['rss_growth_mb'],
+            'Processed': ', '.join(f"{n:,} {unit}" for unit, n in s['counts'].items()),
+            'Throughput': ', '.join(f"{rate:,.0f} {unit.replace('_per_s', '')}/s" for unit, rate in s['throughput'].items())
+        } for s in record['stages']]), hide_index=True)
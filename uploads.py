@@ -0,0 +1,64 @@
+"""Spooling of uploaded files to disk.
+
+Streamlit keeps every upload in memory. Taking ``getvalue()`` of it and
+handing the bytes to a job added another full copy per file, and the PDF
+path then wrote the bytes out again to a temp file for poppler. Instead an
+upload is hashed and written to a file under ``AS26_SPOOL_DIR``, named by
+its SHA-256, straight from a view of Streamlit's buffer (no copy), and jobs
+read it by path: pdfplumber, poppler and the spreadsheet readers all take a
+path, and the OS page cache shares the one file between them.
+
+Content already spooled is not written again. Spooled files are removed
+once unused for ``AS26_SPOOL_TTL`` seconds.
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+SPOOL_DIR = os.environ.get('AS26_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'ai-tools-uploads'))
+SPOOL_TTL = int(os.environ.get('AS26_SPOOL_TTL', 24 * 3600))
+
+
+class SpooledFile:
+    """An upload on disk: its original ``name``, ``path``, ``size`` and ``digest``."""
+
+    def __init__(self, name, path, size, digest):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    def __repr__(self):
+        return f"SpooledFile({self.name!r}, {self.size} bytes)"
+
+
+def spool(uploaded, directory=SPOOL_DIR):
+    """Write ``uploaded`` (a ``BytesIO`` with a ``name``, as Streamlit gives) to disk."""
+    os.makedirs(directory, exist_ok=True)
+    _expire(directory)
+    with uploaded.getbuffer() as view:
+        digest = hashlib.sha256(view).hexdigest()
+        path = os.path.join(directory, digest + os.path.splitext(uploaded.name)[1].lower())
+        if os.path.exists(path):
+            os.utime(path)  # in use again
+        else:
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(view)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return SpooledFile(uploaded.name, path, len(view), digest)
+
+
+def _expire(directory):
+    cutoff = time.time() - SPOOL_TTL
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass  # removed by another session meanwhile